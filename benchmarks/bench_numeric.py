@@ -0,0 +1,66 @@
+# Compara a conversão célula a célula (to_float) com a vetorizada (parse_brl_series); equivalência em
+# tests/test_core.py.
+# Uso: python -m benchmarks.bench_numeric [linhas]
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.reference import parse_reference
+from dashboard_core import parse_brl_series
+
+NUMERIC_COLS = [
+    "Necessidade Prof.", "Necessidade Aluno", "Necessidade Compra", "Menor Preço",
+    "custo", "Melhor Preço", "Qtd Negociada", "Valor Total Compra",
+]
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col in NUMERIC_COLS:
+        values = rng.gamma(2.0, 500.0, rows).round(2)
+        txt = pd.Series(values).map(lambda v: f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+        # ~20% vazios e algumas células inválidas, como nas planilhas reais
+        txt[rng.random(rows) < 0.2] = ""
+        txt[rng.random(rows) < 0.01] = "-"
+        data[col] = txt
+    return pd.DataFrame(data)
+
+
+def run(rows):
+    df = make_frame(rows)
+
+    start = time.perf_counter()
+    for col in NUMERIC_COLS:
+        parse_reference(df[col])
+    t_apply = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vec = {col: parse_brl_series(df[col]) for col in NUMERIC_COLS}
+    t_vec = time.perf_counter() - start
+
+    # segunda passada (filtered_df / colunas "Valor ..."): as colunas já são float
+    floats = pd.DataFrame({col: vec[col][0] for col in NUMERIC_COLS})
+    start = time.perf_counter()
+    for col in NUMERIC_COLS:
+        parse_reference(floats[col])
+    t_apply_float = time.perf_counter() - start
+    start = time.perf_counter()
+    for col in NUMERIC_COLS:
+        parse_brl_series(floats[col])
+    t_vec_float = time.perf_counter() - start
+
+    failures = sum(n for _, n in vec.values())
+    print(f"linhas={rows} colunas={len(NUMERIC_COLS)} falhas={failures}")
+    print("texto BRL:")
+    print(f"  to_float (apply):  {t_apply:8.3f}s")
+    print(f"  parse_brl_series:  {t_vec:8.3f}s  ({t_apply / t_vec:.1f}x)")
+    print("colunas já convertidas:")
+    print(f"  to_float (apply):  {t_apply_float:8.3f}s")
+    print(f"  parse_brl_series:  {t_vec_float:8.3f}s  ({t_apply_float / max(t_vec_float, 1e-9):.1f}x)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,159 @@
+# Tempo de cada etapa do dashboard sobre uma planilha sintética (benchmarks.generate), comparado
+# com a baseline local em benchmarks/baseline.json (por número de linhas, fora do git). Sai com
+# código 1 se alguma etapa ficar mais lenta que baseline * tolerância; sem baseline para o número de
+# linhas, só mostra os tempos.
+# Uso: python -m benchmarks.bench_pipeline [linhas] [--repeticoes N] [--tolerancia 1.5]
+#                                          [--formato csv|xlsx] [--salvar-baseline]
+# A baseline depende da máquina: gere a sua com --salvar-baseline antes de comparar.
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+import plotly.express as px
+
+from benchmarks.generate import generate, to_bytes
+from dashboard_core import (
+    NUMERIC_COLS, compact_frame, compute_derived, compute_qtd, convert_numeric_cols, fill_blank,
+    normalize_planilha, read_planilha,
+)
+from dashboard_cube import (
+    build_cube, categoria_faturamento_table, categoria_table, faturamento_table, nota_fiscal_table,
+    slice_cube, status_table,
+)
+from dashboard_export import build_csv_gz, build_parquet, build_xlsx
+from dashboard_report import report_indicators, summary_dict, summary_frame
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def charts(view, need_by_medida):
+    # mesmas figuras do dashboard (construção do objeto, sem renderizar)
+    categoria_df = categoria_table(view)
+    overstock = categoria_df.assign(Overstock=categoria_df["Valor Total Negociado"] - categoria_df["Valor Total Compra"])
+    fat_cat = categoria_faturamento_table(view)
+    nf = nota_fiscal_table(view)
+    return [
+        px.bar(need_by_medida.melt(id_vars="Medida", var_name="Tipo", value_name="Quantidade"),
+               x="Medida", y="Quantidade", color="Tipo", barmode="group"),
+        px.pie(faturamento_table(view), values="Total Compra", names="Faturado?", hole=0.4),
+        px.sunburst(nf, path=["Categoria", "Nota Fiscal"], values="Valor Total Compra", color="Valor Total Compra"),
+        px.pie(categoria_df, values="Valor Total Compra", names="Categoria", hole=0.4),
+        px.bar(overstock, x="Categoria", y="Overstock"),
+        px.bar(fat_cat, x="Categoria", y="Qtd", color="Faturado?", barmode="group"),
+        px.bar(fat_cat, x="Categoria", y="Valor Total Compra", color="Faturado?", barmode="stack"),
+    ]
+
+
+def run_once(data, name):
+    times = {}
+
+    def stage(label, fn):
+        start = time.perf_counter()
+        result = fn()
+        times[label] = time.perf_counter() - start
+        return result
+
+    raw = stage("leitura", lambda: read_planilha(data, name))
+    df, status_col = stage("normalização", lambda: normalize_planilha(raw))
+    stage("conversão numérica (to_float)", lambda: convert_numeric_cols(df, NUMERIC_COLS))
+    df["qtd"] = stage("qtd", lambda: compute_qtd(df))
+    stage("campos financeiros", lambda: compute_derived(df))
+    stage("category", lambda: compact_frame(df, status_col))
+
+    # filtro como no dashboard: metade das categorias, todos os status de faturamento
+    categorias = list(df["Categoria"].unique()[::2])
+    faturamento = list(fill_blank(df["Faturado?"], "Sem Info").unique())
+
+    def filtrar():
+        mask = df["Categoria"].isin(categorias) & fill_blank(df["Faturado?"], "Sem Info").isin(faturamento)
+        return df.iloc[mask.to_numpy().nonzero()[0]]
+
+    filtered = stage("filtro", filtrar)
+    cube = stage("agregação: cubo", lambda: build_cube(df, status_col))
+    view = stage("agregação: recorte do cubo", lambda: slice_cube(cube, categorias, faturamento))
+    summary = stage("agregação: indicadores", lambda: summary_dict(report_indicators(view)))
+    stage("agregação: faturamento", lambda: faturamento_table(view))
+    stage("agregação: status", lambda: status_table(view, status_col))
+    stage("agregação: categoria", lambda: categoria_table(view))
+    stage("agregação: categoria x faturamento", lambda: categoria_faturamento_table(view))
+    stage("agregação: notas fiscais", lambda: nota_fiscal_table(view))
+    need = stage("agregação: necessidade por medida", lambda: (
+        filtered.groupby(filtered["Medida"].fillna("SEM MEDIDA"), observed=True)
+        .agg({"Necessidade Prof.": "sum", "Necessidade Aluno": "sum"}).reset_index()
+    ))
+    stage("gráficos (figuras plotly)", lambda: charts(view, need))
+    summary_df = summary_frame(summary)
+    stage("exportação: excel", lambda: build_xlsx(summary_df, filtered))
+    stage("exportação: csv.gz", lambda: build_csv_gz(summary_df, filtered))
+    stage("exportação: parquet", lambda: build_parquet(summary_df, filtered))
+    return times
+
+
+def load_baseline(rows):
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH, encoding="utf-8") as fh:
+        return json.load(fh).get(str(rows), {})
+
+
+def save_baseline(rows, times):
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    baseline[str(rows)] = {k: round(v, 4) for k, v in times.items()}
+    with open(BASELINE_PATH, "w", encoding="utf-8") as fh:
+        json.dump(baseline, fh, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def report(times, baseline, tolerance):
+    # tabela etapa / tempo / baseline / razão; etapas muito curtas (< 20 ms) não contam como regressão
+    table = pd.DataFrame({"segundos": pd.Series(times)})
+    table["baseline"] = pd.Series(baseline, dtype="float64").reindex(table.index)
+    table["razão"] = table["segundos"] / table["baseline"]
+    table["regressão"] = (table["razão"] > tolerance) & (table["segundos"] > 0.02)
+    table.loc["TOTAL"] = [table["segundos"].sum(), table["baseline"].sum(min_count=1), None, False]
+    table.loc["TOTAL", "razão"] = table.loc["TOTAL", "segundos"] / table.loc["TOTAL", "baseline"]
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("linhas", nargs="?", type=int, default=10_000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--tolerancia", type=float, default=1.5)
+    parser.add_argument("--formato", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--salvar-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    data = to_bytes(generate(args.linhas), args.formato)
+    name = f"bench.{args.formato}"
+    # melhor tempo de cada etapa entre as repetições
+    runs = [run_once(data, name) for _ in range(args.repeticoes)]
+    times = {stage: min(r[stage] for r in runs) for stage in runs[0]}
+
+    baseline = load_baseline(args.linhas)
+    table = report(times, baseline, args.tolerancia)
+    print(f"linhas={args.linhas} formato={args.formato} repetições={args.repeticoes}")
+    with pd.option_context("display.width", 120, "display.float_format", "{:.4f}".format):
+        print(table if baseline else table[["segundos"]])
+    if args.salvar_baseline:
+        save_baseline(args.linhas, times)
+        print(f"baseline salva em {BASELINE_PATH}")
+        return 0
+    if not baseline:
+        print(f"sem baseline local para {args.linhas} linhas: comparação pulada "
+              f"(gere com --salvar-baseline)")
+        return 0
+    regressions = table.index[table["regressão"] == True].tolist()  # noqa: E712
+    if regressions:
+        print(f"regressões (> {args.tolerancia}x a baseline): {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
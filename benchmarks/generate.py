@@ -0,0 +1,136 @@
+# Gera planilhas de compras sintéticas com todas as colunas de EXPECTED_COLS, no formato das reais:
+# valores "R$ 1.234,56", orçamentos vazios, status misturados, muitas categorias e fornecedores.
+# Uso: python -m benchmarks.generate LINHAS ARQUIVO(.csv|.xlsx) [semente]
+import sys
+
+import numpy as np
+import pandas as pd
+
+from dashboard_core import EXPECTED_COLS
+
+CATEGORIAS = [
+    f"{base} {sufixo}".strip()
+    for base in ["Construção", "Elétrica", "Hidráulica", "Papelaria", "Limpeza", "Informática", "Mecânica",
+                 "Alimentos", "Marcenaria", "Pintura", "Ferramentas", "Segurança"]
+    for sufixo in ["", "Geral", "Laboratório"]
+]
+INSUMOS = ["Cabo", "Tubo", "Papel", "Água sanitária", "Parafuso", "Tinta", "Luva", "Fita", "Disjuntor",
+           "Cola", "Lixa", "Broca", "Caneta", "Detergente", "Conector", "Válvula", "Óleo", "Chave"]
+MEDIDAS = ["UN", "M", "KG", "L", "PCT", "CX", "PNL", "RL"]
+STATUS = ["Em Orçamento", "Aguardando", "Entregue", "Cancelado", ""]
+STATUS_PESOS = [0.2, 0.25, 0.35, 0.05, 0.15]
+
+
+def brl(values):
+    # 1234.56 -> "R$ 1.234,56"
+    return [f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") for v in values]
+
+
+def _blank(rng, values, p_empty):
+    values = np.asarray(values, dtype=object)
+    values[rng.random(len(values)) < p_empty] = ""
+    return values
+
+
+def _datas(rng, rows, p_empty):
+    dias = pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D")
+    return _blank(rng, dias.strftime("%d/%m/%Y"), p_empty)
+
+
+def generate(rows, seed=0):
+    # DataFrame só com texto (como a leitura com dtype=str), na ordem de EXPECTED_COLS
+    rng = np.random.default_rng(seed)
+    # categorias e fornecedores com distribuição de cauda longa (poucas concentram a maioria)
+    cat_pesos = 1 / np.arange(1, len(CATEGORIAS) + 1)
+    categoria = rng.choice(CATEGORIAS, rows, p=cat_pesos / cat_pesos.sum())
+    fornecedores = np.array([f"Fornecedor {i:03d}" for i in range(200)])
+    forn_pesos = 1 / np.arange(1, len(fornecedores) + 1)
+
+    codigo = rng.integers(10_000, 99_999, rows)
+    insumo = [f"{INSUMOS[c % len(INSUMOS)]} {c % 997}" for c in codigo]
+    custo = rng.gamma(2.0, 40.0, rows).round(2)
+    melhor = (custo * rng.uniform(0.7, 1.2, rows)).round(2)
+    menor = np.minimum(melhor, (custo * rng.uniform(0.6, 1.0, rows)).round(2))
+    prof = rng.poisson(3, rows)
+    aluno = rng.poisson(5, rows)
+    compra = np.where(rng.random(rows) < 0.6, prof + aluno, 0)
+    negociada = np.where(rng.random(rows) < 0.5, compra + rng.integers(-2, 3, rows).clip(-compra), 0)
+    estoque = rng.poisson(2, rows)
+    status = rng.choice(STATUS, rows, p=STATUS_PESOS)
+    em_orcamento = status == "Em Orçamento"
+
+    data = {col: np.full(rows, "", dtype=object) for col in EXPECTED_COLS}
+    data.update({
+        "Categoria": categoria,
+        "Código": codigo.astype(str),
+        "Insumo": insumo,
+        "Necessidade Prof.": _blank(rng, prof.astype(str), 0.3),
+        "Necessidade Aluno": _blank(rng, aluno.astype(str), 0.3),
+        "Medida": rng.choice(MEDIDAS, rows),
+        "Estoque": _blank(rng, estoque.astype(str), 0.4),
+        "Necessidade Compra": np.where(compra > 0, compra.astype(str), ""),
+        "Menor Preço": _blank(rng, brl(menor), 0.2),
+        "custo": _blank(rng, brl(custo), 0.1),
+        "Situação": status,
+        "Melhor Preço": _blank(rng, brl(melhor), 0.15),
+        "Qtd Negociada": np.where(negociada > 0, negociada.astype(str), ""),
+        "Qtd Armazenada": np.where((status == "Entregue") & (rng.random(rows) < 0.7), compra.astype(str), ""),
+        "Local": _blank(rng, rng.choice(["Almoxarifado", "Lab 1", "Lab 2", "Oficina"], rows), 0.5),
+        "Posição": _blank(rng, [f"P{i}" for i in rng.integers(1, 40, rows)], 0.6),
+        "Fornecedor": _blank(rng, rng.choice(fornecedores, rows, p=forn_pesos / forn_pesos.sum()), 0.3),
+        "Nota Fiscal": _blank(rng, rng.integers(1_000, 9_999, rows).astype(str), 0.5),
+        "Faturado?": rng.choice(["Sim", "Não", ""], rows, p=[0.5, 0.3, 0.2]),
+        "Recompra?": rng.choice(["Sim", "Não", ""], rows, p=[0.1, 0.4, 0.5]),
+        "Data Compra": _datas(rng, rows, 0.3),
+        "Data Entrega": _datas(rng, rows, 0.6),
+        "compras": _blank(rng, rng.integers(1, 20, rows).astype(str), 0.85),
+    })
+    # orçamentos: a maioria vazios; quem está "Em Orçamento" tem ao menos um, e parte dos
+    # status vazios também (viram "Em Orçamento" na normalização)
+    for i, col in enumerate(["Orçamento 1", "Orçamento 2", "Orçamento 3"]):
+        valores = np.asarray(brl((custo * rng.uniform(0.8, 1.3, rows)).round(2)), dtype=object)
+        tem = rng.random(rows) < [0.5, 0.3, 0.15][i]
+        if i == 0:
+            tem |= em_orcamento
+        data[col] = np.where(tem, valores, "")
+    return pd.DataFrame(data, columns=EXPECTED_COLS)
+
+
+def to_bytes(df, fmt="csv"):
+    if fmt == "csv":
+        return df.to_csv(sep=";", index=False).encode("utf-8")
+    from io import BytesIO
+
+    output = BytesIO()
+    df.to_excel(output, index=False)
+    return output.getvalue()
+
+
+def versions(rows, seed=0):
+    # (versão anterior, versão nova com preços/status/notas alterados e linhas removidas/incluídas)
+    raw = generate(rows, seed=seed)
+    rng = np.random.default_rng(seed)
+    new = raw.copy()
+    touched = rng.choice(len(raw), min(60, len(raw)), replace=False)
+    new.loc[touched[:30], "Melhor Preço"] = "R$ 1,00"
+    new.loc[touched[30:45], "Situação"] = "Entregue"
+    new.loc[touched[45:], "Nota Fiscal"] = "NF-NOVA"
+    new = new.drop(index=rng.choice(len(raw), min(5, len(raw)), replace=False))
+    extra = raw.iloc[:3].copy()
+    extra["Código"] = "NOVO"
+    half = len(new) // 2
+    new = pd.concat([new.iloc[:half], extra, new.iloc[half:]], ignore_index=True)
+    return raw, new
+
+
+def main(argv):
+    rows, path = int(argv[1]), argv[2]
+    seed = int(argv[3]) if len(argv) > 3 else 0
+    fmt = "xlsx" if path.endswith(".xlsx") else "csv"
+    with open(path, "wb") as fh:
+        fh.write(to_bytes(generate(rows, seed), fmt))
+    print(f"{rows} linhas -> {path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
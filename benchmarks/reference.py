@@ -0,0 +1,121 @@
+# Implementações anteriores (célula a célula / apply), mantidas só como referência: tests/ verifica
+# que as versões vetorizadas devolvem o mesmo resultado e bench_numeric mede contra parse_reference
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from dashboard_core import EDIT_KEY_COLS, EXPECTED_COLS, ORC_COLS, compute_qtd_row, fill_blank, format_brl, to_float
+from dashboard_delta import DELTA_IGNORE
+from dashboard_quotes import PRICE_TOLERANCE
+from dashboard_timeline import PRAZO_ENTREGA_DIAS, parse_dates
+
+QUOTE_COLS = ["Cotações", "Menor Cotação", "Maior Cotação", "Divergente", "Economia Cotação", "Economia vs Custo", "Excesso Pago"]
+
+
+def parse_reference(series):
+    # parse_brl_series
+    return series.apply(to_float)
+
+
+def qtd_reference(df):
+    # compute_qtd
+    return df.apply(compute_qtd_row, axis=1).astype("float64")
+
+
+def format_reference(values):
+    # format_brl_array
+    return values.apply(format_brl)
+
+
+def normalize_reference(df):
+    # normalize_planilha (is_orcado com apply axis=1, status_norm em texto)
+    df.columns = df.columns.str.strip()
+    if "Categoria" in df.columns:
+        df["Categoria"] = df["Categoria"].astype(str).str.strip()
+    for col in EXPECTED_COLS:
+        if col not in df.columns:
+            df[col] = ""
+    df = df.fillna("").infer_objects()
+    status_col = "N" if "N" in df.columns else "Situação"
+    df[status_col] = df[status_col].astype(str).str.strip()
+    df["is_orcado"] = df[ORC_COLS].fillna("").astype(str).apply(lambda row: any(str(v).strip() != "" for v in row), axis=1)
+    empty_status_mask = df[status_col] == ""
+    df.loc[empty_status_mask & df["is_orcado"], status_col] = "Em Orçamento"
+    df["status_norm"] = df[status_col].str.lower()
+    df = df[df["status_norm"] != ""].copy()
+    return df, status_col
+
+
+def analyze_row(row):
+    # analyze_quotes, uma linha por vez
+    quotes = [q for q in (to_float(row[col]) for col in ORC_COLS) if q > 0]
+    if not quotes:
+        return pd.Series([0, np.nan, np.nan, False, 0.0, 0.0, 0.0], index=QUOTE_COLS)
+    menor, maior = min(quotes), max(quotes)
+    divergent = row["Melhor Preço"] > 0 and abs(row["Melhor Preço"] - menor) > PRICE_TOLERANCE
+    excess = (row["Melhor Preço"] - menor) * row["qtd"] if divergent and row["Melhor Preço"] > menor else 0.0
+    vs_custo = (row["custo"] - menor) * row["qtd"] if row["custo"] > 0 else 0.0
+    return pd.Series([len(quotes), menor, maior, divergent, (maior - menor) * row["qtd"], vs_custo, excess], index=QUOTE_COLS)
+
+
+def quotes_reference(df):
+    return df.apply(analyze_row, axis=1)
+
+
+def diff_reference(old, new):
+    # diff_frames: pareamento por merge em texto (chave + n-ésima ocorrência).
+    # Devolve (incluídas, removidas, alteradas, número de células alteradas)
+    cols = [c for c in new.columns if c in old.columns and c not in DELTA_IGNORE]
+
+    def keyed(df):
+        key = df[EDIT_KEY_COLS].astype(str).agg("\x1f".join, axis=1)
+        return pd.DataFrame({"k": key.to_numpy(), "occ": key.groupby(key).cumcount().to_numpy(), "pos": np.arange(len(df))})
+
+    merged = keyed(old).merge(keyed(new), on=["k", "occ"], how="outer", suffixes=("_old", "_new"), indicator=True)
+    added = np.sort(merged.loc[merged["_merge"] == "right_only", "pos_new"].to_numpy(dtype=np.int64))
+    removed = np.sort(merged.loc[merged["_merge"] == "left_only", "pos_old"].to_numpy(dtype=np.int64))
+    both = merged[merged["_merge"] == "both"]
+    changed = (
+        old[cols].astype(str).iloc[both["pos_old"].astype(int)].to_numpy()
+        != new[cols].astype(str).iloc[both["pos_new"].astype(int)].to_numpy()
+    )
+    modified = np.sort(both["pos_new"].to_numpy(dtype=np.int64)[changed.any(axis=1)])
+    return added, removed, modified, int(changed.sum())
+
+
+def parse_date_cell(value):
+    # parse_dates, uma célula por vez
+    value = str(value).strip()
+    for fmt in ("%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y", "%d.%m.%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return pd.Timestamp(datetime.strptime(value, fmt))
+        except ValueError:
+            pass
+    return pd.NaT
+
+
+def query_rows(df, today, start, end, freq, by, prazo_dias=PRAZO_ENTREGA_DIAS):
+    # consulta da linha do tempo direto nas linhas: converte as datas e filtra o intervalo (períodos inteiros)
+    compra = parse_dates(df["Data Compra"])
+    entrega = parse_dates(df["Data Entrega"])
+    lead = (entrega - compra).dt.days.astype("float64")
+    lead = lead.where(lead >= 0)
+    aguardando = df["status_norm"] == "aguardando"
+    today = pd.Timestamp(today)
+    atrasado = aguardando & np.where(entrega.notna(), entrega < today, compra + pd.Timedelta(days=prazo_dias) < today)
+    inicio = compra.dt.to_period(freq).dt.start_time
+    mask = compra.notna()
+    if start is not None:
+        mask &= inicio >= pd.Period(start, freq).start_time
+    if end is not None:
+        mask &= inicio <= pd.Period(end, freq).start_time
+    rows = pd.DataFrame({
+        by: fill_blank(df[by], "Sem Info").astype(str), "Valor Total Compra": df["Valor Total Compra"],
+        "lead": lead, "aguardando": aguardando.astype("int64"), "atrasado": atrasado.astype("int64"),
+    })[mask.to_numpy()]
+    return rows.groupby(by).agg(**{
+        "Itens": ("lead", "size"), "Valor Total Compra": ("Valor Total Compra", "sum"),
+        "Lead Time Médio (dias)": ("lead", "mean"), "Lead Time Máx. (dias)": ("lead", "max"),
+        "Aguardando": ("aguardando", "sum"), "Atrasados": ("atrasado", "sum"),
+    })
@@ -0,0 +1,273 @@
+import hashlib
+import sys
+import time
+from datetime import date
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from dashboard_core import load_planilha
+from dashboard_cube import build_cube, build_cube_cells, finish_cube
+from dashboard_delta import diff_frames, update_cube
+from dashboard_export import ExportJobs
+from dashboard_history import list_reports
+from dashboard_jobs import BackgroundJobs
+from dashboard_periods import compare_periods, period_totals
+from dashboard_quotes import analyze_quotes
+from dashboard_search import SearchIndex
+from dashboard_timeline import build_timeline
+from dashboard_snapshot import load_snapshot, load_snapshot_cube, previous_snapshot, save_snapshot, save_snapshot_cube
+from dashboard_sql import db_version, list_periods, load_insumos, query_cube
+from dashboard_store import DatasetStore
+
+# Limites do cache de leitura (por processo do servidor)
+INGEST_MAX_ENTRIES = 8
+INGEST_TTL_SECONDS = 60 * 60
+
+
+def peak_memory_mb():
+    # Maior memória residente do processo do servidor desde que ele iniciou (ru_maxrss só cresce:
+    # não é o custo desta leitura). None onde não há 'resource'
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@st.cache_resource
+def dataset_store():
+    # um único store por processo, compartilhado por todas as sessões
+    return DatasetStore(INGEST_MAX_ENTRIES, INGEST_TTL_SECONDS)
+
+
+def session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else ""
+
+
+def _acquire(key, loader, name, spinner):
+    # Pega o conjunto da chave no store; ao trocar de conjunto a sessão solta a referência ao anterior
+    store = dataset_store()
+    session = session_id()
+    previous = st.session_state.get("dataset_key")
+    if previous is not None and previous != key:
+        store.release(previous, session)
+    st.session_state["dataset_key"] = key
+
+    def load():
+        with st.spinner(spinner):
+            return loader()
+
+    start = time.perf_counter()
+    df, status_col, numeric_failures, hit = store.acquire(key, session, load, name)
+    return df, status_col, numeric_failures, _record(key, start, hit)
+
+
+def _load_planilha_or_snapshot(file_hash, name, data):
+    # planilha já normalizada antes: lê o snapshot colunar em vez de reprocessar o arquivo
+    cached = load_snapshot(file_hash)
+    if cached is not None:
+        return cached
+    result = load_planilha(data, name)
+    try:
+        save_snapshot(*result, source_name=name, source_hash=file_hash)
+    except Exception:
+        pass
+    return result
+
+
+def _record(key, start, hit):
+    info = {
+        "hash": key, "edits_key": key, "hit": hit, "seconds": time.perf_counter() - start,
+        "peak_mb": peak_memory_mb(),
+    }
+    stats = st.session_state.setdefault("ingest_stats", {"hits": 0, "misses": 0, "seconds": 0.0})
+    stats["hits" if info["hit"] else "misses"] += 1
+    stats["seconds"] += info["seconds"]
+    return info
+
+
+def load_uploaded(uploaded_file):
+    # Carrega a planilha enviada pelo store compartilhado, por hash do conteúdo.
+    # Devolve (df, status_col, numeric_failures, info) com info = {hash, edits_key, hit, seconds, peak_mb}
+    data = uploaded_file.getvalue()
+    file_hash = content_hash(data)
+    return _acquire(
+        file_hash, lambda: _load_planilha_or_snapshot(file_hash, uploaded_file.name, data),
+        uploaded_file.name, "Lendo planilha...",
+    )
+
+
+def load_saved_snapshot(file_hash):
+    # Mesmo retorno de load_uploaded, a partir de um snapshot salvo anteriormente
+    return _acquire(file_hash, lambda: load_snapshot(file_hash), "snapshot", "Lendo snapshot...")
+
+
+def database_key(db_path, periodo=None):
+    # identifica o conjunto do banco (cubo/índice/edições): o caminho para as linhas sem período
+    return db_path if periodo is None else f"{db_path}#{periodo}"
+
+
+def load_database(db_path, periodo=None):
+    # Um período da tabela insumos do SQLite; a chave inclui a versão do arquivo, então o conjunto
+    # é recarregado quando o banco muda. info["hash"] é a chave com versão (caches, jobs e posições de
+    # linha não sobrevivem a uma reimportação); info["edits_key"] é a chave sem versão, só para as
+    # alterações salvas, que valem para o período em qualquer versão do banco
+    version = db_version(db_path)
+    key = database_key(db_path, periodo)
+    df, status_col, numeric_failures, info = _acquire(
+        f"{key}@{version[0]}:{version[1]}", lambda: load_insumos(db_path, periodo), key, "Lendo banco de dados...",
+    )
+    info["edits_key"] = key
+    return df, status_col, numeric_failures, info
+
+
+@st.cache_data(max_entries=INGEST_MAX_ENTRIES, show_spinner=False)
+def _list_periods_cached(db_path, version):
+    return list_periods(db_path)
+
+
+def load_periods(db_path):
+    return _list_periods_cached(db_path, db_version(db_path))
+
+
+@st.cache_data(max_entries=INGEST_MAX_ENTRIES, ttl=INGEST_TTL_SECONDS, show_spinner="Comparando períodos...")
+def _compare_periods_cached(db_path, anterior, atual, version):
+    return compare_periods(anterior, atual, db_path)
+
+
+@st.cache_data(max_entries=INGEST_MAX_ENTRIES, ttl=INGEST_TTL_SECONDS, show_spinner=False)
+def _period_totals_cached(db_path, version):
+    return period_totals(db_path)
+
+
+def load_period_comparison(db_path, anterior, atual):
+    # (totais por período, itens, transições de status), recalculados só quando o banco muda
+    version = db_version(db_path)
+    items, transitions = _compare_periods_cached(db_path, anterior, atual, version)
+    return _period_totals_cached(db_path, version), items, transitions
+
+
+@st.cache_data(max_entries=INGEST_MAX_ENTRIES, ttl=INGEST_TTL_SECONDS, show_spinner=False)
+def _list_reports_cached(db_path, version):
+    return list_reports(db_path)
+
+
+def load_reports(db_path):
+    # histórico de relatórios salvos (só a tabela de indicadores), relido quando o banco muda
+    return _list_reports_cached(db_path, db_version(db_path))
+
+
+@st.cache_data(max_entries=INGEST_MAX_ENTRIES, ttl=INGEST_TTL_SECONDS, show_spinner=False)
+def _build_cube_cached(dataset_key, edits_token, status_col, _df):
+    return build_cube(_df, status_col)
+
+
+@st.cache_data(max_entries=INGEST_MAX_ENTRIES, ttl=INGEST_TTL_SECONDS, show_spinner=False)
+def _query_cube_cached(db_path, periodo, version):
+    return finish_cube(query_cube(db_path, periodo))
+
+
+@st.cache_data(max_entries=INGEST_MAX_ENTRIES, ttl=INGEST_TTL_SECONDS, show_spinner=False)
+def _snapshot_cube_cached(source_hash, previous_hash, status_col, _df, _delta):
+    # cubo guardado junto do snapshot; na primeira vez, atualizado a partir do cubo da versão anterior
+    # pelo delta (ou montado do zero) e gravado para a próxima versão
+    saved = load_snapshot_cube(source_hash)
+    if saved is not None:
+        return saved[0]
+    previous = load_snapshot_cube(previous_hash) if _delta is not None else None
+    if previous is None:
+        cube, cells = build_cube_cells(_df, status_col)
+    else:
+        cube, cells = update_cube(*previous, _delta, _df, status_col)
+    try:
+        save_snapshot_cube(cube, cells, source_hash)
+    except Exception:
+        pass
+    return cube
+
+
+@st.cache_resource(max_entries=INGEST_MAX_ENTRIES, ttl=INGEST_TTL_SECONDS, show_spinner="Comparando com a versão anterior...")
+def _delta_cached(previous_hash, current_hash, status_col, _df):
+    previous = load_snapshot(previous_hash)
+    if previous is None or previous[1] != status_col:
+        return None
+    return diff_frames(previous[0], _df)
+
+
+def load_delta(source_name, source_hash, df, status_col):
+    # (metadados da versão anterior, DatasetDelta) da planilha com o mesmo nome, ou (None, None).
+    # Deve ser chamado antes de apply_edits: o delta compara as versões como vieram dos arquivos
+    previous = previous_snapshot(source_name, source_hash)
+    if previous is None:
+        return None, None
+    delta = _delta_cached(previous["source_hash"], source_hash, status_col, df)
+    return (previous, delta) if delta is not None else (None, None)
+
+
+def edits_token(saved_edits):
+    # identifica a versão das alterações salvas (parte das chaves de cache derivadas do df)
+    return int(pd.util.hash_pandas_object(saved_edits, index=False).sum()) if not saved_edits.empty else 0
+
+
+@st.cache_resource
+def export_jobs():
+    return ExportJobs()
+
+
+@st.cache_resource
+def section_jobs():
+    # cálculos das seções pesadas, compartilhados entre as sessões (a chave inclui o conjunto de dados)
+    return BackgroundJobs()
+
+
+def load_cube(dataset_key, df, status_col, saved_edits, sql_source=None, snapshot_source=None):
+    # Cubo agregado uma vez por conjunto de dados (e por versão das alterações salvas).
+    # No modo banco (sql_source = (caminho, período)) o GROUP BY roda no SQLite; com snapshot
+    # (snapshot_source = (hash anterior, delta), ambos podem ser None) o cubo fica salvo junto dele.
+    # Os dois atalhos valem só sem alterações sobrepostas ao df
+    if sql_source is not None and saved_edits.empty:
+        db_path, periodo = sql_source
+        return _query_cube_cached(db_path, periodo, db_version(db_path))
+    if snapshot_source is not None and saved_edits.empty:
+        previous_hash, delta = snapshot_source
+        return _snapshot_cube_cached(dataset_key, previous_hash, status_col, df, delta)
+    return _build_cube_cached(dataset_key, edits_token(saved_edits), status_col, df)
+
+
+@st.cache_data(max_entries=INGEST_MAX_ENTRIES, ttl=INGEST_TTL_SECONDS, show_spinner="Analisando cotações...")
+def _quotes_cached(dataset_key, edits_token, _df):
+    return analyze_quotes(_df)
+
+
+def load_quotes(dataset_key, df, saved_edits):
+    # análise das cotações por item, uma vez por conjunto de dados (e versão das alterações salvas)
+    return _quotes_cached(dataset_key, edits_token(saved_edits), df)
+
+
+@st.cache_data(max_entries=INGEST_MAX_ENTRIES, ttl=INGEST_TTL_SECONDS, show_spinner="Agrupando datas de compra e entrega...")
+def _timeline_cached(dataset_key, edits_token, today, prazo_dias, _df):
+    return build_timeline(_df, today, prazo_dias)
+
+
+def load_timeline(dataset_key, df, saved_edits, prazo_dias):
+    # baldes por semana/mês das datas de compra/entrega; refeitos a cada dia e a cada prazo de entrega
+    # (os atrasos dependem dos dois)
+    return _timeline_cached(dataset_key, edits_token(saved_edits), date.today(), prazo_dias, df)
+
+
+@st.cache_resource(max_entries=INGEST_MAX_ENTRIES, ttl=INGEST_TTL_SECONDS, show_spinner="Indexando insumos...")
+def load_search_index(dataset_key, _df):
+    # índice somente leitura, compartilhado sem cópia entre reruns
+    return SearchIndex(_df)
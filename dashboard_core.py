@@ -0,0 +1,424 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.api.types import union_categoricals
+
+from dashboard_search import fold
+from dashboard_timing import stage
+
+# Colunas esperadas na planilha (as ausentes são criadas vazias)
+EXPECTED_COLS = [
+    "Categoria","Código","Insumo","Necessidade Prof.","Necessidade Aluno","Medida","Estoque",
+    "Necessidade Compra","saldo pós compra","Menor Preço","custo","Custo Estoque","total Previsto",
+    "Situação","Orçamento 1","Orçamento 2","Orçamento 3","Melhor Preço","Redução Menor Preço",
+    "Redução %","Redução R$ unt","Redução R$ total","Qtd Negociada","Valor Total Compra",
+    "Valor Total Necessidade","Valor Previsto","Valor Total Histórico","Overstock","Qtd Armazenada",
+    "Local","Posição","Fornecedor","Nota Fiscal","Faturado?","Recompra?","Data Compra","Data Entrega","compras"
+]
+
+# Colunas numéricas essenciais (convertidas antes de calcular 'qtd')
+NUMERIC_COLS = [
+    "Necessidade Prof.","Necessidade Aluno","Necessidade Compra","Estoque","saldo pós compra",
+    "Menor Preço","custo","Custo Estoque","total Previsto","Redução Menor Preço","Redução %",
+    "Redução R$ unt","Redução R$ total","Qtd Negociada","Valor Total Compra","Valor Total Necessidade",
+    "Valor Previsto","Valor Total Histórico","Overstock","Qtd Armazenada","Melhor Preço","compras"
+]
+
+ORC_COLS = ["Orçamento 1", "Orçamento 2", "Orçamento 3"]
+
+# Vocabulário fixo de status_norm (códigos 0..n-1 da category); outros status vêm depois, em ordem alfabética
+STATUS_VOCAB = ["em orçamento", "aguardando", "entregue", "cancelado"]
+_STATUS_FOLDED = {fold(s): s for s in STATUS_VOCAB}
+
+
+def to_float(valor):
+    if pd.isna(valor):
+        return 0.0
+    valor = str(valor).replace("R$", "").replace(" ", "").strip()
+    if "," in valor:
+        valor = valor.replace(".", "").replace(",", ".")
+    try:
+        return float(valor)
+    except Exception:
+        return 0.0
+
+
+def format_brl(value):
+    try:
+        return f"R$ {float(value):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    except Exception:
+        return f"R$ {value}"
+
+
+# "1,234.56" -> "1.234,56" numa única passada de translate
+_BRL_SEPARATORS = str.maketrans(",.", ".,")
+
+
+def format_brl_array(values):
+    # format_brl sobre um array inteiro: formata tudo de uma vez e troca os separadores do texto
+    # unido em uma só chamada (em vez de f-string + três replace por célula)
+    values = np.asarray(values, dtype="float64")
+    if not len(values):
+        return np.array([], dtype=object)
+    joined = "\nR$ ".join(map("{:,.2f}".format, values.tolist())).translate(_BRL_SEPARATORS)
+    return np.array(("R$ " + joined).split("\n"), dtype=object)
+
+
+# número simples depois da limpeza; o resto (ex.: "-", "nan", "1_000", "1e5") passa pelo float() do Python
+_PLAIN_NUMBER = r"^[+-]?(\d+\.?\d*|\.\d+)$"
+
+
+def _try_float(valor):
+    try:
+        return float(valor)
+    except Exception:
+        return None
+
+
+def _clean_brl(text):
+    # mesmas trocas de to_float ("R$", espaços, "." de milhar quando há ","), em passadas do Arrow
+    text = pc.utf8_trim_whitespace(pc.replace_substring(pc.replace_substring(text, "R$", ""), " ", ""))
+    decimal = pc.replace_substring(pc.replace_substring(text, ".", ""), ",", ".")
+    return pc.if_else(pc.match_substring(text, ","), decimal, text)
+
+
+def parse_brl_series(series):
+    # Versão vetorizada de to_float: retorna (valores float64, qtd de células não reconhecidas).
+    # Células vazias ou NaN viram 0.0 e não contam como falha. Só os textos distintos são convertidos
+    # (preços e quantidades se repetem muito) e o resultado volta às células pelo código
+    if pd.api.types.is_float_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return series.astype("float64").fillna(0.0), 0
+
+    codes, uniques = pd.factorize(series)
+    clean = _clean_brl(pa.array(uniques.astype(str).array))
+    plain = pc.match_substring_regex(clean, _PLAIN_NUMBER)
+    unique_values = pc.cast(pc.if_else(plain, clean, None), pa.float64()).to_numpy(zero_copy_only=False)
+    unique_failed = np.zeros(len(uniques), dtype=bool)
+    others = np.flatnonzero(~plain.to_numpy(zero_copy_only=False))
+    for i, text in zip(others, clean.take(others).to_pylist()):
+        value = _try_float(text) if text else 0.0
+        unique_values[i] = 0.0 if value is None else value
+        unique_failed[i] = value is None
+
+    known = codes >= 0
+    values = np.zeros(len(series))
+    values[known] = unique_values[codes[known]]
+    failures = int(unique_failed[codes[known]].sum()) if unique_failed.any() else 0
+    return pd.Series(values, index=series.index, name=series.name), failures
+
+
+def to_float_series(series):
+    return parse_brl_series(series)[0]
+
+
+def _col_or_zero(df, col):
+    if col in df.columns:
+        return to_float_series(df[col]).to_numpy()
+    return np.zeros(len(df))
+
+
+def compute_qtd(df):
+    # Coluna unificada 'qtd' (vetorizada), mesma regra de compute_qtd_row:
+    # prioridade: "Necessidade Compra" > "compras" > soma("Necessidade Prof.","Necessidade Aluno") > 0
+    compra = _col_or_zero(df, "Necessidade Compra")
+    compras = _col_or_zero(df, "compras")
+    soma = _col_or_zero(df, "Necessidade Prof.") + _col_or_zero(df, "Necessidade Aluno")
+    qtd = np.select([compra > 0, compras > 0, soma > 0], [compra, compras, soma], default=0.0)
+    return pd.Series(qtd, index=df.index, dtype="float64")
+
+
+def compute_qtd_row(row):
+    # Implementação de referência (por linha) de compute_qtd
+    if row.get("Necessidade Compra", 0) and to_float(row.get("Necessidade Compra", 0)) > 0:
+        return to_float(row.get("Necessidade Compra", 0))
+    if row.get("compras", 0) and to_float(row.get("compras", 0)) > 0:
+        return to_float(row.get("compras", 0))
+    prof = to_float(row.get("Necessidade Prof.", 0))
+    aluno = to_float(row.get("Necessidade Aluno", 0))
+    if prof + aluno > 0:
+        return prof + aluno
+    return 0.0
+
+
+DERIVED_COLS = [
+    "Valor Previsto", "Valor Total Compra", "Valor Total Negociado",
+    "Valor Total Necessidade", "Valor Total Histórico", "Overstock",
+]
+
+
+def compute_derived(df):
+    # Recalcula campos financeiros com base em 'qtd' (in-place)
+    derived = {
+        "Valor Previsto": df["custo"] * df["qtd"],
+        "Valor Total Compra": df["Melhor Preço"] * df["qtd"],
+        "Valor Total Negociado": df["Melhor Preço"] * df["Qtd Negociada"].fillna(0),
+        "Valor Total Necessidade": df["Menor Preço"] * df["qtd"],
+        "Valor Total Histórico": df["custo"] * df["Estoque"].fillna(0),
+    }
+    derived["Overstock"] = derived["Valor Total Negociado"].fillna(0) - derived["Valor Total Compra"].fillna(0)
+    # garante tipos float pós-cálculo
+    for col in DERIVED_COLS:
+        df[col] = derived[col].astype("float64").fillna(0.0)
+    return df
+
+
+def convert_numeric_cols(df, cols):
+    # Converte as colunas in-place e devolve {coluna: células não reconhecidas}
+    failures = {}
+    for col in cols:
+        if col in df.columns:
+            df[col], failures[col] = parse_brl_series(df[col])
+    return failures
+
+
+# Colunas de texto com poucos valores distintos: guardadas como category (códigos int + dicionário)
+CATEGORY_COLS = [
+    "Categoria", "Medida", "Situação", "status_norm", "Faturado?", "Fornecedor", "Local", "Posição",
+    "Recompra?",
+]
+
+
+def _category_cols(df, status_col):
+    return [col for col in dict.fromkeys(CATEGORY_COLS + [status_col]) if col in df.columns]
+
+
+def compact_frame(df, status_col):
+    # Converte (in-place) as colunas de baixa cardinalidade para category. As numéricas já saem
+    # em float64 de convert_numeric_cols; valores em R$ não vão para float32 para não perder centavos
+    for col in _category_cols(df, status_col):
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            if df[col].nunique() <= len(df) // 2:
+                df[col] = df[col].astype("category")
+    return df
+
+
+def fill_blank(series, label):
+    # "" -> label; nas colunas category renomeia a categoria (replace não cria categorias novas)
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.replace("", label)
+    if "" not in series.cat.categories:
+        return series
+    if label in series.cat.categories:
+        return series.astype(str).replace("", label).astype("category")
+    return series.cat.rename_categories({"": label})
+
+
+def memory_report(frames):
+    # Memória (deep) de cada DataFrame da sessão, em MB, e o total
+    rows = [
+        {"Objeto": name, "Linhas": len(frame), "MB": frame.memory_usage(deep=True).sum() / 2**20}
+        for name, frame in frames.items()
+    ]
+    report = pd.DataFrame(rows, columns=["Objeto", "Linhas", "MB"])
+    return report, float(report["MB"].sum())
+
+
+def read_planilha(data, name):
+    if name.endswith(".csv"):
+        return pd.read_csv(BytesIO(data), sep=";", dtype=str)
+    return pd.read_excel(BytesIO(data), dtype=str)
+
+
+def normalize_planilha(df):
+    # Normaliza colunas/status e devolve (df, coluna de status detectada)
+    df.columns = df.columns.str.strip()
+    if "Categoria" in df.columns:
+        df['Categoria'] = df['Categoria'].astype(str).str.strip()
+
+    # Garantir colunas esperadas existem
+    for col in EXPECTED_COLS:
+        if col not in df.columns:
+            df[col] = ""
+
+    # Preenche vazios e infere tipos para evitar aviso de downcasting futuro
+    df = df.fillna("").infer_objects(copy=False)
+
+    # detecta coluna de status (N ou Situação) e cria versão normalizada para uso em todo o script
+    status_col = "N" if "N" in df.columns else "Situação"
+    # garante string e trim
+    df[status_col] = df[status_col].astype(str).str.strip()
+
+    # garante que colunas de orçamento existam
+    for c in ORC_COLS:
+        if c not in df.columns:
+            df[c] = ""
+
+    # marca como orçado se qualquer célula em Orçamento 1/2/3 tiver valor não vazio (coluna a coluna)
+    orcado = np.zeros(len(df), dtype=bool)
+    for c in ORC_COLS:
+        orcado |= (df[c].fillna("").astype(str).str.strip() != "").to_numpy()
+    df["is_orcado"] = orcado
+
+    # se status estiver vazio mas houver orçamento, considerar como "Em Orçamento"
+    empty_status_mask = df[status_col] == ""
+    df.loc[empty_status_mask & df["is_orcado"], status_col] = "Em Orçamento"
+
+    # REMOVER totalmente linhas sem status (agora respeita orçamentos)
+    df = df[df[status_col] != ""].copy()
+
+    # versão normalizada (category) para comparações e filtragens
+    df["status_norm"] = normalize_status(df[status_col])
+    return df, status_col
+
+
+def _status_dtype(extra):
+    return pd.CategoricalDtype(STATUS_VOCAB + sorted(set(extra) - set(STATUS_VOCAB)))
+
+
+def normalize_status(status):
+    # Status em minúsculas como category de vocabulário fixo; variações de acento/caixa dos status
+    # conhecidos ("EM ORCAMENTO") viram a forma canônica. O mapeamento é feito só sobre os valores distintos
+    lower = status.astype(str).str.lower()
+    mapping = {u: _STATUS_FOLDED.get(fold(u).strip(), u) for u in lower.unique()}
+    return lower.map(mapping).astype(_status_dtype(mapping.values()))
+
+
+# CSVs acima deste tamanho são lidos em blocos de CHUNK_ROWS linhas
+CHUNKED_MIN_BYTES = 32 * 1024 * 1024
+CHUNK_ROWS = 100_000
+
+
+def _process(raw):
+    with stage("normalização") as rec:
+        df, status_col = normalize_planilha(raw)
+        rec["linhas"] = len(df)
+    with stage("conversão numérica"):
+        numeric_failures = convert_numeric_cols(df, NUMERIC_COLS)
+    with stage("qtd + campos financeiros"):
+        df["qtd"] = compute_qtd(df)
+        compute_derived(df)
+    return df, status_col, numeric_failures
+
+
+def load_planilha(data, name):
+    # Leitura + normalização + conversão numérica + 'qtd' + campos financeiros.
+    # Devolve (df, coluna de status, {coluna: células numéricas não reconhecidas})
+    if name.endswith(".csv") and len(data) > CHUNKED_MIN_BYTES:
+        return load_planilha_chunked(data, name)
+    with stage("leitura do arquivo") as rec:
+        raw = read_planilha(data, name)
+        rec["linhas"] = len(raw)
+    df, status_col, numeric_failures = _process(raw)
+    with stage("category"):
+        compact_frame(df, status_col)
+    return df, status_col, {c: n for c, n in numeric_failures.items() if n}
+
+
+def load_planilha_chunked(data, name, chunk_rows=CHUNK_ROWS):
+    # Mesmo resultado de load_planilha para CSV, lendo o arquivo em blocos: cada bloco é normalizado,
+    # convertido (colunas numéricas viram float64) e tem as colunas de CATEGORY_COLS em category antes
+    # do próximo, então nem as strings cruas nem as de texto repetido se acumulam entre os blocos.
+    # O índice segue contínuo entre os blocos.
+    parts = []
+    status_col = "Situação"
+    numeric_failures = {}
+    with stage("leitura + processamento em blocos") as rec, \
+            pd.read_csv(BytesIO(data), sep=";", dtype=str, chunksize=chunk_rows) as reader:
+        for raw in reader:
+            part, status_col, failures = _process(raw)
+            for col in _category_cols(part, status_col):
+                part[col] = part[col].astype("category")
+            parts.append(part)
+            for col, n in failures.items():
+                numeric_failures[col] = numeric_failures.get(col, 0) + n
+        rec["linhas"] = sum(len(p) for p in parts)
+    if not parts:
+        # só o cabeçalho: o caminho normal já trata o arquivo vazio
+        df, status_col, numeric_failures = _process(read_planilha(data, name))
+        with stage("category"):
+            compact_frame(df, status_col)
+        return df, status_col, {c: n for c, n in numeric_failures.items() if n}
+    with stage("category"):
+        rows = sum(len(p) for p in parts)
+        for col in _category_cols(parts[0], status_col):
+            if col == "status_norm":
+                # vocabulário fixo primeiro, extras de todos os blocos depois
+                dtype = _status_dtype(set().union(*(p[col].cat.categories for p in parts)))
+            else:
+                # categorias ordenadas de todos os blocos, como astype("category") no df inteiro
+                dtype = union_categoricals([p[col] for p in parts], sort_categories=True).dtype
+            # alta cardinalidade volta a texto (mesma regra de compact_frame)
+            if col != "status_norm" and len(dtype.categories) > rows // 2:
+                dtype = parts[0][col].cat.categories.dtype
+            for part in parts:
+                part[col] = part[col].astype(dtype)
+    df = pd.concat(parts) if len(parts) > 1 else parts[0]
+    return df, status_col, {c: n for c, n in numeric_failures.items() if n}
+
+
+# Edição da tabela de itens: chave de linha e campos que o editor pode alterar
+EDIT_KEY_COLS = ["Código", "Insumo", "Medida"]
+EDITOR_RENAME = {"custo": "Valor Unitário Antigo", "Melhor Preço": "Valor Unitário Atual"}
+EDITABLE_FIELDS = [
+    "custo", "Melhor Preço", "Nota Fiscal", "Faturado?",
+    "Necessidade Compra", "Necessidade Prof.", "Necessidade Aluno", "Qtd Negociada",
+]
+
+
+def row_key(df):
+    # Chave Código + Insumo + Medida como uma única string (lookup vetorizado com .map)
+    parts = [df[c].astype(str) for c in EDIT_KEY_COLS]
+    key = parts[0]
+    for part in parts[1:]:
+        key = key + "\x1f" + part
+    return key
+
+
+def diff_edits(original, edited):
+    # Compara o editor com o display original e devolve só as células alteradas, em formato longo:
+    # Código, Insumo, Medida, campo (nome no df), valor (texto)
+    editor_to_df = {v: k for k, v in EDITOR_RENAME.items()}
+    rows = original.index.intersection(edited.index)
+    frames = []
+    for col in original.columns:
+        field = editor_to_df.get(col, col)
+        if field not in EDITABLE_FIELDS or col not in edited.columns:
+            continue
+        before = original.loc[rows, col]
+        after = edited.loc[rows, col]
+        changed = before.ne(after) & ~(before.isna() & after.isna())
+        if not changed.any():
+            continue
+        part = original.loc[changed[changed].index, EDIT_KEY_COLS].copy()
+        part["campo"] = field
+        part["valor"] = after[changed].astype(str).where(after[changed].notna(), "")
+        frames.append(part)
+    if not frames:
+        return pd.DataFrame(columns=EDIT_KEY_COLS + ["campo", "valor"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def apply_edits(df, changes):
+    # Aplica as alterações pela chave e recalcula os campos derivados só nas linhas afetadas.
+    # Devolve o índice das linhas alteradas
+    if changes.empty:
+        return df.index[:0]
+    keys = row_key(df)
+    affected = pd.Series(False, index=df.index)
+    for field, group in changes.groupby("campo", sort=False):
+        if field not in df.columns:
+            continue
+        values = group.drop_duplicates(EDIT_KEY_COLS, keep="last")
+        new = keys.map(pd.Series(values["valor"].to_numpy(), index=row_key(values).to_numpy()))
+        mask = new.notna()
+        if not mask.any():
+            continue
+        if field in NUMERIC_COLS:
+            df.loc[mask, field] = to_float_series(new[mask])
+        else:
+            if isinstance(df[field].dtype, pd.CategoricalDtype):
+                added = pd.Index(new[mask].unique()).difference(df[field].cat.categories)
+                df[field] = df[field].cat.add_categories(added)
+            df.loc[mask, field] = new[mask]
+        affected |= mask
+
+    rows = df.index[affected]
+    if len(rows):
+        sub = df.loc[rows].copy()
+        sub["qtd"] = compute_qtd(sub)
+        compute_derived(sub)
+        df.loc[rows, ["qtd"] + DERIVED_COLS] = sub[["qtd"] + DERIVED_COLS]
+    return rows
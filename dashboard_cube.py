@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+from dashboard_core import normalize_status
+
+# Cubo pré-agregado: uma linha por (Categoria, Faturado?, status, Nota Fiscal) com somas e contagens.
+# Todos os gráficos/tabelas de resumo saem de recortes + roll-ups do cubo, sem reler as linhas.
+CUBE_DIMS = ["Categoria", "Faturado?", "status", "Nota Fiscal"]
+CUBE_SUMS = [
+    "Valor Total Compra", "Valor Total Negociado", "Valor Previsto", "Valor Total Necessidade",
+    "Valor Total Histórico", "Necessidade Prof.", "Necessidade Aluno",
+]
+# contagens de linhas com valor > 0
+CUBE_COUNTS = {"n_prof": "Necessidade Prof.", "n_aluno": "Necessidade Aluno", "n_armazenada": "Qtd Armazenada"}
+
+CUBE_VALUES = CUBE_SUMS + list(CUBE_COUNTS)
+
+STATUS_BASE = ["em orçamento", "aguardando", "entregue"]
+
+
+def cube_dims(df, status_col):
+    # dimensões como texto simples (o df pode trazer colunas category)
+    return pd.DataFrame({
+        "Categoria": df["Categoria"].astype(str),
+        "Faturado?": df["Faturado?"].astype(str).replace("", "Sem Info"),
+        "status": df[status_col].astype(str).str.strip(),
+        "Nota Fiscal": df["Nota Fiscal"].astype(str),
+    }, index=df.index)
+
+
+def _grouped(df, status_col, positions=None):
+    frame = cube_dims(df, status_col)
+    frame["first_row"] = np.arange(len(df)) if positions is None else positions
+    for col in CUBE_SUMS:
+        frame[col] = df[col]
+    for name, col in CUBE_COUNTS.items():
+        frame[name] = (df[col] > 0).astype("int64")
+    return frame.groupby(CUBE_DIMS, sort=False)
+
+
+def _aggregate(grouped):
+    aggs = {"n": ("first_row", "size"), "first_row": ("first_row", "min")}
+    aggs.update({col: (col, "sum") for col in CUBE_SUMS + list(CUBE_COUNTS)})
+    return finish_cube(grouped.agg(**aggs).reset_index())
+
+
+def build_cube(df, status_col, positions=None):
+    # 'first_row' guarda a primeira linha de cada célula (para o 'first' de Faturado? por nota fiscal);
+    # positions: posição de cada linha no df completo, quando df é só um pedaço dele
+    return _aggregate(_grouped(df, status_col, positions))
+
+
+def build_cube_cells(df, status_col):
+    # (cubo, célula de cada linha): cells[i] é a linha do cubo que soma a linha i do df. Guardado com
+    # o snapshot, permite atualizar o cubo da próxima versão só com as linhas do delta
+    grouped = _grouped(df, status_col)
+    return _aggregate(grouped), grouped.ngroup().to_numpy(dtype=np.int64)
+
+
+def row_values(df):
+    # contribuição de cada linha para as somas e contagens do cubo (mesma ordem de CUBE_VALUES)
+    values = np.empty((len(df), len(CUBE_VALUES)))
+    for i, col in enumerate(CUBE_SUMS):
+        values[:, i] = df[col].to_numpy(dtype=np.float64)
+    for i, col in enumerate(CUBE_COUNTS.values(), start=len(CUBE_SUMS)):
+        values[:, i] = df[col].to_numpy(dtype=np.float64) > 0
+    return values
+
+
+def finish_cube(cube):
+    cube["status_norm"] = normalize_status(cube["status"])
+    return cube
+
+
+def slice_cube(cube, categorias, faturamento):
+    return cube[cube["Categoria"].isin(categorias) & cube["Faturado?"].isin(faturamento)]
+
+
+def cube_totals(view):
+    totals = {col: float(view[col].sum()) for col in CUBE_SUMS}
+    totals["n"] = int(view["n"].sum())
+    for name in CUBE_COUNTS:
+        totals[name] = int(view[name].sum())
+    return totals
+
+
+def status_metrics(view):
+    # Indicadores de 'Aguardando' e de entrega (entregue = status 'entregue' OU Qtd Armazenada > 0)
+    aguardando = view[view["status_norm"] == "aguardando"]
+    base = view[view["status_norm"].isin(STATUS_BASE)]
+    entregues = np.where(base["status_norm"] == "entregue", base["n"], base["n_armazenada"]).sum()
+    return {
+        "aguardando_count": int(aguardando["n"].sum()),
+        "aguardando_valor": float(aguardando["Valor Total Compra"].sum()),
+        "base_total": int(base["n"].sum()),
+        "entregues_ok": int(entregues),
+    }
+
+
+def faturamento_table(view):
+    return view.groupby("Faturado?").agg(**{
+        "Qtd Itens": ("n", "sum"),
+        "Total Compra": ("Valor Total Compra", "sum"),
+        "Qtd Notas Fiscais": ("Nota Fiscal", "nunique"),
+    }).reset_index()
+
+
+def status_table(view, status_col):
+    return view.groupby("status").agg(**{
+        "Qtd. Itens": ("n", "sum"),
+        "Valor Previsto": ("Valor Previsto", "sum"),
+        "Valor Total Compra": ("Valor Total Compra", "sum"),
+        "Valor Total Negociado": ("Valor Total Negociado", "sum"),
+    }).reset_index().rename(columns={"status": status_col})
+
+
+def categoria_table(view):
+    return view.groupby("Categoria").agg(**{
+        "Qtd Itens": ("n", "sum"),
+        "Valor Total Compra": ("Valor Total Compra", "sum"),
+        "Valor Total Negociado": ("Valor Total Negociado", "sum"),
+        "Valor Previsto": ("Valor Previsto", "sum"),
+        "Nota Fiscal": ("Nota Fiscal", "nunique"),
+    }).reset_index()
+
+
+def categoria_faturamento_table(view):
+    return view.groupby(["Categoria", "Faturado?"]).agg(**{
+        "Qtd": ("n", "sum"),
+        "Valor Total Compra": ("Valor Total Compra", "sum"),
+    }).reset_index()
+
+
+def nota_fiscal_table(view):
+    nf = view[view["Nota Fiscal"] != ""].sort_values("first_row")
+    return nf.groupby(["Categoria", "Nota Fiscal"]).agg(**{
+        "Insumo": ("n", "sum"),
+        "Valor Total Compra": ("Valor Total Compra", "sum"),
+        "Faturado?": ("Faturado?", "first"),
+    }).reset_index()
@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+from dashboard_core import DERIVED_COLS, EDIT_KEY_COLS
+from dashboard_cube import CUBE_DIMS, CUBE_SUMS, CUBE_VALUES, build_cube, cube_dims, cube_totals, finish_cube, row_values
+
+# Diferença linha a linha entre duas versões normalizadas da mesma planilha, pela chave
+# Código + Insumo + Medida (chaves repetidas são pareadas pela ordem em que aparecem).
+# Colunas calculadas não entram na comparação: mudam junto com as colunas de origem
+DELTA_IGNORE = set(DERIVED_COLS) | {"qtd", "status_norm", "is_orcado"}
+
+
+class DatasetDelta:
+    # Posições (iloc) das linhas adicionadas/removidas/alteradas e as alterações campo a campo.
+    # Guarda só as linhas antigas que saíram ou mudaram: o df antigo pode ser descartado
+    def __init__(self, added, removed, modified_old, modified_new, old_to_new, changes, old_rows):
+        self.added = added
+        self.removed = removed
+        self.modified_old = modified_old
+        self.modified_new = modified_new
+        self.old_to_new = old_to_new
+        self.changes = changes
+        self.old_rows = old_rows
+
+    @property
+    def empty(self):
+        return not (len(self.added) or len(self.removed) or len(self.modified_new))
+
+    def minus_positions(self):
+        # linhas antigas que deixam de existir como eram (removidas + versão antiga das alteradas)
+        return np.sort(np.concatenate([self.removed, self.modified_old]))
+
+    def plus_positions(self):
+        return np.sort(np.concatenate([self.added, self.modified_new]))
+
+    def removed_rows(self):
+        return self.old_rows.loc[self.old_rows["_pos"].isin(self.removed)].drop(columns="_pos")
+
+
+def _occurrence_keys(old, new):
+    # chave inteira (chave, n-ésima ocorrência) comum aos dois lados; a chave é montada com os
+    # códigos inteiros de cada coluna em vez de concatenar texto
+    codes = np.zeros(len(old) + len(new), dtype=np.int64)
+    for col in EDIT_KEY_COLS:
+        col_codes, uniques = pd.factorize(pd.concat([old[col].astype(str), new[col].astype(str)], ignore_index=True))
+        codes = pd.factorize(codes * (len(uniques) + 1) + col_codes + 1)[0]
+    codes_old, codes_new = codes[:len(old)], codes[len(old):]
+    occ_old = pd.Series(codes_old).groupby(codes_old).cumcount().to_numpy()
+    occ_new = pd.Series(codes_new).groupby(codes_new).cumcount().to_numpy()
+    width = max(occ_old.max(initial=0), occ_new.max(initial=0)) + 1
+    return codes_old.astype(np.int64) * width + occ_old, codes_new.astype(np.int64) * width + occ_new
+
+
+def _comparable(old, new):
+    # arrays comparáveis elemento a elemento: category dos dois lados -> códigos sobre as mesmas categorias
+    old_cat = isinstance(old.dtype, pd.CategoricalDtype)
+    new_cat = isinstance(new.dtype, pd.CategoricalDtype)
+    if old_cat and new_cat:
+        categories = old.cat.categories.union(new.cat.categories)
+        return old.cat.set_categories(categories).cat.codes.to_numpy(), new.cat.set_categories(categories).cat.codes.to_numpy()
+    if old_cat:
+        old = old.astype(old.cat.categories.dtype)
+    if new_cat:
+        new = new.astype(new.cat.categories.dtype)
+    return old.array, new.array
+
+
+def _changed(a, b):
+    if isinstance(a, np.ndarray) and a.dtype.kind in "iub":
+        return a != b
+    a, b = pd.Series(a), pd.Series(b)
+    both_na = (a.isna() & b.isna()).to_numpy()
+    return a.ne(b).to_numpy(dtype=bool) & ~both_na
+
+
+def diff_frames(old, new):
+    # Uma passada vetorizada por coluna sobre as linhas pareadas; se as chaves vierem na mesma
+    # ordem (reenvio com valores corrigidos) o pareamento é direto, sem montar as chaves
+    if len(old) == len(new) and old[EDIT_KEY_COLS].reset_index(drop=True).equals(new[EDIT_KEY_COLS].reset_index(drop=True)):
+        match = np.arange(len(new))
+    else:
+        key_old, key_new = _occurrence_keys(old, new)
+        match = pd.Index(key_old).get_indexer(key_new)
+    paired = match >= 0
+    new_pos = np.flatnonzero(paired)
+    old_pos = match[paired]
+
+    columns = [c for c in new.columns if c in old.columns and c not in DELTA_IGNORE]
+    any_change = np.zeros(len(new_pos), dtype=bool)
+    parts = []
+    for col in columns:
+        a, b = _comparable(old[col], new[col])
+        changed = _changed(a.take(old_pos), b.take(new_pos))
+        if not changed.any():
+            continue
+        any_change |= changed
+        rows = new_pos[changed]
+        part = new.iloc[rows][EDIT_KEY_COLS].astype(str).reset_index(drop=True)
+        part["campo"] = col
+        part["antes"] = old[col].iloc[old_pos[changed]].astype(str).to_numpy()
+        part["depois"] = new[col].iloc[rows].astype(str).to_numpy()
+        parts.append(part)
+    changes = (
+        pd.concat(parts, ignore_index=True) if parts
+        else pd.DataFrame(columns=EDIT_KEY_COLS + ["campo", "antes", "depois"])
+    )
+
+    old_to_new = np.full(len(old), -1, dtype=np.int64)
+    old_to_new[old_pos[~any_change]] = new_pos[~any_change]
+    seen = np.zeros(len(old), dtype=bool)
+    seen[old_pos] = True
+    removed = np.flatnonzero(~seen)
+    modified_old = old_pos[any_change]
+    gone = np.sort(np.concatenate([removed, modified_old]))
+    old_rows = old.iloc[gone].copy()
+    old_rows["_pos"] = gone
+    return DatasetDelta(
+        added=np.flatnonzero(~paired), removed=removed, modified_old=modified_old,
+        modified_new=new_pos[any_change], old_to_new=old_to_new, changes=changes, old_rows=old_rows,
+    )
+
+
+def delta_cubes(delta, new, status_col):
+    # (cubo das linhas que saíram, cubo das linhas que entraram) — só as linhas do delta
+    old_rows = delta.old_rows.drop(columns="_pos")
+    minus = build_cube(old_rows, status_col, positions=delta.old_rows["_pos"].to_numpy())
+    plus_pos = delta.plus_positions()
+    plus = build_cube(new.iloc[plus_pos], status_col, positions=plus_pos)
+    return minus, plus
+
+
+def delta_totals(delta, new, status_col):
+    # Impacto do delta nos totais: (antes, depois) das linhas que mudaram
+    minus, plus = delta_cubes(delta, new, status_col)
+    return cube_totals(minus), cube_totals(plus)
+
+
+def update_cube(cube, cells, delta, new, status_col):
+    # Cubo da versão nova a partir do cubo da versão antiga e da célula de cada linha antiga
+    # (build_cube_cells). Devolve (cubo, células) iguais a build_cube_cells(new): as linhas que
+    # saíram são subtraídas da própria célula, as que entraram somadas à célula do seu grupo (criada
+    # se não existir). Só as linhas do delta são agrupadas; as linhas mantidas, mesmo mudando de
+    # posição, herdam a célula pelo pareamento, e 'first_row' sai da primeira posição de cada célula
+    plus_pos = delta.plus_positions()
+    plus_dims = cube_dims(new.iloc[plus_pos], status_col)
+    plus_keys = pd.MultiIndex.from_frame(plus_dims)
+    # células candidatas: só as da mesma Nota Fiscal; o pareamento é pela tupla inteira
+    candidates = np.flatnonzero(cube["Nota Fiscal"].isin(plus_dims["Nota Fiscal"].unique()).to_numpy())
+    found = pd.MultiIndex.from_frame(cube[CUBE_DIMS].iloc[candidates]).get_indexer(plus_keys)
+    plus_cells = np.where(found >= 0, candidates[found.clip(0)], -1)
+    table = cube
+    missing = plus_cells < 0
+    if missing.any():
+        added = plus_dims[missing].drop_duplicates(ignore_index=True)
+        plus_cells[missing] = len(cube) + pd.MultiIndex.from_frame(added).get_indexer(plus_keys[missing])
+        table = pd.concat([cube, finish_cube(added)], ignore_index=True)
+
+    n = np.zeros(len(table), dtype=np.int64)
+    n[:len(cube)] = cube["n"].to_numpy()
+    values = np.zeros((len(table), len(CUBE_VALUES)))
+    values[:len(cube)] = cube[CUBE_VALUES].to_numpy(dtype=np.float64)
+    minus_cells = cells[delta.old_rows["_pos"].to_numpy()]
+    np.subtract.at(n, minus_cells, 1)
+    np.subtract.at(values, minus_cells, row_values(delta.old_rows))
+    np.add.at(n, plus_cells, 1)
+    np.add.at(values, plus_cells, row_values(new.iloc[plus_pos]))
+
+    new_cells = np.empty(len(new), dtype=np.int64)
+    kept = delta.old_to_new >= 0
+    new_cells[delta.old_to_new[kept]] = cells[kept]
+    new_cells[plus_pos] = plus_cells
+
+    # mesma ordem de build_cube: células na ordem da primeira linha; células vazias somem
+    present, first = np.unique(new_cells, return_index=True)
+    order = np.argsort(first, kind="stable")
+    ids, first = present[order], first[order]
+    renumber = np.empty(len(table), dtype=np.int64)
+    renumber[ids] = np.arange(len(ids))
+
+    result = table.take(ids).reset_index(drop=True)
+    result["n"] = n[ids]
+    result["first_row"] = first.astype(np.int64)
+    for i, col in enumerate(CUBE_VALUES):
+        result[col] = values[ids, i] if col in CUBE_SUMS else np.rint(values[ids, i]).astype(np.int64)
+    return result, renumber[new_cells]
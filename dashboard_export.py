@@ -0,0 +1,91 @@
+import gzip
+import importlib.util
+from io import BytesIO
+
+import pandas as pd
+
+from dashboard_jobs import BackgroundJobs
+
+# Arquivos de exportação gerados em segundo plano e guardados por estado dos filtros
+EXPORT_MAX_RESULTS = 16
+EXPORT_WORKERS = 2
+EXPORT_ROWS_PER_BLOCK = 5_000
+
+
+def excel_engine():
+    # prefer xlsxwriter (escrita em fluxo), fallback para openpyxl
+    if importlib.util.find_spec("xlsxwriter") is not None:
+        return "xlsxwriter"
+    if importlib.util.find_spec("openpyxl") is not None:
+        return "openpyxl"
+    return None
+
+
+def _write_rows(worksheet, frame, first_row):
+    # linha a linha e em ordem, como o modo constant_memory exige; NaN vira célula vazia
+    row = first_row
+    for start in range(0, len(frame), EXPORT_ROWS_PER_BLOCK):
+        block = frame.iloc[start:start + EXPORT_ROWS_PER_BLOCK].astype(object)
+        block = block.where(block.notna(), None)
+        for values in block.itertuples(index=False, name=None):
+            worksheet.write_row(row, 0, values)
+            row += 1
+
+
+def build_xlsx(summary_df, detail_df):
+    # 'Resumo' + 'Detalhado'. Com xlsxwriter em constant_memory só a linha atual fica em memória
+    # (o to_excel do pandas escreve coluna a coluna, o que não funciona nesse modo)
+    output = BytesIO()
+    engine = excel_engine()
+    if engine != "xlsxwriter":
+        with pd.ExcelWriter(output, engine=engine) as writer:
+            summary_df.to_excel(writer, sheet_name="Resumo")
+            detail_df.to_excel(writer, sheet_name="Detalhado", index=False)
+        return output.getvalue()
+
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    resumo = workbook.add_worksheet("Resumo")
+    resumo.write_row(0, 0, [""] + [str(c) for c in summary_df.columns])
+    _write_rows(resumo, summary_df.reset_index(), 1)
+    detalhado = workbook.add_worksheet("Detalhado")
+    detalhado.write_row(0, 0, [str(c) for c in detail_df.columns])
+    _write_rows(detalhado, detail_df, 1)
+    workbook.close()
+    return output.getvalue()
+
+
+def build_csv_gz(summary_df, detail_df):
+    # linhas detalhadas em CSV (mesmo formato do download resumido) comprimido com gzip
+    output = BytesIO()
+    with gzip.GzipFile(fileobj=output, mode="wb", compresslevel=6) as gz:
+        gz.write(detail_df.to_csv(sep=";", index=False).encode("utf-8-sig"))
+    return output.getvalue()
+
+
+def build_parquet(summary_df, detail_df):
+    output = BytesIO()
+    detail_df.to_parquet(output, index=False)
+    return output.getvalue()
+
+
+# rótulo -> (função, extensão, mime)
+EXPORT_FORMATS = {
+    "Excel (Resumo + Detalhado)": (
+        build_xlsx, "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+    "CSV compactado (Detalhado)": (build_csv_gz, "csv.gz", "application/gzip"),
+    "Parquet (Detalhado)": (build_parquet, "parquet", "application/vnd.apache.parquet"),
+}
+
+
+class ExportJobs(BackgroundJobs):
+    # Exportações em uma pool de threads, por chave (conjunto de dados + filtros + formato).
+    # Os resultados prontos ficam em LRU: o mesmo download com os mesmos filtros sai na hora
+
+    def __init__(self, max_results=EXPORT_MAX_RESULTS, workers=EXPORT_WORKERS):
+        super().__init__(max_results, workers, "export")
+
+    def submit(self, key, label, summary_df, detail_df):
+        return super().submit(key, EXPORT_FORMATS[label][0], summary_df, detail_df)
@@ -0,0 +1,110 @@
+import io
+import json
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dashboard_sql import DB_PATH, connect
+
+# Histórico de relatórios salvos ("💾 Salvar relatório no servidor") no dashboard.db, ao lado de
+# insumos: uma linha por snapshot na tabela pequena relatorios (indicadores do Relatório Resumido,
+# lida inteira pela tendência) e o detalhado filtrado em relatorios_detalhe, como Parquet comprimido
+# em um BLOB (lido só quando um snapshot é aberto)
+
+# Linha do Relatório Resumido (dashboard_report.summary_dict) -> coluna da tabela relatorios
+SUMMARY_COLUMNS = {
+    "Total Itens": "total_itens",
+    "Total Compra (R$)": "total_compra",
+    "Total Negociado (R$)": "total_negociado",
+    "Total Previsto (R$)": "total_previsto",
+    "Total Necessidade (R$)": "total_necessidade",
+    "Valor Histórico (R$)": "valor_historico",
+    "Economia Total (R$)": "economia_total",
+    "Total Overstock (R$)": "total_overstock",
+    "Necessidade Prof. (unidades)": "necessidade_prof",
+    "Necessidade Aluno (unidades)": "necessidade_aluno",
+    "Itens Aguardando (count)": "itens_aguardando",
+    "Valor Aguardando (R$)": "valor_aguardando",
+    "% Aguardando (base)": "pct_aguardando",
+    "Itens Base Entrega": "itens_base_entrega",
+    "Itens Entregues": "itens_entregues",
+    "% Entregue (base)": "pct_entregue",
+}
+
+DETAIL_COMPRESSION = "zstd"
+
+_REPORTS_TABLE = f"""
+CREATE TABLE IF NOT EXISTS relatorios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    salvo_em TEXT NOT NULL,
+    fonte TEXT,
+    nome TEXT,
+    filtros TEXT,
+    linhas INTEGER,
+    {", ".join(f"{col} REAL" for col in SUMMARY_COLUMNS.values())}
+)
+"""
+
+_DETAIL_TABLE = """
+CREATE TABLE IF NOT EXISTS relatorios_detalhe (
+    relatorio_id INTEGER PRIMARY KEY REFERENCES relatorios (id),
+    dados BLOB NOT NULL
+)
+"""
+
+
+def _ensure_tables(conn):
+    conn.execute(_REPORTS_TABLE)
+    conn.execute(_DETAIL_TABLE)
+
+
+def detail_bytes(detail):
+    # df detalhado -> Parquet comprimido (colunar; category vira dicionário)
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(detail, preserve_index=False), buffer, compression=DETAIL_COMPRESSION)
+    return buffer.getvalue()
+
+
+def save_report(summary, detail, fonte=None, nome=None, filtros=None, db_path=DB_PATH):
+    # Grava um snapshot (resumo + detalhado) e devolve o id. filtros: dict com os filtros aplicados
+    blob = detail_bytes(detail)
+    columns = ["salvo_em", "fonte", "nome", "filtros", "linhas"] + list(SUMMARY_COLUMNS.values())
+    values = [
+        datetime.now().isoformat(timespec="seconds"), fonte, nome,
+        json.dumps(filtros or {}, ensure_ascii=False), len(detail),
+    ] + [float(summary[key]) for key in SUMMARY_COLUMNS]
+    with closing(connect(db_path)) as conn:
+        _ensure_tables(conn)
+        cursor = conn.execute(
+            f"INSERT INTO relatorios ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", values
+        )
+        report_id = cursor.lastrowid
+        conn.execute("INSERT INTO relatorios_detalhe (relatorio_id, dados) VALUES (?, ?)", (report_id, blob))
+        conn.commit()
+    return report_id
+
+
+def list_reports(db_path=DB_PATH):
+    # Snapshots em ordem cronológica com os indicadores nos nomes do Relatório Resumido
+    # (só a tabela pequena; o detalhado não é lido)
+    select = ", ".join(f'{col} AS "{key}"' for key, col in SUMMARY_COLUMNS.items())
+    with closing(connect(db_path)) as conn:
+        _ensure_tables(conn)
+        reports = pd.read_sql_query(
+            f"SELECT id, salvo_em, fonte, nome, filtros, linhas, {select} FROM relatorios ORDER BY salvo_em, id", conn
+        )
+    reports["salvo_em"] = pd.to_datetime(reports["salvo_em"])
+    return reports
+
+
+def load_report_detail(report_id, db_path=DB_PATH):
+    # Detalhado de um snapshot ou None se o id não existir
+    with closing(connect(db_path)) as conn:
+        _ensure_tables(conn)
+        row = conn.execute("SELECT dados FROM relatorios_detalhe WHERE relatorio_id = ?", (report_id,)).fetchone()
+    if row is None:
+        return None
+    return pq.read_table(io.BytesIO(row[0])).to_pandas()
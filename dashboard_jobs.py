@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Cálculos pesados das seções em uma pool de threads, por chave (seção + estado dos filtros).
+# Os resultados prontos ficam em LRU: voltar a um estado de filtros já calculado sai na hora
+JOBS_MAX_RESULTS = 32
+JOBS_WORKERS = 2
+
+
+class BackgroundJobs:
+
+    def __init__(self, max_results=JOBS_MAX_RESULTS, workers=JOBS_WORKERS, name="secao"):
+        self.max_results = max_results
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._jobs = OrderedDict()
+        self._groups = {}
+        self._seconds = {}
+        self._lock = threading.Lock()
+        self.cancelled = 0
+
+    def _run(self, key, fn, args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self._seconds[key] = time.perf_counter() - start
+        return result
+
+    def duration(self, key):
+        # segundos gastos no cálculo da chave (None se ainda não terminou)
+        return self._seconds.get(key)
+
+    def get(self, key):
+        with self._lock:
+            future = self._jobs.get(key)
+            if future is not None:
+                self._jobs.move_to_end(key)
+            return future
+
+    def _cancel_group(self, group, keep):
+        # trabalho de um estado substituído: o grupo deixa de esperar pelas outras chaves; as que
+        # nenhum grupo espera mais e ainda estão na fila são canceladas. O que já está rodando termina
+        # e fica guardado (uma thread não pode ser interrompida no meio do pandas)
+        for key, future in list(self._jobs.items()):
+            waiting = self._groups.get(key)
+            if key == keep or not waiting or group not in waiting:
+                continue
+            waiting.discard(group)
+            if not waiting and future.cancel():
+                del self._jobs[key]
+                del self._groups[key]
+                self.cancelled += 1
+
+    def submit(self, key, fn, *args, group=None):
+        # group: quem espera pelo resultado (ex.: sessão + seção); os jobs do mesmo grupo com outra
+        # chave são cancelados se nenhum outro grupo também espera por eles
+        with self._lock:
+            future = self._jobs.get(key)
+            if group is not None:
+                self._cancel_group(group, key)
+            if future is None or future.cancelled() or (future.done() and future.exception() is not None):
+                future = self._pool.submit(self._run, key, fn, args)
+                self._jobs[key] = future
+                self._groups[key] = set()
+            if group is not None:
+                self._groups.setdefault(key, set()).add(group)
+            self._jobs.move_to_end(key)
+            # descarta os resultados prontos mais antigos (os em andamento ficam)
+            for old in list(self._jobs):
+                if len(self._jobs) <= self.max_results:
+                    break
+                if self._jobs[old].done():
+                    del self._jobs[old]
+                    self._groups.pop(old, None)
+                    self._seconds.pop(old, None)
+            return future
+
+    def stats(self):
+        with self._lock:
+            running = sum(not f.done() for f in self._jobs.values())
+            return {"jobs": len(self._jobs), "running": running, "cancelled": self.cancelled}
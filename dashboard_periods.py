@@ -0,0 +1,243 @@
+# Histórico por período no banco: cada planilha semanal é importada uma única vez (hash do conteúdo)
+# para a tabela insumos, marcada com o período. Reimportar um arquivo corrigido com o mesmo nome e
+# período troca só as linhas daquele arquivo; o restante do histórico não é relido.
+# Uso: python -m dashboard_periods PASTA [--banco dashboard.db] [--periodo 2026-W12]
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from contextlib import closing
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from dashboard_core import NUMERIC_COLS, normalize_status, parse_brl_series, read_planilha
+from dashboard_report import find_sheets
+from dashboard_sql import COLUMN_MAP, DB_PATH, connect
+
+# datas no nome do arquivo: 2026-03-16 / 16-03-2026 (também com "_" ou ".")
+_YMD = re.compile(r"(20\d{2})[-_.](\d{1,2})[-_.](\d{1,2})")
+_DMY = re.compile(r"(\d{1,2})[-_.](\d{1,2})[-_.](20\d{2})")
+# "semana 12", "sem_12", "W12" (o ano vem de outro número 20xx no nome, se houver)
+_WEEK = re.compile(r"(?:semana|sem|w)[\s_-]*(\d{1,2})(?!\d)", re.IGNORECASE)
+_YEAR = re.compile(r"(?<!\d)(20\d{2})(?!\d)")
+
+
+def period_label(day):
+    # semana ISO: "2026-W12" (ordem alfabética = ordem cronológica)
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def detect_period(name, default=None):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    for pattern, order in ((_YMD, (0, 1, 2)), (_DMY, (2, 1, 0))):
+        match = pattern.search(stem)
+        if match:
+            parts = [int(match.group(i + 1)) for i in order]
+            try:
+                return period_label(date(*parts))
+            except ValueError:
+                pass
+    week = _WEEK.search(stem)
+    if week and 1 <= int(week.group(1)) <= 53:
+        year = _YEAR.search(stem)
+        return f"{year.group(1) if year else date.today().year}-W{int(week.group(1)):02d}"
+    return default
+
+
+def sheet_rows(data, name):
+    # Planilha -> linhas da tabela insumos: números já convertidos (REAL), textos aparados e
+    # células vazias como NULL, no mesmo formato das linhas originais do banco
+    raw = read_planilha(data, name)
+    raw.columns = raw.columns.str.strip()
+    table = pd.DataFrame(index=raw.index)
+    for header, col in COLUMN_MAP.items():
+        if header not in raw.columns:
+            table[col] = None
+            continue
+        text = raw[header].fillna("").astype(str).str.strip()
+        values = parse_brl_series(text)[0] if header in NUMERIC_COLS else text
+        table[col] = values.where(text != "")
+    return table
+
+
+def ingest_file(data, name, periodo, db_path=DB_PATH):
+    # Devolve {"Arquivo", "Período", "Situação", "Linhas", "Segundos"}. Só arquivos novos são lidos:
+    # o mesmo conteúdo no mesmo período é ignorado e, em outro período, copiado dentro do banco
+    start = time.perf_counter()
+    digest = hashlib.sha256(data).hexdigest()
+    result = {"Arquivo": name, "Período": periodo}
+    with closing(connect(db_path)) as conn:
+        known = conn.execute(
+            "SELECT linhas FROM arquivos WHERE hash = ? AND periodo = ?", (digest, periodo)
+        ).fetchone()
+        if known is not None:
+            result.update({"Situação": "sem mudança", "Linhas": known[0]})
+            result["Segundos"] = time.perf_counter() - start
+            return result
+        source = conn.execute("SELECT periodo FROM arquivos WHERE hash = ? LIMIT 1", (digest,)).fetchone()
+        table = sheet_rows(data, name) if source is None else None
+        with conn:
+            # mesmo nome + período = versão corrigida: substitui só as linhas do arquivo anterior
+            previous = [h for (h,) in conn.execute(
+                "SELECT hash FROM arquivos WHERE nome = ? AND periodo = ?", (name, periodo)
+            )]
+            for old in previous:
+                conn.execute("DELETE FROM insumos WHERE arquivo = ? AND periodo = ?", (old, periodo))
+                conn.execute("DELETE FROM arquivos WHERE hash = ? AND periodo = ?", (old, periodo))
+            if table is None:
+                columns = ", ".join(f'"{c}"' for c in COLUMN_MAP.values())
+                rows = conn.execute(
+                    f"INSERT INTO insumos ({columns}, periodo, arquivo) "
+                    f"SELECT {columns}, ?, arquivo FROM insumos WHERE arquivo = ? AND periodo = ?",
+                    (periodo, digest, source[0]),
+                ).rowcount
+            else:
+                table["periodo"] = periodo
+                table["arquivo"] = digest
+                columns = ", ".join(f'"{c}"' for c in table.columns)
+                marks = ", ".join("?" * len(table.columns))
+                values = table.astype(object).where(table.notna(), None)
+                conn.executemany(
+                    f"INSERT INTO insumos ({columns}) VALUES ({marks})", values.itertuples(index=False, name=None)
+                )
+                rows = len(table)
+            conn.execute(
+                "INSERT INTO arquivos (hash, nome, periodo, linhas, importado_em) "
+                "VALUES (?, ?, ?, ?, datetime('now', 'localtime'))",
+                (digest, name, periodo, rows),
+            )
+    if source is not None:
+        status = f"copiada de {source[0]}"
+    else:
+        status = "substituída" if previous else "importada"
+    result.update({"Situação": status, "Linhas": rows, "Segundos": time.perf_counter() - start})
+    return result
+
+
+def list_files(db_path=DB_PATH):
+    with closing(connect(db_path)) as conn:
+        return pd.read_sql_query(
+            'SELECT nome AS "Arquivo", periodo AS "Período", linhas AS "Linhas", importado_em AS "Importado em" '
+            "FROM arquivos ORDER BY periodo, nome",
+            conn,
+        )
+
+
+def period_totals(db_path=DB_PATH):
+    # Totais por período (GROUP BY no SQLite, sem ler as linhas). O SQLite agrupa por status como está
+    # no banco; as contagens por status usam o vocabulário de normalize_status (acento/caixa) sobre os grupos
+    with closing(connect(db_path)) as conn:
+        groups = pd.read_sql_query(
+            """
+            SELECT periodo AS "Período", status, COUNT(*) AS "Itens", SUM(vtc) AS "Valor Total Compra",
+                   SUM(vtn) AS "Valor Total Negociado", SUM(vp) AS "Valor Previsto"
+            FROM insumos_calc
+            WHERE periodo IS NOT NULL
+            GROUP BY periodo, status
+            """,
+            conn,
+        )
+    status = normalize_status(groups.pop("status"))
+    groups["Aguardando"] = groups["Itens"].where(status == "aguardando", 0)
+    groups["Entregues"] = groups["Itens"].where(status == "entregue", 0)
+    return groups.groupby("Período", as_index=False).sum()
+
+
+def _by_code(rows):
+    # uma linha por Código: menor Melhor Preço, soma do Valor Total Compra e o status (normalizado) da última linha
+    rows = rows.assign(codigo=rows["codigo"].astype(str))
+    return rows.groupby("codigo", sort=False).agg(
+        insumo=("insumo", "first"), melhor=("melhor_preco", "min"), vtc=("vtc", "sum"), status=("status", "last"),
+    )
+
+
+MISSING_STATUS = "(não consta)"
+
+
+def compare_periods(anterior, atual, db_path=DB_PATH):
+    # Comparação por Código entre dois períodos: (itens, transições de status)
+    with closing(connect(db_path)) as conn:
+        rows = pd.read_sql_query(
+            "SELECT periodo, codigo, insumo, melhor_preco, vtc, status FROM insumos_calc "
+            "WHERE periodo IN (?, ?) ORDER BY row_id",
+            conn,
+            params=[anterior, atual],
+        )
+    # "Entregue" e "ENTREGUE" não são uma transição: status no vocabulário de normalize_status
+    rows["status"] = normalize_status(rows["status"]).astype(str)
+    prev = _by_code(rows[rows["periodo"] == anterior])
+    cur = _by_code(rows[rows["periodo"] == atual])
+    both = prev.join(cur, how="outer", lsuffix="_ant", rsuffix="_atu")
+
+    items = pd.DataFrame({
+        "Código": both.index,
+        "Insumo": both["insumo_atu"].fillna(both["insumo_ant"]).to_numpy(),
+        "Melhor Preço (anterior)": both["melhor_ant"].to_numpy(),
+        "Melhor Preço (atual)": both["melhor_atu"].to_numpy(),
+        "Valor Total Compra (anterior)": both["vtc_ant"].fillna(0).to_numpy(),
+        "Valor Total Compra (atual)": both["vtc_atu"].fillna(0).to_numpy(),
+        "Status (anterior)": both["status_ant"].fillna(MISSING_STATUS).to_numpy(),
+        "Status (atual)": both["status_atu"].fillna(MISSING_STATUS).to_numpy(),
+    })
+    items["Δ Melhor Preço"] = items["Melhor Preço (atual)"] - items["Melhor Preço (anterior)"]
+    items["Δ Melhor Preço %"] = items["Δ Melhor Preço"] / items["Melhor Preço (anterior)"].replace(0, np.nan) * 100
+    items["Δ Valor Total Compra"] = items["Valor Total Compra (atual)"] - items["Valor Total Compra (anterior)"]
+    items["Mudou"] = (
+        (items["Status (anterior)"] != items["Status (atual)"])
+        | (items["Δ Melhor Preço"].fillna(0) != 0)
+        | (items["Δ Valor Total Compra"].abs() > 0.005)
+    )
+
+    transitions = (
+        items.groupby(["Status (anterior)", "Status (atual)"]).size().rename("Itens").reset_index()
+        .sort_values("Itens", ascending=False, ignore_index=True)
+    )
+    return items, transitions
+
+
+def ingest_many(files, db_path=DB_PATH):
+    # files: (conteúdo, nome, período); um arquivo com erro não interrompe os demais
+    results = []
+    for data, name, periodo in files:
+        try:
+            results.append(ingest_file(data, name, periodo, db_path))
+        except Exception as exc:
+            results.append({"Arquivo": name, "Período": periodo, "Situação": f"erro: {exc}", "Linhas": 0, "Segundos": 0.0})
+    return pd.DataFrame(results, columns=["Arquivo", "Período", "Situação", "Linhas", "Segundos"])
+
+
+def _read_folder(folder, periodo):
+    # período de cada arquivo: nome do arquivo > --periodo > semana da data de modificação
+    for path in find_sheets(folder):
+        name = os.path.basename(path)
+        fallback = periodo or period_label(datetime.fromtimestamp(os.path.getmtime(path)).date())
+        with open(path, "rb") as fh:
+            yield fh.read(), name, detect_period(name, fallback)
+
+
+def ingest_folder(folder, db_path=DB_PATH, periodo=None):
+    return ingest_many(_read_folder(folder, periodo), db_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa as planilhas de uma pasta para o histórico do banco.")
+    parser.add_argument("pasta", help="pasta com as planilhas (.csv com ';', .xlsx, .xls)")
+    parser.add_argument("--banco", default=DB_PATH, help=f"banco SQLite (padrão: {DB_PATH})")
+    parser.add_argument("--periodo", default=None, help="período dos arquivos sem data no nome (ex.: 2026-W12)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.pasta):
+        parser.error(f"pasta não encontrada: {args.pasta}")
+    results = ingest_folder(args.pasta, args.banco, args.periodo)
+    with pd.option_context("display.width", 120):
+        print(results.to_string(index=False))
+    return 1 if results["Situação"].str.startswith("erro").any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from dashboard_core import ORC_COLS, fill_blank, parse_brl_series
+
+# Análise das cotações (Orçamento 1/2/3): as três colunas viram uma matriz linhas x 3 e menor/maior
+# cotação, spread e economias saem de reduções sobre essa matriz, sem apply por linha.
+# Cotação válida = valor numérico > 0 (célula vazia, texto ou zero não conta como cotação)
+
+# diferença acima de meio centavo entre o Melhor Preço e a menor cotação conta como divergência
+PRICE_TOLERANCE = 0.005
+
+QUOTE_SUMS = ["Valor pela Menor Cotação", "Economia Cotação", "Economia vs Custo", "Excesso Pago"]
+
+
+def quote_matrix(df):
+    # float64 (linhas x 3), NaN onde não há cotação
+    columns = [
+        parse_brl_series(df[col])[0].to_numpy(dtype="float64") if col in df.columns else np.zeros(len(df))
+        for col in ORC_COLS
+    ]
+    values = np.column_stack(columns) if len(df) else np.empty((0, len(ORC_COLS)))
+    return np.where(values > 0, values, np.nan)
+
+
+def analyze_quotes(df):
+    # Uma linha por item (mesmo índice do df):
+    #   Economia Cotação  = (maior - menor cotação) * qtd   -> ganho de ficar com a menor cotação
+    #   Economia vs Custo = (custo - menor cotação) * qtd   -> recalculada, sem usar as colunas "Redução"
+    #   Divergente        = Melhor Preço preenchido e diferente da menor cotação
+    #   Excesso Pago      = (Melhor Preço - menor cotação) * qtd, quando o Melhor Preço é maior
+    quotes = quote_matrix(df)
+    valid = ~np.isnan(quotes)
+    count = valid.sum(axis=1)
+    has = count > 0
+    low = np.where(valid, quotes, np.inf)
+    menor = np.where(has, low.min(axis=1), np.nan)
+    maior = np.where(has, np.where(valid, quotes, -np.inf).max(axis=1), np.nan)
+    spread = maior - menor
+
+    qtd = df["qtd"].to_numpy(dtype="float64")
+    custo = df["custo"].to_numpy(dtype="float64")
+    melhor = df["Melhor Preço"].to_numpy(dtype="float64")
+    priced = has & (melhor > 0)
+    diff = np.where(priced, melhor - menor, np.nan)
+    divergent = priced & (np.abs(np.where(priced, diff, 0.0)) > PRICE_TOLERANCE)
+
+    return pd.DataFrame({
+        "Cotações": count,
+        "Menor Cotação": menor,
+        "Maior Cotação": maior,
+        "Spread": spread,
+        "Spread %": spread / menor * 100,
+        "Orçamento Vencedor": pd.Categorical.from_codes(np.where(has, low.argmin(axis=1), -1), categories=ORC_COLS),
+        "Diferença Melhor Preço": diff,
+        "Divergente": divergent,
+        "Valor pela Menor Cotação": np.where(has, menor * qtd, 0.0),
+        "Economia Cotação": np.where(has, spread * qtd, 0.0),
+        "Economia vs Custo": np.where(has & (custo > 0), (custo - menor) * qtd, 0.0),
+        "Excesso Pago": np.where(divergent & (diff > 0), diff * qtd, 0.0),
+    }, index=df.index)
+
+
+def quote_totals(analysis):
+    quoted = analysis["Cotações"] > 0
+    totals = {col: float(analysis[col].sum()) for col in QUOTE_SUMS}
+    totals["itens_cotados"] = int(quoted.sum())
+    totals["cotacoes"] = int(analysis["Cotações"].sum())
+    totals["divergentes"] = int(analysis["Divergente"].sum())
+    totals["spread_medio"] = float(analysis.loc[quoted, "Spread %"].mean()) if quoted.any() else 0.0
+    return totals
+
+
+def quote_table(df, analysis, by):
+    # Economia por Categoria ou Fornecedor (só itens com ao menos uma cotação), maior economia primeiro
+    quoted = (analysis["Cotações"] > 0).to_numpy()
+    keys = fill_blank(df[by], "Sem Info").astype(str).to_numpy()[quoted]
+    table = analysis[quoted].assign(**{by: keys}).groupby(by).agg(**{
+        "Itens Cotados": ("Cotações", "size"),
+        "Cotações": ("Cotações", "sum"),
+        "Spread % médio": ("Spread %", "mean"),
+        **{col: (col, "sum") for col in QUOTE_SUMS[:3]},
+        "Divergências": ("Divergente", "sum"),
+        "Excesso Pago": ("Excesso Pago", "sum"),
+    })
+    return table.reset_index().sort_values("Economia Cotação", ascending=False, ignore_index=True)
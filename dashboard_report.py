@@ -0,0 +1,123 @@
+# Relatório resumido (os mesmos números do dashboard) sem interface: uma pasta de planilhas
+# processada em paralelo, um resumo por arquivo + relatório consolidado.
+# Uso: python -m dashboard_report PASTA [--saida DIR] [--processos N]
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from dashboard_core import load_planilha
+from dashboard_cube import build_cube, cube_totals, status_metrics
+
+SHEET_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+
+def report_indicators(view):
+    # Indicadores do Resumo Executivo / status / entrega a partir de um recorte do cubo
+    ind = cube_totals(view)
+    ind.update(status_metrics(view))
+    compra = ind["Valor Total Compra"]
+    ind["economia"] = ind["Valor Previsto"] - compra
+    ind["overstock"] = ind["Valor Total Negociado"] - compra
+    ind["overstock_pct"] = ind["overstock"] / compra * 100 if compra > 0 else 0
+    base = ind["base_total"]
+    ind["aguardando_pct"] = ind["aguardando_count"] / base * 100 if base > 0 else 0.0
+    ind["entregue_pct"] = ind["entregues_ok"] / base * 100 if base > 0 else 0
+    return ind
+
+
+def summary_dict(ind):
+    # Linhas do 'Relatório Resumido'
+    return {
+        "Total Itens": ind["n"],
+        "Total Compra (R$)": ind["Valor Total Compra"],
+        "Total Negociado (R$)": ind["Valor Total Negociado"],
+        "Total Previsto (R$)": ind["Valor Previsto"],
+        "Total Necessidade (R$)": ind["Valor Total Necessidade"],
+        "Valor Histórico (R$)": ind["Valor Total Histórico"],
+        "Economia Total (R$)": ind["economia"],
+        "Total Overstock (R$)": ind["overstock"],
+        "Necessidade Prof. (unidades)": ind["Necessidade Prof."],
+        "Necessidade Aluno (unidades)": ind["Necessidade Aluno"],
+        "Itens Aguardando (count)": ind["aguardando_count"],
+        "Valor Aguardando (R$)": ind["aguardando_valor"],
+        "% Aguardando (base)": ind["aguardando_pct"],
+        "Itens Base Entrega": ind["base_total"],
+        "Itens Entregues": ind["entregues_ok"],
+        "% Entregue (base)": ind["entregue_pct"],
+    }
+
+
+def summary_frame(summary):
+    return pd.DataFrame.from_dict(summary, orient="index", columns=["Valor"])
+
+
+def write_summary_csv(summary, path):
+    # mesmo formato do download "Relatório Resumido (CSV)" do dashboard
+    summary_frame(summary).to_csv(path, sep=";", encoding="utf-8-sig")
+
+
+def summarize_file(path):
+    # Devolve (nome, resumo, cubo) de uma planilha; roda nos processos da pool
+    with open(path, "rb") as fh:
+        data = fh.read()
+    name = os.path.basename(path)
+    df, status_col, _ = load_planilha(data, name)
+    cube = build_cube(df, status_col)
+    return name, summary_dict(report_indicators(cube)), cube
+
+
+def find_sheets(folder):
+    return sorted(
+        os.path.join(folder, f) for f in os.listdir(folder)
+        if f.lower().endswith(SHEET_EXTENSIONS) and not f.startswith("~$")
+    )
+
+
+def run(folder, out_dir, workers=None):
+    # Devolve (consolidado, falhas); o consolidado tem uma linha por arquivo e uma linha TOTAL
+    # recalculada sobre os cubos somados (percentuais não são somados)
+    paths = find_sheets(folder)
+    os.makedirs(out_dir, exist_ok=True)
+    rows, cubes, failures = {}, [], {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {path: pool.submit(summarize_file, path) for path in paths}
+        for path, future in futures.items():
+            try:
+                name, summary, cube = future.result()
+            except Exception as exc:
+                failures[os.path.basename(path)] = exc
+                continue
+            stem = os.path.splitext(name)[0]
+            write_summary_csv(summary, os.path.join(out_dir, f"relatorio_resumido_{stem}.csv"))
+            rows[name] = summary
+            cubes.append(cube)
+
+    if cubes:
+        rows["TOTAL"] = summary_dict(report_indicators(pd.concat(cubes, ignore_index=True)))
+    consolidated = pd.DataFrame.from_dict(rows, orient="index")
+    consolidated.index.name = "Arquivo"
+    consolidated.to_csv(os.path.join(out_dir, "relatorio_consolidado.csv"), sep=";", encoding="utf-8-sig")
+    return consolidated, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera o relatório resumido de cada planilha de uma pasta.")
+    parser.add_argument("pasta", help="pasta com as planilhas (.csv com ';', .xlsx, .xls)")
+    parser.add_argument("--saida", default="relatorios", help="pasta de saída (padrão: relatorios)")
+    parser.add_argument("--processos", type=int, default=None, help="processos em paralelo (padrão: núcleos da CPU)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.pasta):
+        parser.error(f"pasta não encontrada: {args.pasta}")
+    consolidated, failures = run(args.pasta, args.saida, args.processos)
+    print(f"{len(consolidated) - (1 if 'TOTAL' in consolidated.index else 0)} planilha(s) processada(s) -> {args.saida}")
+    for name, exc in failures.items():
+        print(f"erro em {name}: {exc}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+SEARCH_MODES = ["Contém", "Prefixo", "Aproximada"]
+
+
+def fold(text):
+    # minúsculas e sem acentos ("ÁGUA" -> "agua")
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    # Índice de trigramas + tokens ordenados sobre Insumo e Código (dobrados), montado uma vez por
+    # conjunto de dados. As buscas devolvem posições de linha do df original.
+
+    def __init__(self, df):
+        texts = (df["Insumo"].astype(str) + "\x00" + df["Código"].astype(str)).map(fold)
+        codes, uniques = texts.factorize()
+        self.doc_of_row = codes
+        self.docs = list(uniques)
+        # textos distintos em Arrow: termos curtos demais para os trigramas são procurados direto neles
+        self.doc_text = pd.Series(self.docs, dtype="str")
+
+        postings = {}
+        token_docs = {}
+        for doc_id, text in enumerate(self.docs):
+            for gram in _trigrams(text):
+                postings.setdefault(gram, []).append(doc_id)
+            for token in text.replace("\x00", " ").split():
+                token_docs.setdefault(token, []).append(doc_id)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.tokens = sorted(token_docs)
+        self.token_docs = [np.array(token_docs[t], dtype=np.int32) for t in self.tokens]
+
+    def _rows(self, doc_ids):
+        mask = np.zeros(len(self.docs), dtype=bool)
+        mask[doc_ids] = True
+        return np.flatnonzero(mask[self.doc_of_row])
+
+    def _prefix_docs(self, term):
+        # tokens que começam com o termo: faixa contínua na lista ordenada
+        start = bisect_left(self.tokens, term)
+        end = bisect_left(self.tokens, term + "\uffff")
+        if start == end:
+            return np.array([], dtype=np.int32)
+        return np.unique(np.concatenate(self.token_docs[start:end]))
+
+    def contains(self, term):
+        term = fold(term).strip()
+        if not term:
+            return np.arange(len(self.doc_of_row))
+        if len(term) < 3:
+            return self._rows(np.flatnonzero(self.doc_text.str.contains(term, regex=False).to_numpy()))
+        grams = sorted(_trigrams(term) - {f" {term[:2]}", f"{term[-2:]} "}, key=lambda g: len(self.postings.get(g, ())))
+        if not grams:
+            grams = [term[:3]]
+        candidates = self.postings.get(grams[0])
+        if candidates is None:
+            return np.array([], dtype=np.int64)
+        for gram in grams[1:]:
+            other = self.postings.get(gram)
+            if other is None:
+                return np.array([], dtype=np.int64)
+            candidates = np.intersect1d(candidates, other, assume_unique=True)
+            if not len(candidates):
+                break
+        if len(term) > 3:
+            candidates = [d for d in candidates if term in self.docs[d]]
+        return self._rows(candidates)
+
+    def prefix(self, term):
+        tokens = fold(term).split()
+        if not tokens:
+            return np.arange(len(self.doc_of_row))
+        docs = self._prefix_docs(tokens[0])
+        for token in tokens[1:]:
+            docs = np.intersect1d(docs, self._prefix_docs(token), assume_unique=True)
+        return self._rows(docs)
+
+    def fuzzy(self, term, min_similarity=0.4, limit=50):
+        # documentos que compartilham ao menos min_similarity dos trigramas do termo (tolera erros de digitação)
+        grams = _trigrams(fold(term).strip())
+        hits = [self.postings[g] for g in grams if g in self.postings]
+        if not hits:
+            return np.array([], dtype=np.int64)
+        docs, counts = np.unique(np.concatenate(hits), return_counts=True)
+        keep = counts >= max(1, int(np.ceil(min_similarity * len(grams))))
+        docs, counts = docs[keep], counts[keep]
+        best = docs[np.argsort(-counts, kind="stable")[:limit]]
+        return self._rows(best)
+
+    def search(self, term, mode="Contém"):
+        if mode == "Prefixo":
+            return self.prefix(term)
+        if mode == "Aproximada":
+            return self.fuzzy(term)
+        return self.contains(term)
@@ -0,0 +1,113 @@
+import json
+import os
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Snapshots colunares (Feather/Arrow) do df já normalizado, um por hash da planilha de origem.
+# Para cada nome de planilha ficam a versão atual e a anterior (base do "o que mudou")
+SNAPSHOT_DIR = "snapshots"
+# incrementar quando o formato do df normalizado mudar; snapshots de outra versão são ignorados
+SNAPSHOT_VERSION = 4
+
+
+def _paths(source_hash, snapshot_dir=SNAPSHOT_DIR):
+    # (dados, metadados, cubo agregado, célula do cubo de cada linha)
+    base = os.path.join(snapshot_dir, source_hash[:16])
+    return base + ".feather", base + ".json", base + ".cube.feather", base + ".cells.feather"
+
+
+def list_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    # Metadados dos snapshots disponíveis, do mais recente para o mais antigo
+    if not os.path.isdir(snapshot_dir):
+        return []
+    metas = []
+    for fname in os.listdir(snapshot_dir):
+        if not fname.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(snapshot_dir, fname), encoding="utf-8") as fh:
+                meta = json.load(fh)
+        except Exception:
+            continue
+        if meta.get("version") == SNAPSHOT_VERSION and os.path.exists(_paths(meta["source_hash"], snapshot_dir)[0]):
+            metas.append(meta)
+    return sorted(metas, key=lambda m: m["created_at"], reverse=True)
+
+
+def save_snapshot(df, status_col, numeric_failures, source_name, source_hash, snapshot_dir=SNAPSHOT_DIR):
+    os.makedirs(snapshot_dir, exist_ok=True)
+    data_path, meta_path = _paths(source_hash, snapshot_dir)[:2]
+    # sem compressão para permitir leitura memory-mapped; o índice original é preservado
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    feather.write_feather(table, data_path + ".tmp", compression="uncompressed")
+    os.replace(data_path + ".tmp", data_path)
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "source_name": source_name,
+        "source_hash": source_hash,
+        "status_col": status_col,
+        "numeric_failures": numeric_failures,
+        "rows": len(df),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(meta_path, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, ensure_ascii=False)
+
+    # a planilha mudou (mesmo nome, outro hash): mantém só a versão anterior mais recente
+    older = [m for m in list_snapshots(snapshot_dir) if m["source_name"] == source_name and m["source_hash"] != source_hash]
+    for old in older[1:]:
+        for path in _paths(old["source_hash"], snapshot_dir):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return meta
+
+
+def previous_snapshot(source_name, source_hash, snapshot_dir=SNAPSHOT_DIR):
+    # Metadados da versão anterior da mesma planilha (mesmo nome, outro hash) ou None
+    for meta in list_snapshots(snapshot_dir):
+        if meta["source_name"] == source_name and meta["source_hash"] != source_hash:
+            return meta
+    return None
+
+
+def load_snapshot(source_hash, snapshot_dir=SNAPSHOT_DIR):
+    # Devolve (df, status_col, numeric_failures) ou None se não houver snapshot para o hash
+    data_path, meta_path = _paths(source_hash, snapshot_dir)[:2]
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path, encoding="utf-8") as fh:
+        meta = json.load(fh)
+    if meta.get("source_hash") != source_hash or meta.get("version") != SNAPSHOT_VERSION:
+        return None
+    df = feather.read_table(data_path, memory_map=True).to_pandas()
+    return df, meta["status_col"], meta.get("numeric_failures", {})
+
+
+def save_snapshot_cube(cube, cells, source_hash, snapshot_dir=SNAPSHOT_DIR):
+    # Cubo agregado do df do snapshot (sem alterações salvas) e a célula de cada linha
+    # (dashboard_cube.build_cube_cells); só grava se o snapshot existir
+    data_path, _, cube_path, cells_path = _paths(source_hash, snapshot_dir)
+    if not os.path.exists(data_path):
+        return
+    feather.write_feather(pa.table({"cell": cells}), cells_path + ".tmp")
+    os.replace(cells_path + ".tmp", cells_path)
+    feather.write_feather(pa.Table.from_pandas(cube, preserve_index=False), cube_path + ".tmp")
+    os.replace(cube_path + ".tmp", cube_path)
+
+
+def load_snapshot_cube(source_hash, snapshot_dir=SNAPSHOT_DIR):
+    # (cubo, células) ou None
+    _, meta_path, cube_path, cells_path = _paths(source_hash, snapshot_dir)
+    if not all(os.path.exists(path) for path in (cube_path, cells_path, meta_path)):
+        return None
+    with open(meta_path, encoding="utf-8") as fh:
+        meta = json.load(fh)
+    if meta.get("source_hash") != source_hash or meta.get("version") != SNAPSHOT_VERSION:
+        return None
+    cells = feather.read_table(cells_path)["cell"].to_numpy()
+    return feather.read_table(cube_path).to_pandas(), cells
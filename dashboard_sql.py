@@ -0,0 +1,259 @@
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from dashboard_core import (
+    NUMERIC_COLS, compact_frame, compute_derived, compute_qtd, convert_numeric_cols, normalize_planilha,
+)
+
+DB_PATH = "dashboard.db"
+
+# Cabeçalho da planilha -> coluna da tabela insumos
+COLUMN_MAP = {
+    "Categoria": "categoria",
+    "Código": "codigo",
+    "Insumo": "insumo",
+    "Necessidade Compra": "qtd",
+    "Medida": "medida",
+    "Estoque": "estoque",
+    "compras": "compras",
+    "saldo pós compra": "saldo_pos_compra",
+    "custo": "custo_unitario",
+    "Custo Estoque": "custo_estoque",
+    "total Previsto": "total_previsto",
+    "Situação": "situacao",
+    "Orçamento 1": "orcamento_1",
+    "Orçamento 2": "orcamento_2",
+    "Orçamento 3": "orcamento_3",
+    "Melhor Preço": "melhor_preco",
+    "Redução %": "reducao_percentual",
+    "Redução R$ unt": "reducao_unitaria",
+    "Redução R$ total": "reducao_total",
+    "Qtd Negociada": "qtd_negociada",
+    "Valor Total Compra": "valor_compra",
+    "Valor Previsto": "valor_previsto",
+    "Overstock": "overstock",
+    "Qtd Armazenada": "qtd_armazenada",
+    "Local": "local",
+    "Posição": "posicao",
+    # colunas que a tabela original não tinha (criadas por ensure_schema)
+    "Necessidade Prof.": "necessidade_prof",
+    "Necessidade Aluno": "necessidade_aluno",
+    "Menor Preço": "menor_preco",
+    "Redução Menor Preço": "reducao_menor_preco",
+    "Valor Total Necessidade": "valor_total_necessidade",
+    "Valor Total Histórico": "valor_total_historico",
+    "Fornecedor": "fornecedor",
+    "Nota Fiscal": "nota_fiscal",
+    "Faturado?": "faturado",
+    "Recompra?": "recompra",
+    "Data Compra": "data_compra",
+    "Data Entrega": "data_entrega",
+}
+
+INDEXED_COLS = ["categoria", "situacao", "codigo"]
+
+# Histórico consolidado: cada linha de insumos vem de um arquivo importado (hash do conteúdo) e de
+# um período; as linhas da tabela original ficam com periodo NULL
+PERIOD_COLS = {"periodo": "TEXT", "arquivo": "TEXT"}
+
+_FILES_TABLE = """
+CREATE TABLE IF NOT EXISTS arquivos (
+    hash TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    periodo TEXT NOT NULL,
+    linhas INTEGER,
+    importado_em TEXT,
+    PRIMARY KEY (hash, periodo)
+)
+"""
+
+# Mesmas regras do caminho pandas: status (vazio + orçamento => "Em Orçamento"), 'qtd' unificada
+# e campos financeiros recalculados a partir de 'qtd'
+_CALC_VIEW = """
+CREATE VIEW insumos_calc AS
+SELECT *, vtn - vtc AS overstock_calc
+FROM (
+    SELECT
+        row_id,
+        periodo,
+        codigo,
+        melhor_preco,
+        TRIM(COALESCE(categoria, '')) AS categoria,
+        COALESCE(insumo, '') AS insumo,
+        COALESCE(nota_fiscal, '') AS nota_fiscal,
+        CASE WHEN COALESCE(faturado, '') = '' THEN 'Sem Info' ELSE faturado END AS faturado,
+        CASE
+            WHEN TRIM(COALESCE(situacao, '')) = ''
+                 AND (TRIM(COALESCE(orcamento_1, '')) <> '' OR TRIM(COALESCE(orcamento_2, '')) <> ''
+                      OR TRIM(COALESCE(orcamento_3, '')) <> '')
+            THEN 'Em Orçamento'
+            ELSE TRIM(COALESCE(situacao, ''))
+        END AS status,
+        COALESCE(melhor_preco, 0) * q AS vtc,
+        COALESCE(melhor_preco, 0) * COALESCE(qtd_negociada, 0) AS vtn,
+        COALESCE(custo_unitario, 0) * q AS vp,
+        COALESCE(menor_preco, 0) * q AS vtnec,
+        COALESCE(custo_unitario, 0) * COALESCE(estoque, 0) AS vth,
+        COALESCE(necessidade_prof, 0) AS prof,
+        COALESCE(necessidade_aluno, 0) AS aluno,
+        COALESCE(qtd_armazenada, 0) AS armazenada
+    FROM (
+        SELECT rowid AS row_id, *,
+            CASE
+                WHEN COALESCE(qtd, 0) > 0 THEN qtd
+                WHEN COALESCE(compras, 0) > 0 THEN compras
+                WHEN COALESCE(necessidade_prof, 0) + COALESCE(necessidade_aluno, 0) > 0
+                    THEN COALESCE(necessidade_prof, 0) + COALESCE(necessidade_aluno, 0)
+                ELSE 0
+            END AS q
+        FROM insumos
+    )
+)
+WHERE status <> ''
+"""
+
+_ready = set()
+
+
+def connect(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    if db_path not in _ready:
+        ensure_schema(conn)
+        _ready.add(db_path)
+    return conn
+
+
+def _column_type(header):
+    return "REAL" if header in NUMERIC_COLS else "TEXT"
+
+
+def ensure_schema(conn):
+    # Cria a tabela/colunas ausentes do mapeamento, índices e a view de cálculo (idempotente)
+    columns = ", ".join(f'"{col}" {_column_type(header)}' for header, col in COLUMN_MAP.items())
+    conn.execute(f"CREATE TABLE IF NOT EXISTS insumos ({columns})")
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(insumos)")}
+    for header, col in COLUMN_MAP.items():
+        if col not in existing:
+            conn.execute(f'ALTER TABLE insumos ADD COLUMN "{col}" {_column_type(header)}')
+    for col, col_type in PERIOD_COLS.items():
+        if col not in existing:
+            conn.execute(f'ALTER TABLE insumos ADD COLUMN "{col}" {col_type}')
+    for col in INDEXED_COLS:
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_insumos_{col} ON insumos ("{col}")')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_insumos_periodo ON insumos (periodo, codigo)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_insumos_arquivo ON insumos (arquivo)")
+    conn.execute(_FILES_TABLE)
+    # recriada a cada processo para acompanhar mudanças na fórmula
+    conn.execute("DROP VIEW IF EXISTS insumos_calc")
+    conn.execute(_CALC_VIEW)
+    conn.commit()
+
+
+def read_insumos(db_path=DB_PATH, periodo=None):
+    # Linhas de um período da tabela insumos (None = linhas sem período) com os cabeçalhos da
+    # planilha, como texto (mesma entrada de normalize_planilha)
+    select = ", ".join(f'"{col}" AS "{header}"' for header, col in COLUMN_MAP.items())
+    with closing(connect(db_path)) as conn:
+        raw = pd.read_sql_query(f"SELECT {select} FROM insumos WHERE periodo IS ?", conn, params=[periodo])
+    df = pd.DataFrame(index=raw.index)
+    for col in raw.columns:
+        values = raw[col]
+        if pd.api.types.is_float_dtype(values) and col == "Código":
+            values = values.astype("Int64")
+        df[col] = values.astype(str).where(values.notna(), "")
+    return df
+
+
+def load_insumos(db_path=DB_PATH, periodo=None):
+    # Mesmo retorno de dashboard_core.load_planilha, a partir do banco
+    df, status_col = normalize_planilha(read_insumos(db_path, periodo))
+    numeric_failures = convert_numeric_cols(df, NUMERIC_COLS)
+    df["qtd"] = compute_qtd(df)
+    compute_derived(df)
+    compact_frame(df, status_col)
+    return df, status_col, {c: n for c, n in numeric_failures.items() if n}
+
+
+def db_version(db_path=DB_PATH):
+    # Chave de cache: muda quando o arquivo do banco é alterado
+    stat = os.stat(db_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def list_periods(db_path=DB_PATH):
+    # (período, linhas) em ordem; None = linhas da tabela original, sem período
+    with closing(connect(db_path)) as conn:
+        return conn.execute("SELECT periodo, COUNT(*) FROM insumos GROUP BY periodo ORDER BY periodo").fetchall()
+
+
+def query_cube(db_path=DB_PATH, periodo=None):
+    # Cubo (Categoria, Faturado?, status, Nota Fiscal) agregado no SQLite,
+    # com as mesmas colunas de dashboard_cube.build_cube
+    sql = """
+        SELECT categoria AS "Categoria", faturado AS "Faturado?", status, nota_fiscal AS "Nota Fiscal",
+               COUNT(*) AS n, MIN(row_id) AS first_row,
+               SUM(vtc) AS "Valor Total Compra", SUM(vtn) AS "Valor Total Negociado",
+               SUM(vp) AS "Valor Previsto", SUM(vtnec) AS "Valor Total Necessidade",
+               SUM(vth) AS "Valor Total Histórico", SUM(prof) AS "Necessidade Prof.",
+               SUM(aluno) AS "Necessidade Aluno", SUM(prof > 0) AS n_prof, SUM(aluno > 0) AS n_aluno,
+               SUM(armazenada > 0) AS n_armazenada
+        FROM insumos_calc
+        WHERE periodo IS ?
+        GROUP BY categoria, faturado, status, nota_fiscal
+    """
+    with closing(connect(db_path)) as conn:
+        return pd.read_sql_query(sql, conn, params=[periodo])
+
+
+# Alterações feitas na tabela de itens, por fonte de dados (hash da planilha ou caminho do banco).
+# Upsert por (fonte, chave, campo): salvar não reescreve o conjunto de dados inteiro
+_EDITS_TABLE = """
+CREATE TABLE IF NOT EXISTS edicoes (
+    fonte TEXT NOT NULL,
+    codigo TEXT NOT NULL,
+    insumo TEXT NOT NULL,
+    medida TEXT NOT NULL,
+    campo TEXT NOT NULL,
+    valor TEXT,
+    salvo_em TEXT,
+    PRIMARY KEY (fonte, codigo, insumo, medida, campo)
+)
+"""
+
+
+def save_edits(changes, fonte, db_path=DB_PATH):
+    rows = [
+        (fonte, str(r["Código"]), str(r["Insumo"]), str(r["Medida"]), r["campo"], r["valor"])
+        for r in changes.to_dict("records")
+    ]
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute(_EDITS_TABLE)
+        conn.executemany(
+            """
+            INSERT INTO edicoes (fonte, codigo, insumo, medida, campo, valor, salvo_em)
+            VALUES (?, ?, ?, ?, ?, ?, datetime('now', 'localtime'))
+            ON CONFLICT (fonte, codigo, insumo, medida, campo)
+            DO UPDATE SET valor = excluded.valor, salvo_em = excluded.salvo_em
+            """,
+            rows,
+        )
+        conn.commit()
+    return len(rows)
+
+
+def load_edits(fonte, db_path=DB_PATH):
+    # Alterações salvas para a fonte, no formato de dashboard_core.diff_edits
+    columns = ["Código", "Insumo", "Medida", "campo", "valor"]
+    if not os.path.exists(db_path):
+        return pd.DataFrame(columns=columns)
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute(_EDITS_TABLE)
+        return pd.read_sql_query(
+            'SELECT codigo AS "Código", insumo AS "Insumo", medida AS "Medida", campo, valor '
+            "FROM edicoes WHERE fonte = ? ORDER BY salvo_em",
+            conn,
+            params=[fonte],
+        )
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Conjuntos de dados normalizados compartilhados entre as sessões do servidor, por chave
+# (hash da planilha / banco + versão). Cada sessão recebe uma cópia rasa do df: com o
+# copy-on-write do pandas as alterações da sessão (edições, colunas novas) não tocam o original.
+
+
+class _Entry:
+    def __init__(self, value, name):
+        self.value = value
+        self.name = name
+        self.sessions = {}  # id da sessão -> último acesso
+        self.last_used = time.time()
+        self.loaded_at = self.last_used
+        self.nbytes = int(value[0].memory_usage(deep=True).sum())
+
+
+class DatasetStore:
+    def __init__(self, max_entries, idle_seconds):
+        # max_entries: limite de conjuntos em memória; idle_seconds: após esse tempo sem acesso a sessão
+        # deixa de contar como referência (não há aviso quando a aba do navegador fecha) e o conjunto
+        # é descartado
+        self.max_entries = max_entries
+        self.idle_seconds = idle_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def acquire(self, key, session_id, loader, name=""):
+        # Devolve (df, status_col, numeric_failures, hit); loader() só roda se a chave não estiver carregada.
+        # Sessões pedindo a mesma chave ao mesmo tempo esperam uma única carga
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                hit = entry is not None
+                if hit:
+                    self.hits += 1
+            if not hit:
+                entry = _Entry(loader(), name)
+                with self._lock:
+                    self.misses += 1
+                    self._entries[key] = entry
+        with self._lock:
+            self._loading.pop(key, None)
+            now = time.time()
+            entry.sessions[session_id] = now
+            entry.last_used = now
+            self._entries.move_to_end(key)
+            self._evict(now)
+        df, status_col, numeric_failures = entry.value
+        return df.copy(deep=False), status_col, numeric_failures, hit
+
+    def release(self, key, session_id):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.sessions.pop(session_id, None)
+            self._evict(time.time())
+
+    def _refs(self, entry, now):
+        for session_id, seen in list(entry.sessions.items()):
+            if now - seen > self.idle_seconds:
+                del entry.sessions[session_id]
+        return len(entry.sessions)
+
+    def _drop(self, key):
+        del self._entries[key]
+        self.evictions += 1
+
+    def _evict(self, now):
+        # Roda em todo acesso (acquire, release, stats). Conjuntos sem acesso há mais de idle_seconds
+        # saem primeiro; acima de max_entries, LRU entre os sem sessões ativas e depois entre os demais.
+        # Uma sessão que perde o conjunto segue com a cópia rasa que já recebeu; o próximo acquire recarrega
+        for key, entry in list(self._entries.items()):
+            if now - entry.last_used > self.idle_seconds:
+                self._drop(key)
+        for referenced in (False, True):
+            for key in list(self._entries):
+                if len(self._entries) <= self.max_entries:
+                    return
+                if referenced or self._refs(self._entries[key], now) == 0:
+                    self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            now = time.time()
+            self._evict(now)
+            entries = [
+                {
+                    "Chave": key[:12], "Origem": entry.name, "Linhas": len(entry.value[0]),
+                    "MB": entry.nbytes / 2**20, "Sessões": self._refs(entry, now),
+                    "Ocioso (s)": int(now - entry.last_used),
+                }
+                for key, entry in reversed(self._entries.items())
+            ]
+            total = self.hits + self.misses
+            return {
+                "entries": entries,
+                "mb": sum(e["MB"] for e in entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -1,182 +1,359 @@
+import os
+from datetime import date
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
+from pandas.io.formats.style import Styler
 
-# Upload do arquivo
-st.sidebar.markdown("## 📁 Selecione a planilha de dados")
-uploaded_file = st.sidebar.file_uploader(
-    "Escolha um arquivo .csv ou .xls/.xlsx",
-    type=["csv", "xls", "xlsx"]
+from dashboard_cache import (
+    load_uploaded, load_saved_snapshot, load_database, load_cube, load_search_index, dataset_store,
+    edits_token, export_jobs, section_jobs, load_periods, load_period_comparison, load_delta, load_quotes,
+    load_timeline, load_reports, session_id,
+)
+from dashboard_core import EDITOR_RENAME, format_brl, format_brl_array, to_float_series, diff_edits, apply_edits, fill_blank, memory_report
+from dashboard_cube import (
+    CUBE_SUMS, build_cube, slice_cube, faturamento_table, status_table,
+    categoria_table, categoria_faturamento_table, nota_fiscal_table
+)
+from dashboard_delta import delta_totals
+from dashboard_export import EXPORT_FORMATS, build_xlsx, excel_engine
+from dashboard_history import SUMMARY_COLUMNS, load_report_detail, save_report
+from dashboard_periods import MISSING_STATUS, detect_period, ingest_many, list_files, period_label
+from dashboard_quotes import QUOTE_SUMS, quote_table, quote_totals
+from dashboard_report import report_indicators, summary_dict, summary_frame
+from dashboard_search import SEARCH_MODES
+from dashboard_snapshot import list_snapshots
+from dashboard_sql import DB_PATH, save_edits, load_edits
+from dashboard_table import (
+    PAGE_SIZES, PAGINATE_MIN_ROWS, TABLE_PAGE_SIZE, editor_frame, overlay_edits, page_count, page_edits,
+    pending_changes, table_rows, table_window,
 )
+from dashboard_timeline import (
+    BUCKET_FREQS, PRAZO_ENTREGA_DIAS, build_timeline, lead_summary, lead_table, period_series, slice_buckets,
+)
+from dashboard_timing import TIMING_LOG, active_timer, enabled_by_env, end_run, begin_section, stage, standalone_stage, start_run
 
-def to_float(valor):
-    if pd.isna(valor):
-        return 0.0
-    valor = str(valor).replace("R$", "").replace(" ", "").strip()
-    if "," in valor:
-        valor = valor.replace(".", "").replace(",", ".")
-    try:
-        return float(valor)
-    except Exception:
-        return 0.0
-
-def format_brl(value):
-    try:
-        return f"R$ {float(value):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    except Exception:
-        return f"R$ {value}"
-
-if uploaded_file is not None:
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file, sep=";", dtype=str)
-    else:
-        df = pd.read_excel(uploaded_file, dtype=str)
-    df.columns = df.columns.str.strip()
-    if "Categoria" in df.columns:
-        df['Categoria'] = df['Categoria'].astype(str).str.strip()
-
-    # Garantir colunas esperadas existem
-    expected_cols = [
-        "Categoria","Código","Insumo","Necessidade Prof.","Necessidade Aluno","Medida","Estoque",
-        "Necessidade Compra","saldo pós compra","Menor Preço","custo","Custo Estoque","total Previsto",
-        "Situação","Orçamento 1","Orçamento 2","Orçamento 3","Melhor Preço","Redução Menor Preço",
-        "Redução %","Redução R$ unt","Redução R$ total","Qtd Negociada","Valor Total Compra",
-        "Valor Total Necessidade","Valor Previsto","Valor Total Histórico","Overstock","Qtd Armazenada",
-        "Local","Posição","Fornecedor","Nota Fiscal","Faturado?","Recompra?","Data Compra","Data Entrega","compras"
-    ]
-    for col in expected_cols:
-        if col not in df.columns:
-            df[col] = ""
-
-    # Normaliza valores vazios
-    # Preenche vazios e infere tipos para evitar aviso de downcasting futuro
-    df = df.fillna("").infer_objects(copy=False)
-    
-    # ---- Novo: detecta coluna de status (N ou Situação) e cria versão normalizada para uso em todo o script
-    status_col = "N" if "N" in df.columns else "Situação"
-    # garante string e trim
-    df[status_col] = df[status_col].astype(str).str.strip()
-
-    # garante que colunas de orçamento existam
-    orc_cols = ["Orçamento 1", "Orçamento 2", "Orçamento 3"]
-    for c in orc_cols:
-        if c not in df.columns:
-            df[c] = ""
-
-    # marca como orçado se qualquer célula em Orçamento 1/2/3 tiver valor não vazio
-    df["is_orcado"] = df[orc_cols].fillna("").astype(str).apply(lambda row: any(str(v).strip() != "" for v in row), axis=1)
-
-    # se status estiver vazio mas houver orçamento, considerar como "Em Orçamento"
-    empty_status_mask = df[status_col] == ""
-    df.loc[empty_status_mask & df["is_orcado"], status_col] = "Em Orçamento"
-
-    # versão normalizada para comparações e filtragens
-    df["status_norm"] = df[status_col].str.lower()
-
-    # REMOVER totalmente linhas sem status (agora respeita orçamentos)
-    df = df[df["status_norm"] != ""].copy()
+# Medição por etapa (opcional): estado do toggle do painel "Tempo por etapa" no rerun anterior
+timing_enabled = st.session_state.get("timing_enabled", enabled_by_env())
+if timing_enabled:
+    start_run(profile=st.session_state.pop("profile_next_run", False))
 
+begin_section("carga dos dados")
+# Upload do arquivo ou snapshot já normalizado de uma sessão anterior
+st.sidebar.markdown("## 📁 Selecione a planilha de dados")
+snapshots = list_snapshots()
+source_options = ["Enviar planilha"]
+if snapshots:
+    source_options.append("Snapshot salvo")
+if os.path.exists(DB_PATH):
+    source_options.append("Banco de dados")
+data_source = "Enviar planilha"
+if len(source_options) > 1:
+    data_source = st.sidebar.radio("Fonte dos dados", source_options, horizontal=True)
+# no modo banco de dados as agregações por categoria/status/nota fiscal rodam em SQL
+sql_mode = data_source == "Banco de dados"
+
+selected_period = None
+# nome da planilha de origem (uploads e snapshots): base para comparar com a versão anterior
+source_name = None
+if sql_mode:
+    # histórico consolidado: um período por vez (o mais recente primeiro; None = linhas sem período)
+    periods = [p for p, _ in load_periods(DB_PATH)]
+    if periods != [None]:
+        selected_period = st.sidebar.selectbox(
+            "Período", periods[::-1], format_func=lambda p: "(sem período)" if p is None else p
+        )
+    df, status_col, numeric_failures, ingest_info = load_database(DB_PATH, selected_period)
+elif data_source == "Snapshot salvo":
+    chosen_snapshot = st.sidebar.selectbox(
+        "Snapshot",
+        snapshots,
+        format_func=lambda m: f"{m['source_name']} · {m['created_at'].replace('T', ' ')} · {m['rows']} linhas"
+    )
+    df, status_col, numeric_failures, ingest_info = load_saved_snapshot(chosen_snapshot["source_hash"])
+    source_name = chosen_snapshot["source_name"]
 else:
-    st.warning("Por favor, selecione uma planilha para continuar.")
-    st.stop()
+    uploaded_file = st.sidebar.file_uploader(
+        "Escolha um arquivo .csv ou .xls/.xlsx",
+        type=["csv", "xls", "xlsx"]
+    )
 
+    if uploaded_file is not None:
+        # leitura + normalização ficam em cache pelo hash do conteúdo; filtros só tocam o df em memória
+        df, status_col, numeric_failures, ingest_info = load_uploaded(uploaded_file)
+        source_name = uploaded_file.name
+    else:
+        st.warning("Por favor, selecione uma planilha para continuar.")
+        st.stop()
+
+# Importação incremental de várias planilhas (uma por período) para o histórico do banco
+def render_consolidacao():
+    files = st.file_uploader(
+        "Planilhas (uma por período)", type=["csv", "xls", "xlsx"], accept_multiple_files=True,
+        key="consolidar_arquivos"
+    )
+    if files:
+        default_period = period_label(date.today())
+        plan = st.data_editor(
+            pd.DataFrame({
+                "Arquivo": [f.name for f in files],
+                "Período": [detect_period(f.name, default_period) for f in files],
+            }),
+            disabled=["Arquivo"], hide_index=True, use_container_width=True,
+            key=f"consolidar_periodos_{hash(tuple(f.file_id for f in files))}"
+        )
+        st.caption("Arquivos já importados (mesmo conteúdo) são ignorados; o mesmo nome no mesmo período substitui a versão anterior.")
+        if st.button("Importar para o banco", key="consolidar_importar"):
+            with st.spinner("Importando planilhas..."):
+                st.session_state["consolidacao"] = ingest_many(
+                    ((f.getvalue(), f.name, str(p).strip() or default_period) for f, p in zip(files, plan["Período"])),
+                    DB_PATH,
+                )
+            st.rerun()
+    if "consolidacao" in st.session_state:
+        st.dataframe(st.session_state["consolidacao"], use_container_width=True, hide_index=True)
+    if os.path.exists(DB_PATH):
+        imported = list_files(DB_PATH)
+        if not imported.empty:
+            st.caption(f"{len(imported)} arquivo(s) no histórico")
+            st.dataframe(imported, use_container_width=True, hide_index=True)
+
+
+# só monta (e só toca o banco) com o painel aberto
+consolidacao_box = st.sidebar.expander("📥 Consolidar planilhas no banco", key="sec_consolidar", on_change="rerun")
+if consolidacao_box.open:
+    with consolidacao_box:
+        render_consolidacao()
+
+begin_section("barra lateral e busca")
 st.title("📊 Dashboard de Compras - Linha 1 2026")
 
 with st.sidebar:
     st.header("🔍 Filtros")
     search_term = st.text_input("Buscar Insumo")
 
+    # busca por índice de trigramas (sem acento/maiúsculas) em Insumo e Código
+    search_matches = None
     if search_term:
-        similares = df[df["Insumo"].str.contains(search_term, case=False, na=False)]["Insumo"].unique()
-        st.markdown("**Insumos encontrados:**")
-        for insumo in similares:
-            st.write(insumo)
+        search_mode = st.radio("Tipo de busca", SEARCH_MODES, horizontal=True)
+        search_index = load_search_index(ingest_info["hash"], df)
+        # posições de linha no df
+        search_matches = search_index.search(search_term, search_mode)
+        similares = df["Insumo"].iloc[search_matches].unique()
+        if len(similares) == 0 and search_mode == "Contém":
+            sugestoes = df["Insumo"].iloc[search_index.fuzzy(search_term)].unique()
+            if len(sugestoes):
+                st.markdown("**Nenhum resultado. Você quis dizer:**")
+                for insumo in sugestoes[:10]:
+                    st.write(insumo)
+        else:
+            st.markdown("**Insumos encontrados:**")
+            for insumo in similares:
+                st.write(insumo)
 
     selected_category = st.multiselect(
         "Categoria",
-        options=df["Categoria"].replace("", "Sem Categoria").unique(),
-        default=df["Categoria"].replace("", "Sem Categoria").unique()
+        options=list(fill_blank(df["Categoria"], "Sem Categoria").unique()),
+        default=list(fill_blank(df["Categoria"], "Sem Categoria").unique())
     )
 
-    faturamento_options = df['Faturado?'].replace("", "Sem Info").fillna("Sem Info").unique()
+    faturamento_options = list(fill_blank(df['Faturado?'], "Sem Info").fillna("Sem Info").unique())
     selected_faturamento = st.multiselect(
         "Status Faturamento",
         options=faturamento_options,
         default=faturamento_options
     )
 
-# Converte colunas numéricas essenciais (faz antes de calcular 'qtd')
-numeric_cols = [
-    "Necessidade Prof.","Necessidade Aluno","Necessidade Compra","Estoque","saldo pós compra",
-    "Menor Preço","custo","Custo Estoque","total Previsto","Redução Menor Preço","Redução %",
-    "Redução R$ unt","Redução R$ total","Qtd Negociada","Valor Total Compra","Valor Total Necessidade",
-    "Valor Previsto","Valor Total Histórico","Overstock","Qtd Armazenada","Melhor Preço","compras"
-]
-for col in numeric_cols:
-    if col in df.columns:
-        # Atribuicao direta evita erro de dtype em pandas recentes ao trocar string -> float
-        df[col] = df[col].apply(to_float)
-
-# Cria coluna unificada 'qtd' usada por todo o script:
-# prioridade: "Necessidade Compra" > "compras" > soma("Necessidade Prof.","Necessidade Aluno") > 0
-def compute_qtd_row(row):
-    if row.get("Necessidade Compra", 0) and to_float(row.get("Necessidade Compra", 0)) > 0:
-        return to_float(row.get("Necessidade Compra", 0))
-    if row.get("compras", 0) and to_float(row.get("compras", 0)) > 0:
-        return to_float(row.get("compras", 0))
-    prof = to_float(row.get("Necessidade Prof.", 0))
-    aluno = to_float(row.get("Necessidade Aluno", 0))
-    if prof + aluno > 0:
-        return prof + aluno
-    return 0.0
-
-df["qtd"] = df.apply(compute_qtd_row, axis=1)
-
-# Aplica filtros
-filtered_df = df[df["Categoria"].isin(selected_category)].copy()
-# evita fillna em Series de dtype object — já substitui valores vazios e garante string
-filtered_df["Faturado?"] = filtered_df["Faturado?"].replace("", "Sem Info").astype(str)
-filtered_df = filtered_df[filtered_df['Faturado?'].isin(selected_faturamento)].copy()
-
-# também manter a coluna normalizada no filtered_df
-filtered_df[status_col] = filtered_df[status_col].astype(str)
-filtered_df["status_norm"] = filtered_df[status_col].str.strip().str.lower()
+    lazy_render = st.toggle(
+        "Renderização sob demanda", value=True,
+        help="Calcula abas e seções pesadas só quando estão abertas."
+    )
+    paginate = st.toggle(
+        "Tabelas paginadas", value=True,
+        help=f"Tabelas com {PAGINATE_MIN_ROWS} linhas ou mais são ordenadas e filtradas no servidor; só a página visível vai para o navegador.",
+    )
+    prazo_entrega = st.number_input(
+        "Prazo de entrega (dias)", min_value=1, max_value=365, value=PRAZO_ENTREGA_DIAS, step=1,
+        help="Itens aguardando sem Data Entrega contam como atrasados quando a Data Compra passou deste prazo.",
+    )
+
+
+def lazy_tabs(labels, key):
+    if not lazy_render:
+        return st.tabs(labels)
+    return st.tabs(labels, key=key, on_change="rerun")
+
+
+def lazy_section(title, key):
+    # no modo sob demanda a seção vira um expander que só calcula quando aberto
+    if not lazy_render:
+        st.markdown(f"### {title}")
+        return st.container(), True
+    section = st.expander(title, key=key, on_change="rerun")
+    return section, bool(section.open)
+
+
+def is_open(container):
+    return not lazy_render or bool(container.open)
+
+
+# Valores em R$ ficam numéricos nas tabelas (ordenação correta); só o texto exibido sai no padrão
+# "R$ 1.234,56" pelo Styler (o printf da column_config só separa milhar como "1,234.56").
+# Acima do limite de células do Styler as colunas viram texto já formatado (ordenação alfabética)
+def brl_style(data, *cols):
+    style = data if isinstance(data, Styler) else data.style
+    cols = [c for c in cols if c in style.data.columns]
+    if style.data.size > pd.get_option("styler.render.max_elements"):
+        frame = style.data.copy()
+        for col in cols:
+            frame[col] = np.where(frame[col].isna(), "", format_brl_array(frame[col]))
+        return frame
+    return style.format("R$ {:,.2f}", subset=cols, thousands=".", decimal=",", na_rep="")
+
+
+def is_paginated(frame):
+    return paginate and len(frame) >= PAGINATE_MIN_ROWS
+
+
+def table_controls(frame, key, columns):
+    # Colunas, ordenação, filtro e página de uma tabela paginada (estado no session_state por key).
+    # Devolve (linhas na ordem exibida, colunas escolhidas, página, linhas por página)
+    label = lambda c: EDITOR_RENAME.get(c, c)
+    with st.popover("🧱 Colunas"):
+        shown = st.multiselect("Colunas exibidas", columns, default=columns, format_func=label, key=f"{key}_cols")
+    c1, c2, c3, c4 = st.columns([2, 1, 2, 2])
+    sort_by = c1.selectbox("Ordenar por", [None] + shown, key=f"{key}_sort",
+                           format_func=lambda c: "(ordem da planilha)" if c is None else label(c))
+    ascending = c2.toggle("Crescente", value=True, key=f"{key}_asc")
+    filter_col = c3.selectbox("Filtrar coluna", shown, format_func=label, key=f"{key}_fcol")
+    filter_text = c4.text_input("Contendo", key=f"{key}_ftext")
+    rows = table_rows(frame, sort_by, ascending, filter_col, filter_text)
+
+    c5, c6, c7 = st.columns([1, 1, 3])
+    page_size = c5.selectbox("Linhas por página", PAGE_SIZES, index=PAGE_SIZES.index(TABLE_PAGE_SIZE), key=f"{key}_size")
+    n_pages = page_count(rows, page_size)
+    # filtro novo pode deixar a página atual além da última
+    if st.session_state.get(f"{key}_page", 1) > n_pages:
+        st.session_state[f"{key}_page"] = n_pages
+    page = c6.number_input("Página", min_value=1, max_value=n_pages, step=1, key=f"{key}_page") - 1
+    c7.caption(f"{len(rows):,} linha(s) · página {page + 1} de {n_pages}")
+    return rows, shown, page, page_size
+
+
+def paged_dataframe(frame, key, brl=()):
+    # st.dataframe com a tabela inteira quando pequena; senão só a página visível (colunas em R$ em brl)
+    if not is_paginated(frame):
+        st.dataframe(brl_style(frame, *brl), use_container_width=True, hide_index=True)
+        return
+    rows, shown, page, page_size = table_controls(frame, key, list(frame.columns))
+    st.dataframe(brl_style(table_window(frame, rows, shown, page, page_size), *brl), use_container_width=True,
+                 hide_index=True)
+
+if numeric_failures:
+    with st.sidebar.expander("⚠️ Valores numéricos não reconhecidos"):
+        st.caption("Células convertidas para 0,0 por não estarem em formato numérico/BRL.")
+        st.dataframe(
+            pd.DataFrame({"Coluna": list(numeric_failures), "Células": list(numeric_failures.values())}),
+            use_container_width=True, hide_index=True
+        )
 
+begin_section("versão anterior")
+# Delta linha a linha contra a versão anterior da mesma planilha (antes das alterações salvas)
+previous_version, delta = (
+    load_delta(source_name, ingest_info["hash"], df, status_col) if source_name is not None else (None, None)
+)
+
+begin_section("alterações salvas")
+# Reaplica as alterações já salvas para este conjunto de dados (upserts da tabela edicoes)
+saved_edits = load_edits(ingest_info["edits_key"])
+if not saved_edits.empty:
+    apply_edits(df, saved_edits)
+
+# Instrumentação do cache de leitura (hit/miss e tempo de carga)
+ingest_stats = st.session_state["ingest_stats"]
+st.sidebar.caption(
+    f"{'⚡ Planilha em cache' if ingest_info['hit'] else '📥 Planilha carregada'} "
+    f"em {ingest_info['seconds'] * 1000:.0f} ms · hits {ingest_stats['hits']} / misses {ingest_stats['misses']}"
+    + (f" · pico de memória do processo desde o início {ingest_info['peak_mb']:.0f} MB" if ingest_info["peak_mb"] else "")
+)
+
+begin_section("filtro", len(df))
+# Aplica filtros: as máscaras são combinadas e as linhas selecionadas uma única vez
+# (status e status_norm já vêm normalizados do carregamento)
+row_mask = (
+    df["Categoria"].isin(selected_category) & fill_blank(df["Faturado?"], "Sem Info").isin(selected_faturamento)
+).to_numpy(copy=True)
+if search_matches is not None:
+    search_mask = np.zeros(len(df), dtype=bool)
+    search_mask[search_matches] = True
+    row_mask &= search_mask
+filtered_rows = np.flatnonzero(row_mask)
+filtered_df = df.iloc[filtered_rows]
+filtered_df["Faturado?"] = fill_blank(filtered_df["Faturado?"], "Sem Info")
+
+# filtered_df herda de df as colunas numéricas, a 'qtd' e os campos financeiros já calculados
+
+begin_section("cubo", len(filtered_df))
+# Cubo pré-agregado (Categoria, Faturado?, status, Nota Fiscal), montado uma vez por conjunto de dados;
+# os filtros da barra lateral só recortam o cubo. A busca textual usa o caminho por linhas.
 if search_term:
-    filtered_df = filtered_df[filtered_df["Insumo"].str.contains(search_term, case=False, na=False)].copy()
-
-# Assegura que as colunas numéricas também existam no filtered_df e cria 'qtd' nele
-for col in numeric_cols:
-    if col in filtered_df.columns:
-        filtered_df[col] = filtered_df[col].apply(to_float)
-filtered_df["qtd"] = filtered_df.apply(compute_qtd_row, axis=1)
-
-# Recalcula campos financeiros com base em 'qtd' e dados novos
-filtered_df["Valor Previsto"] = filtered_df["custo"] * filtered_df["qtd"]
-filtered_df["Valor Total Compra"] = filtered_df["Melhor Preço"] * filtered_df["qtd"]
-filtered_df["Valor Total Negociado"] = filtered_df["Melhor Preço"] * filtered_df["Qtd Negociada"].fillna(0)
-filtered_df["Valor Total Necessidade"] = filtered_df["Menor Preço"] * filtered_df["qtd"]
-filtered_df["Valor Total Histórico"] = filtered_df["custo"] * filtered_df["Estoque"].fillna(0)
-filtered_df["Overstock"] = filtered_df["Valor Total Negociado"].fillna(0) - filtered_df["Valor Total Compra"].fillna(0)
-
-# Garante tipos float pós-cálculo
-for col in ["Valor Previsto","Valor Total Compra","Valor Total Negociado","Valor Total Necessidade","Valor Total Histórico","Overstock"]:
-    if col in filtered_df.columns:
-        filtered_df[col] = filtered_df[col].apply(to_float)
-
-total_negociado = filtered_df["Valor Total Negociado"].sum()
-total_compra = filtered_df["Valor Total Compra"].sum()
-total_previsto = filtered_df["Valor Previsto"].sum()
-total_necessidade = filtered_df["Valor Total Necessidade"].sum()
-total_historico = filtered_df["Valor Total Histórico"].sum()
-total_economia = total_previsto - total_compra
-total_overstock_calculado = (filtered_df["Valor Total Negociado"] - filtered_df["Valor Total Compra"]).sum()
-percentual_overstock = (total_overstock_calculado / total_compra) * 100 if total_compra > 0 else 0
+    cube = build_cube(filtered_df, status_col)
+else:
+    cube = load_cube(
+        ingest_info["hash"], df, status_col, saved_edits, (DB_PATH, selected_period) if sql_mode else None,
+        (previous_version["source_hash"] if previous_version else None, delta) if source_name is not None else None,
+    )
+cube_view = slice_cube(cube, selected_category, selected_faturamento)
+# estado dos filtros: chave dos resultados calculados em segundo plano (seções pesadas e exportação)
+filter_state = (
+    ingest_info["hash"], edits_token(saved_edits), tuple(sorted(map(str, selected_category))),
+    tuple(sorted(map(str, selected_faturamento))), search_term, search_mode if search_term else None,
+)
+# totais + indicadores de status/entrega (mesmo cálculo do relatório em linha de comando)
+totals = report_indicators(cube_view)
+
+begin_section("painéis de memória e cache")
+# Memória ocupada pelos DataFrames desta sessão
+session_frames = {"Dados carregados (compartilhado)": df, "Linhas filtradas": filtered_df, "Cubo": cube}
+session_frames.update({f"session_state: {k}": v for k, v in st.session_state.items() if isinstance(v, pd.DataFrame)})
+mem_report, mem_total = memory_report(session_frames)
+with st.sidebar.expander(f"🧠 Memória da sessão: {mem_total:.1f} MB"):
+    st.dataframe(mem_report, use_container_width=True, hide_index=True, column_config={
+        "MB": st.column_config.NumberColumn(format="%.2f"),
+    })
+
+# Painel do cache compartilhado entre as sessões do servidor
+store_stats = dataset_store().stats()
+with st.sidebar.expander(f"🛠️ Cache compartilhado: {store_stats['mb']:.1f} MB"):
+    st.caption(
+        f"{len(store_stats['entries'])} conjunto(s) · hits {store_stats['hits']} / misses {store_stats['misses']} "
+        f"({store_stats['hit_rate']:.0%}) · descartes {store_stats['evictions']}"
+    )
+    jobs_stats = section_jobs().stats()
+    st.caption(
+        f"Seções em segundo plano: {jobs_stats['jobs']} resultado(s) · {jobs_stats['running']} em andamento "
+        f"· {jobs_stats['cancelled']} cancelado(s) por filtros novos"
+    )
+    st.dataframe(pd.DataFrame(store_stats["entries"]), use_container_width=True, hide_index=True, column_config={
+        "MB": st.column_config.NumberColumn(format="%.2f"),
+    })
+
+total_negociado = totals["Valor Total Negociado"]
+total_compra = totals["Valor Total Compra"]
+total_previsto = totals["Valor Previsto"]
+total_necessidade = totals["Valor Total Necessidade"]
+total_historico = totals["Valor Total Histórico"]
+total_economia = totals["economia"]
+total_overstock_calculado = totals["overstock"]
+percentual_overstock = totals["overstock_pct"]
 
 # Resumo Executivo
+begin_section("Resumo Executivo", len(filtered_df))
 st.markdown("### 📌 Resumo Executivo")
 col1, col2 = st.columns(2)
-col1.metric("🧾 Total de Itens", len(filtered_df))
+col1.metric("🧾 Total de Itens", totals["n"])
 col2.metric("💰 Total Compra", format_brl(total_compra))
 col3, col4 = st.columns(2)
 col3.metric("📊 Total Previsto", format_brl(total_previsto))
@@ -190,20 +367,21 @@ col6.metric("🕰️ Valor Histórico (estoque)", format_brl(total_historico))
 # Indicadores de Necessidade Prof. e Necessidade Aluno (métricas + gráfico)
 # Observação: existem várias medidas (UN, M, PNL etc). Em vez de somar sem contexto,
 # mostramos: total bruto por tipo, contagem de itens com necessidade e decomposição por Medida.
-need_prof_total = filtered_df["Necessidade Prof."].sum()
-need_aluno_total = filtered_df["Necessidade Aluno"].sum()
+need_prof_total = totals["Necessidade Prof."]
+need_aluno_total = totals["Necessidade Aluno"]
 
-items_prof_count = int(filtered_df[filtered_df["Necessidade Prof."] > 0].shape[0])
-items_aluno_count = int(filtered_df[filtered_df["Necessidade Aluno"] > 0].shape[0])
+items_prof_count = totals["n_prof"]
+items_aluno_count = totals["n_aluno"]
 
 c1, c2, c3 = st.columns([1,1,1])
 c1.metric("👨‍🏫 Necessidade Prof. (total bruto)", f"{need_prof_total:.0f}")
 c2.metric("🧑‍🎓 Necessidade Aluno (total bruto)", f"{need_aluno_total:.0f}")
 c3.metric("📦 Itens com necessidade (Prof. / Aluno)", f"{items_prof_count} / {items_aluno_count}")
 
+begin_section("Necessidades por Medida", len(filtered_df))
 # decomposição por Medida — permite ver onde as somas podem ser comparáveis
 need_by_medida = (
-    filtered_df.groupby(filtered_df["Medida"].fillna("SEM MEDIDA"))
+    filtered_df.groupby(filtered_df["Medida"].fillna("SEM MEDIDA"), observed=True)
     .agg({"Necessidade Prof.": "sum", "Necessidade Aluno": "sum"})
     .reset_index()
 )
@@ -223,22 +401,14 @@ fig_need = px.bar(
 st.plotly_chart(fig_need, use_container_width=True, key="need_by_medida")
 
 # Resumo por Status de Faturamento
+begin_section("Resumo por Status de Faturamento")
 st.markdown("### 💳 Resumo por Status de Faturamento")
 if 'Faturado?' in filtered_df.columns:
-    faturamento_df = filtered_df.groupby('Faturado?').agg({
-        'Insumo': 'count',
-        'Valor Total Compra': 'sum',
-        'Nota Fiscal': lambda x: x.nunique()
-    }).rename(columns={
-        'Insumo': 'Qtd Itens',
-        'Valor Total Compra': 'Total Compra',
-        'Nota Fiscal': 'Qtd Notas Fiscais'
-    }).reset_index()
-    faturamento_df['Total Compra Formatado'] = faturamento_df['Total Compra'].apply(format_brl)
+    faturamento_df = faturamento_table(cube_view)
     a1, a2 = st.columns(2)
     with a1:
         st.dataframe(
-            faturamento_df[['Faturado?', 'Qtd Itens', 'Qtd Notas Fiscais', 'Total Compra Formatado']],
+            brl_style(faturamento_df[['Faturado?', 'Qtd Itens', 'Qtd Notas Fiscais', 'Total Compra']], 'Total Compra'),
             use_container_width=True, hide_index=True
         )
     with a2:
@@ -249,123 +419,144 @@ if 'Faturado?' in filtered_df.columns:
         st.plotly_chart(fig_faturamento, use_container_width=True, key="fat_chart")
 
 # Status Geral por Situação (usa a coluna detectada dinamicamente)
+begin_section("Status Geral")
 if status_col in filtered_df.columns:
     st.markdown("### 🧮 Status Geral do Processo de Compras")
-    # garante string e versão normalizada (sem fillna em Series)
-    filtered_df[status_col] = filtered_df[status_col].astype(str).str.strip()
-    filtered_df["status_norm"] = filtered_df[status_col].str.lower()
-    # excluir quaisquer linhas sem status (defensivo)
-    filtered_df = filtered_df[filtered_df["status_norm"] != ""].copy()
-
     # --- agora o groupby não criará linha vazia ---
-    status_df = (
-        filtered_df.groupby(status_col)
-        .agg({
-            "Insumo": "count",
-            "Valor Previsto": "sum",
-            "Valor Total Compra": "sum",
-            "Valor Total Negociado": "sum"
-        })
-        .rename(columns={"Insumo": "Qtd. Itens"})
-        .reset_index()
-    )
-    status_df["Valor Previsto"] = status_df["Valor Previsto"].apply(format_brl)
-    status_df["Valor Total Compra"] = status_df["Valor Total Compra"].apply(format_brl)
-    status_df["Valor Total Negociado"] = status_df["Valor Total Negociado"].apply(format_brl)
+    status_df = status_table(cube_view, status_col)
 
     # --- NOVO: indicadores específicos para 'Aguardando' (orçamentos aprovados aguardando entrega) ---
-    aguardando_mask = filtered_df["status_norm"] == "aguardando"
-    aguardando_count = int(filtered_df.loc[aguardando_mask].shape[0])
-    aguardando_valor = filtered_df.loc[aguardando_mask, "Valor Total Compra"].sum() if "Valor Total Compra" in filtered_df.columns else 0.0
-
     # base para percentual = itens com status em (em orçamento, aguardando, entregue)
-    base_mask = filtered_df["status_norm"].isin(["em orçamento", "aguardando", "entregue"])
-    base_total = int(filtered_df.loc[base_mask].shape[0])
-    aguardando_pct = (aguardando_count / base_total * 100) if base_total > 0 else 0.0
+    aguardando_count = totals["aguardando_count"]
+    aguardando_valor = totals["aguardando_valor"]
+    base_total = totals["base_total"]
+    aguardando_pct = totals["aguardando_pct"]
 
     i1, i2, i3 = st.columns([1,2,1])
     i1.metric("⏳ Itens Aguardando", f"{aguardando_count}")
     i2.metric("💰 Valor Total Aguardando", format_brl(aguardando_valor))
     i3.metric("📊 % Aguardando (base)", f"{aguardando_pct:.1f}%")
 
-    st.dataframe(status_df, use_container_width=True, hide_index=True)
+    st.dataframe(
+        brl_style(status_df, "Valor Previsto", "Valor Total Compra", "Valor Total Negociado"),
+        use_container_width=True, hide_index=True
+    )
 
     # Entrega dos itens: base e critérios adaptados aos status: "Em Orçamento", "Aguardando", "Entregue"
-    # usar filtered_df para que a métrica responda aos filtros (categoria, faturamento, busca, etc.)
-    df_status_base = filtered_df[filtered_df["status_norm"].isin(["em orçamento", "aguardando", "entregue"])].copy()
-    df_status_base["Qtd Armazenada"] = df_status_base["Qtd Armazenada"].apply(to_float)
-
-    # Entregue quando status == 'entregue' OU quando há Qtd Armazenada > 0
-    mask_entregue = (df_status_base["status_norm"] == "entregue") | (df_status_base["Qtd Armazenada"] > 0)
-    entregues_ok = df_status_base[mask_entregue].shape[0]
-    total_ok = df_status_base.shape[0]
-    percentual_entregue = (entregues_ok / total_ok) * 100 if total_ok > 0 else 0
+    # Entregue quando status == 'entregue' OU quando há Qtd Armazenada > 0 (contado no cubo)
+    total_ok = base_total
+    percentual_entregue = totals["entregue_pct"]
 
     s1, s2 = st.columns(2)
     s1.metric("📦 Itens (base: Em Orçamento / Aguardando / Entregue)", f"{total_ok}")
     s2.metric("✅ % Entregue (base acima)", f"{percentual_entregue:.1f}%")
 
+# Seções pesadas na pool de threads: o cálculo é agendado pela chave (seção + estado dos filtros) e o
+# fragment da seção se consulta a cada segundo até o resultado ficar pronto; o resto da página não espera.
+# Um estado de filtros novo cancela o que ainda estava na fila para o estado anterior da mesma seção
+# nesta sessão (outra sessão esperando pela mesma chave mantém o job)
+def background_section(render, section, state, compute, *args):
+    jobs = section_jobs()
+    key = (section,) + state
+    job = jobs.submit(key, compute, *args, group=(session_id(), section))
+    timer = active_timer()
+    if job.done() and timer is not None and jobs.duration(key) is not None:
+        timer.add(f"{section} (segundo plano)", jobs.duration(key))
+    st.fragment(render, run_every=None if job.done() else 1)(job, not job.done())
+
+
+def job_result(job, polling):
+    # None enquanto o cálculo roda; ao terminar, um rerun desliga a consulta periódica
+    if not job.done():
+        st.info("⏳ Calculando em segundo plano...")
+        return None
+    if polling or job.cancelled():
+        # cancelado: o rerun agenda o cálculo de novo
+        st.rerun()
+    if job.exception() is not None:
+        st.error(f"Falha no cálculo: {job.exception()}")
+        return None
+    return job.result()
+
+
 # Materiais Aguardando / Em Orçamento (usa status_norm)
-st.markdown("### 🧾 Materiais Aguardando / Em Orçamento")
-pendente_norm = ["em orçamento", "aguardando"]
-df_status_pendentes = df[df["status_norm"].isin(pendente_norm)].copy()
-if df_status_pendentes.empty:
-    st.info("Nenhum material com status 'Aguardando' ou 'Em Orçamento' encontrado.")
-else:
-    df_status_pendentes["Qtd Negociada"] = df_status_pendentes["Qtd Negociada"].apply(to_float)
-    df_status_pendentes["Melhor Preço"] = df_status_pendentes["Melhor Preço"].apply(to_float)
-    df_status_pendentes["Valor Estimado"] = df_status_pendentes["Qtd Negociada"] * df_status_pendentes["Melhor Preço"]
-    df_status_pendentes["Valor Estimado"] = df_status_pendentes["Valor Estimado"].apply(format_brl)
-    st.dataframe(
-        df_status_pendentes[[
-            "Categoria", "Insumo", status_col, "Qtd Negociada", "Medida", "Melhor Preço", "Valor Estimado", "Nota Fiscal", "Faturado?"
-        ]],
-        use_container_width=True,
-        hide_index=True
+@st.fragment
+def render_pendentes(df, status_col):
+    pendente_norm = ["em orçamento", "aguardando"]
+    df_status_pendentes = df[df["status_norm"].isin(pendente_norm)].copy()
+    if df_status_pendentes.empty:
+        st.info("Nenhum material com status 'Aguardando' ou 'Em Orçamento' encontrado.")
+    else:
+        df_status_pendentes["Qtd Negociada"] = to_float_series(df_status_pendentes["Qtd Negociada"])
+        df_status_pendentes["Melhor Preço"] = to_float_series(df_status_pendentes["Melhor Preço"])
+        df_status_pendentes["Valor Estimado"] = df_status_pendentes["Qtd Negociada"] * df_status_pendentes["Melhor Preço"]
+        paged_dataframe(
+            df_status_pendentes[[
+                "Categoria", "Insumo", status_col, "Qtd Negociada", "Medida", "Melhor Preço", "Valor Estimado", "Nota Fiscal", "Faturado?"
+            ]],
+            "tab_pendentes",
+            brl=["Valor Estimado"]
+        )
+
+
+begin_section("Materiais Aguardando / Em Orçamento")
+section, section_open = lazy_section("🧾 Materiais Aguardando / Em Orçamento", "sec_pendentes")
+with section:
+    if section_open:
+        render_pendentes(df, status_col)
+
+# Análise de Notas Fiscais por Categoria (tabela + sunburst montados em segundo plano)
+def compute_notas_fiscais(cube_view):
+    if 'Nota Fiscal' not in cube_view.columns:
+        return None
+    nf_analysis = nota_fiscal_table(cube_view)
+    if nf_analysis.empty:
+        return nf_analysis, None
+    fig_nf = px.sunburst(
+        nf_analysis,
+        path=['Categoria', 'Nota Fiscal'],
+        values='Valor Total Compra',
+        color='Valor Total Compra',
+        title='Distribuição de Notas Fiscais por Categoria e Valor',
+        color_continuous_scale='Blues'
     )
+    table = nf_analysis.sort_values('Valor Total Compra', ascending=False)[
+        ['Categoria', 'Nota Fiscal', 'Insumo', 'Valor Total Compra', 'Faturado?']
+    ]
+    return table, fig_nf
 
-# Análise de Notas Fiscais por Categoria
-st.markdown("### 📝 Análise de Notas Fiscais por Categoria")
-if 'Nota Fiscal' in filtered_df.columns:
-    nf_df = filtered_df[filtered_df['Nota Fiscal'] != '']
-    if not nf_df.empty:
-        nf_analysis = nf_df.groupby(['Categoria', 'Nota Fiscal']).agg({
-            'Insumo': 'count',
-            'Valor Total Compra': 'sum',
-            'Faturado?': 'first'
-        }).reset_index()
-        nf_analysis['Valor Total Compra Formatado'] = nf_analysis['Valor Total Compra'].apply(format_brl)
-        st.dataframe(
-            nf_analysis.sort_values('Valor Total Compra', ascending=False)[
-                ['Categoria', 'Nota Fiscal', 'Insumo', 'Valor Total Compra Formatado', 'Faturado?']
-            ],
-            use_container_width=True,
-            hide_index=True
-        )
-        fig_nf = px.sunburst(
-            nf_analysis,
-            path=['Categoria', 'Nota Fiscal'],
-            values='Valor Total Compra',
-            color='Valor Total Compra',
-            title='Distribuição de Notas Fiscais por Categoria e Valor',
-            color_continuous_scale='Blues'
-        )
-        st.plotly_chart(fig_nf, use_container_width=True, key="nf_sunburst")
-    else:
+
+def render_notas_fiscais(job, polling):
+    result = job_result(job, polling)
+    if result is None:
+        return
+    table, fig_nf = result
+    if fig_nf is None:
         st.info("Nenhuma nota fiscal válida encontrada para análise.")
+        return
+    st.dataframe(brl_style(table, 'Valor Total Compra'), use_container_width=True, hide_index=True)
+    st.plotly_chart(fig_nf, use_container_width=True, key="nf_sunburst")
 
-# Abas de conteúdo
-tab1, tab2, tab3 = st.tabs(["📊 Visualizações", "📋 Tabela de Itens", "📈 Análise Avançada"])
 
-with tab1:
+begin_section("Análise de Notas Fiscais")
+section, section_open = lazy_section("📝 Análise de Notas Fiscais por Categoria", "sec_notas_fiscais")
+with section:
+    if section_open:
+        background_section(render_notas_fiscais, "notas fiscais", filter_state, compute_notas_fiscais, cube_view)
+
+# Abas de conteúdo: no modo sob demanda só a aba selecionada é calculada e enviada ao navegador.
+# Cada aba é um fragmento: interações dentro dela (ex.: filtro de Overstock) só reexecutam a própria aba.
+@st.fragment
+def render_visualizacoes(cube_view):
     st.subheader("💼 Distribuição de Custos por Categoria")
-    pie_data = filtered_df.groupby("Categoria")["Valor Total Compra"].sum().reset_index()
+    categoria_df = categoria_table(cube_view)
+    pie_data = categoria_df[["Categoria", "Valor Total Compra"]]
     fig_pie = px.pie(pie_data, values="Valor Total Compra", names="Categoria",
                      title="Distribuição do Investimento por Categoria", hole=0.4)
     st.plotly_chart(fig_pie, use_container_width=True, key="grafico_pizza")
 
     st.subheader("📦 Overstock por Categoria (Base: Negociado - Compra)")
-    overstock_df = filtered_df.groupby("Categoria")[["Valor Total Compra", "Valor Total Negociado"]].sum().reset_index()
+    overstock_df = categoria_df[["Categoria", "Valor Total Compra", "Valor Total Negociado"]].copy()
     overstock_df["Overstock"] = overstock_df["Valor Total Negociado"] - overstock_df["Valor Total Compra"]
     overstock_df["Valor Total Compra"] = overstock_df["Valor Total Compra"].fillna(0).astype(float)
     overstock_df["Overstock"] = overstock_df["Overstock"].fillna(0).astype(float)
@@ -379,8 +570,8 @@ with tab1:
         overstock_df,
         x="Categoria",
         y="Overstock",
-        color=overstock_df["Overstock"].apply(lambda x: "Acima" if x > 0 else "Abaixo"),
-        text=overstock_df["Overstock"].apply(lambda x: format_brl(x)),
+        color=np.where(overstock_df["Overstock"] > 0, "Acima", "Abaixo"),
+        text=format_brl_array(overstock_df["Overstock"]),
         title="Excesso de Compra por Categoria (R$)",
         color_discrete_map={"Acima": "green", "Abaixo": "red"}
     )
@@ -390,8 +581,8 @@ with tab1:
     st.plotly_chart(fig_over, use_container_width=True, key="grafico_overstock")
 
     st.subheader("💳 Status de Faturamento por Categoria")
-    if 'Faturado?' in filtered_df.columns:
-        fat_cat_df = filtered_df.groupby(['Categoria', 'Faturado?']).size().reset_index(name='Qtd')
+    if 'Faturado?' in cube_view.columns:
+        fat_cat_df = categoria_faturamento_table(cube_view)[['Categoria', 'Faturado?', 'Qtd']]
         fig_fat_cat = px.bar(
             fat_cat_df,
             x='Categoria',
@@ -402,7 +593,41 @@ with tab1:
         )
         st.plotly_chart(fig_fat_cat, use_container_width=True, key="fat_cat")
 
-with tab2:
+
+def render_editor_paginado(filtered_df, df, dataset_key, available_cols):
+    # Editor só com a página visível. As células alteradas ficam pendentes por linha + coluna no
+    # session_state (sobrevivem à troca de página/ordem/filtro) e são salvas juntas
+    pending = st.session_state.setdefault(f"edicoes_pendentes_{dataset_key}", {})
+    rows, shown, page, page_size = table_controls(filtered_df, "tab_itens", available_cols)
+    original = editor_frame(table_window(filtered_df, rows, shown, page, page_size))
+    # um editor por janela: o estado de edição do Streamlit é posicional e não pode migrar de página
+    view_key = hash((tuple(shown), page, page_size, st.session_state.get("tab_itens_sort"),
+                     st.session_state.get("tab_itens_asc"), st.session_state.get("tab_itens_fcol"),
+                     st.session_state.get("tab_itens_ftext")))
+    edited = st.data_editor(overlay_edits(original, pending), use_container_width=True, num_rows="fixed",
+                            key=f"insumos_editor_{view_key}")
+    page_edits(pending, original, edited)
+
+    c1, c2 = st.columns([1, 3])
+    save = c1.button("💾 Salvar Alterações")
+    if pending:
+        c2.caption(f"✏️ {len(pending)} célula(s) alterada(s) ainda não salva(s)")
+    if save:
+        with standalone_stage("salvar alterações", timing_enabled) as rec:
+            changes = pending_changes(df, available_cols, pending)
+            rec["linhas"] = len(changes)
+            if not changes.empty:
+                apply_edits(df, changes)
+                save_edits(changes, dataset_key)
+            pending.clear()
+        if changes.empty:
+            st.info("Nenhuma alteração para salvar.")
+        else:
+            st.success(f"Alterações salvas com sucesso! ({len(changes)} campos)")
+
+
+@st.fragment
+def render_tabela_itens(filtered_df, df, dataset_key):
     st.subheader("📋 Lista Detalhada de Insumos")
     if not filtered_df.empty:
         filtered_df["Overstock"] = filtered_df["Valor Total Negociado"] - filtered_df["Valor Total Compra"]
@@ -421,134 +646,335 @@ with tab2:
             "Melhor Preço": "Valor Unitário Atual",
             "qtd": "qtd"
         }
+        if is_paginated(filtered_df):
+            render_editor_paginado(filtered_df, df, dataset_key, available_cols)
+            return
         display_df = filtered_df[available_cols].rename(columns={k: v for k, v in rename_map.items() if k in available_cols})
+        # colunas category viram texto no editor para aceitar valores novos
+        category_cols = display_df.select_dtypes("category").columns
+        display_df[category_cols] = display_df[category_cols].astype(str)
         edited_df = st.data_editor(display_df, use_container_width=True, num_rows="dynamic", key="insumos_editor")
 
-        def compute_qty_series(mask):
-            # prioridade: "Necessidade Compra" > "compras" > soma(Necessidade Prof., Necessidade Aluno) > qtd fallback
-            if "Necessidade Compra" in df.columns and df.loc[mask, "Necessidade Compra"].sum() > 0:
-                return df.loc[mask, "Necessidade Compra"].fillna(0)
-            if "compras" in df.columns and df.loc[mask, "compras"].sum() > 0:
-                return df.loc[mask, "compras"].fillna(0)
-            if "Necessidade Prof." in df.columns and "Necessidade Aluno" in df.columns:
-                return df.loc[mask, "Necessidade Prof."].fillna(0) + df.loc[mask, "Necessidade Aluno"].fillna(0)
-            return df.loc[mask, "qtd"].fillna(0)
-
         if st.button("💾 Salvar Alterações"):
-            for idx, row in edited_df.iterrows():
-                mask = pd.Series(True, index=df.index)
-                for key in ["Categoria", "Código", "Insumo", "Medida", "Necessidade Compra", "Necessidade Prof.", "Necessidade Aluno", "qtd"]:
-                    if key in df.columns and key in row.index:
-                        mask &= df[key].astype(str) == str(row[key])
-
-                if "Valor Unitário Antigo" in row.index:
-                    df.loc[mask, "custo"] = row["Valor Unitário Antigo"]
-                elif "custo" in row.index:
-                    df.loc[mask, "custo"] = row["custo"]
-
-                if "Valor Unitário Atual" in row.index:
-                    df.loc[mask, "Melhor Preço"] = row["Valor Unitário Atual"]
-                elif "Melhor Preço" in row.index:
-                    df.loc[mask, "Melhor Preço"] = row["Melhor Preço"]
-
-                if "Nota Fiscal" in row.index and "Nota Fiscal" in df.columns:
-                    df.loc[mask, "Nota Fiscal"] = row["Nota Fiscal"]
-                if "Faturado?" in row.index and "Faturado?" in df.columns:
-                    df.loc[mask, "Faturado?"] = row["Faturado?"]
-
-                try:
-                    qty_series = compute_qty_series(mask)
-                    unit_atual = to_float(row.get("Valor Unitário Atual", row.get("Melhor Preço", 0)))
-                    unit_antigo = to_float(row.get("Valor Unitário Antigo", row.get("custo", 0)))
-                    df.loc[mask, "Valor Total Compra"] = unit_atual * qty_series
-                    df.loc[mask, "Valor Previsto"] = unit_antigo * qty_series
-                    if "Qtd Negociada" in df.columns:
-                        df.loc[mask, "Valor Total Negociado"] = unit_atual * df.loc[mask, "Qtd Negociada"].fillna(0)
-                    # atualiza coluna unificada qtd após edição de necessidade
-                    df.loc[mask, "qtd"] = df.loc[mask].apply(compute_qtd_row, axis=1)
-                except Exception:
-                    pass
-
-            df.to_csv("dashboard_data.csv", sep=";", index=False)
-            st.success("Alterações salvas com sucesso!")
+            # só as células alteradas no editor, aplicadas pela chave Código + Insumo + Medida
+            with standalone_stage("salvar alterações", timing_enabled) as rec:
+                changes = diff_edits(display_df, edited_df)
+                rec["linhas"] = len(changes)
+                if not changes.empty:
+                    apply_edits(df, changes)
+                    save_edits(changes, dataset_key)
+            if changes.empty:
+                st.info("Nenhuma alteração para salvar.")
+            else:
+                st.success(f"Alterações salvas com sucesso! ({len(changes)} campos)")
     else:
         st.warning("Nenhum dado encontrado com os filtros aplicados.")
 
-with tab3:
+
+# Ranking de categorias (tabelas + gráfico de faturamento montados em segundo plano)
+def compute_ranking(cube_view, has_rows):
+    if not has_rows:
+        return None, None
+    rank_df = categoria_table(cube_view)[["Categoria", "Valor Total Compra", "Valor Total Negociado", "Valor Previsto", "Nota Fiscal"]].copy()
+    rank_df["Economia"] = rank_df["Valor Previsto"] - rank_df["Valor Total Negociado"]
+    rank_df["Overstock"] = rank_df["Valor Total Negociado"] - rank_df["Valor Total Compra"]
+    rank_df = rank_df.rename(columns={"Nota Fiscal": "Qtd Notas Fiscais"})
+    fig_fat_cat_value = None
+    if 'Faturado?' in cube_view.columns:
+        fat_cat_analysis = categoria_faturamento_table(cube_view).rename(columns={"Qtd": "Insumo"})
+        fig_fat_cat_value = px.bar(fat_cat_analysis, x='Categoria', y='Valor Total Compra', color='Faturado?', title='Valor Total por Status de Faturamento e Categoria', barmode='stack')
+    return rank_df, fig_fat_cat_value
+
+
+def render_analise_avancada(job, polling):
     st.subheader("📈 Ranking de Categorias - Análise Avançada")
-    if not filtered_df.empty:
-        rank_df = filtered_df.groupby ("Categoria").agg({
-            "Valor Total Compra": "sum",
-            "Valor Total Negociado": "sum",
-            "Valor Previsto": "sum",
-            "Nota Fiscal": "nunique"
-        }).reset_index()
-        rank_df["Economia"] = rank_df["Valor Previsto"] - rank_df["Valor Total Negociado"]
-        rank_df["Overstock"] = rank_df["Valor Total Negociado"] - rank_df["Valor Total Compra"]
-        rank_df = rank_df.rename(columns={"Nota Fiscal": "Qtd Notas Fiscais"})
-        styled_rank_df = rank_df.copy()
-        for col in ["Valor Total Compra", "Valor Total Negociado", "Valor Previsto", "Economia", "Overstock"]:
-            styled_rank_df[col] = styled_rank_df[col].apply(format_brl)
+    result = job_result(job, polling)
+    if result is None:
+        return
+    rank_df, fig_fat_cat_value = result
+    if rank_df is not None:
+        rank_brl = ["Valor Total Compra", "Valor Total Negociado", "Valor Previsto", "Economia", "Overstock"]
         st.markdown("### 🏆 Maiores Economias")
         st.dataframe(
-            styled_rank_df.sort_values(by="Economia", ascending=False)
-            .style.map(lambda x: "color: green" if "-" not in str(x) else "color: red", subset=["Economia"]),
+            brl_style(rank_df.sort_values(by="Economia", ascending=False)
+                      .style.map(lambda x: "color: green" if x >= 0 else "color: red", subset=["Economia"]), *rank_brl),
             use_container_width=True,
             hide_index=True
         )
         st.markdown("### 💸 Categorias com Maior Investimento")
-        st.dataframe(styled_rank_df.sort_values(by="Valor Total Compra", ascending=False), use_container_width=True, hide_index=True)
+        st.dataframe(
+            brl_style(rank_df.sort_values(by="Valor Total Compra", ascending=False), *rank_brl),
+            use_container_width=True, hide_index=True
+        )
 
         st.markdown("### 💰 Status de Faturamento por Categoria")
-        if 'Faturado?' in filtered_df.columns:
-            fat_cat_analysis = filtered_df.groupby(['Categoria','Faturado?']).agg({
-                'Valor Total Compra':'sum','Insumo':'count'
-            }).reset_index()
-            fig_fat_cat_value = px.bar(fat_cat_analysis, x='Categoria', y='Valor Total Compra', color='Faturado?', title='Valor Total por Status de Faturamento e Categoria', barmode='stack')
+        if fig_fat_cat_value is not None:
             st.plotly_chart(fig_fat_cat_value, use_container_width=True, key="fat_cat_value")
     else:
         st.warning("Sem dados disponíveis para análise avançada.")
 
-# Status de entrega detalhado (usa 'qtd' para exibição)
-st.markdown("### 📦 Status de Entrega dos Itens (OK)")
-df["Qtd Armazenada"] = df["Qtd Armazenada"].apply(to_float)
-df["Situação"] = df["Situação"].astype(str)
 
-# Na seção de exibição detalhada (Entregues / Aguardando) usamos status_norm para decidir
-df_ok = df[df["status_norm"].isin(["entregue", "aguardando", "em orçamento"])].copy()
-df_ok["Status Entrega"] = df_ok.apply(
-    lambda r: "Entregue" if (r["status_norm"] == "entregue" or to_float(r.get("Qtd Armazenada", 0)) > 0) else "Aguardando Entrega",
-    axis=1
-)
+begin_section("abas")
+tab1, tab2, tab3 = lazy_tabs(["📊 Visualizações", "📋 Tabela de Itens", "📈 Análise Avançada"], "abas")
+with tab1:
+    if is_open(tab1):
+        with stage("Visualizações"):
+            render_visualizacoes(cube_view)
+with tab2:
+    if is_open(tab2):
+        with stage("Tabela de Itens") as rec:
+            render_tabela_itens(filtered_df, df, ingest_info["edits_key"])
+            rec["linhas"] = len(filtered_df)
+with tab3:
+    if is_open(tab3):
+        with stage("Análise Avançada"):
+            background_section(render_analise_avancada, "ranking", filter_state, compute_ranking, cube_view,
+                               not filtered_df.empty)
+
+# Status de entrega detalhado (usa 'qtd' para exibição); a separação roda em segundo plano
+def compute_entregas(df, status_col):
+    # Na seção de exibição detalhada (Entregues / Aguardando) usamos status_norm para decidir
+    df_ok = df[df["status_norm"].isin(["entregue", "aguardando", "em orçamento"])].copy()
+    df_ok["Qtd Armazenada"] = to_float_series(df_ok["Qtd Armazenada"])
+    df_ok["Status Entrega"] = np.where(
+        (df_ok["status_norm"] == "entregue") | (df_ok["Qtd Armazenada"].fillna(0) > 0), "Entregue", "Aguardando Entrega"
+    )
 
-# Entregues: todos que foram marcados como "Entregue"
-entregues = df_ok[df_ok["Status Entrega"] == "Entregue"].copy()
+    # Entregues: todos que foram marcados como "Entregue"
+    entregues = df_ok[df_ok["Status Entrega"] == "Entregue"]
 
-# Aguardando: somente os que têm status_norm == "aguardando" (orçamentos aprovados aguardando entrega)
-aguardando = df_ok[(df_ok["Status Entrega"] == "Aguardando Entrega") & (df_ok["status_norm"] == "aguardando")].copy()
+    # Aguardando: somente os que têm status_norm == "aguardando" (orçamentos aprovados aguardando entrega)
+    aguardando = df_ok[(df_ok["Status Entrega"] == "Aguardando Entrega") & (df_ok["status_norm"] == "aguardando")]
 
-# Exibe colunas (usa 'qtd' unificada)
-col_entregue, col_aguardando = st.columns(2)
-with col_entregue:
-    st.markdown("#### ✅ Entregues")
+    # Colunas exibidas (usa 'qtd' unificada)
     qty_options = ["qtd", "Necessidade Compra", "Necessidade Prof.", "Necessidade Aluno", "compras"]
-    qty_col = next((c for c in qty_options if c in entregues.columns), None)
-    cols_entrega = ["Categoria", "Código", "Insumo"]
+    qty_col = next((c for c in qty_options if c in df_ok.columns), None)
+    cols = ["Categoria", "Código", "Insumo"]
     if qty_col:
-        cols_entrega.append(qty_col)
-    cols_entrega += ["Medida", "Qtd Armazenada", "Status Entrega", status_col, "Nota Fiscal", "Faturado?"]
-    cols_entrega = [c for c in cols_entrega if c in entregues.columns]
-    st.dataframe(entregues[cols_entrega], use_container_width=True, hide_index=True)
-
-with col_aguardando:
-    st.markdown("#### ⏳ Aguardando Entrega")
-    qty_col2 = next((c for c in qty_options if c in aguardando.columns), None)
-    cols_agu = ["Categoria", "Código", "Insumo"]
-    if qty_col2:
-        cols_agu.append(qty_col2)
-    cols_agu += ["Medida", "Qtd Armazenada", "Status Entrega", status_col, "Nota Fiscal", "Faturado?"]
-    cols_agu = [c for c in cols_agu if c in aguardando.columns]
-    st.dataframe(aguardando[cols_agu], use_container_width=True, hide_index=True)
+        cols.append(qty_col)
+    cols += ["Medida", "Qtd Armazenada", "Status Entrega", status_col, "Nota Fiscal", "Faturado?"]
+    cols = [c for c in cols if c in df_ok.columns]
+    return entregues[cols], aguardando[cols]
+
+
+def render_entregas(job, polling):
+    result = job_result(job, polling)
+    if result is None:
+        return
+    entregues, aguardando = result
+    col_entregue, col_aguardando = st.columns(2)
+    with col_entregue:
+        st.markdown("#### ✅ Entregues")
+        paged_dataframe(entregues, "tab_entregues")
+    with col_aguardando:
+        st.markdown("#### ⏳ Aguardando Entrega")
+        paged_dataframe(aguardando, "tab_aguardando")
+
+
+begin_section("Status de Entrega")
+section, section_open = lazy_section("📦 Status de Entrega dos Itens (OK)", "sec_entregas")
+with section:
+    if section_open:
+        background_section(render_entregas, "entregas", filter_state[:2], compute_entregas, df, status_col)
+
+# Prazos de entrega: baldes por semana/mês montados uma vez; o intervalo de datas só recorta os baldes
+@st.fragment
+def render_prazos(timeline):
+    c1, c2 = st.columns(2)
+    granularity = c1.radio("Granularidade", list(BUCKET_FREQS), horizontal=True, key="prazo_gran")
+    by = c2.radio("Agrupar por", ["Fornecedor", "Categoria"], horizontal=True, key="prazo_por")
+    freq = BUCKET_FREQS[granularity]
+    buckets = slice_buckets(timeline[granularity], selected_category, selected_faturamento)
+    if buckets.empty:
+        st.info("Nenhum item com Data Compra reconhecida nos filtros aplicados.")
+        return
+    first, last = buckets["inicio"].min().date(), buckets["inicio"].max().date()
+    date_range = st.date_input("Data Compra entre", (first, last), format="DD/MM/YYYY", key="prazo_datas")
+    # durante a seleção o date_input devolve só a data inicial
+    start, end = (date_range + (date_range[0],))[:2] if date_range else (first, last)
+    view = slice_buckets(buckets, selected_category, selected_faturamento, start, end, freq)
+
+    lead = lead_summary(view)
+    p1, p2, p3, p4 = st.columns(4)
+    p1.metric("🧾 Itens comprados no intervalo", f"{lead['n']}")
+    p2.metric("💰 Valor Total Compra", format_brl(lead["Valor Total Compra"]))
+    p3.metric("⏱️ Lead time médio", "—" if np.isnan(lead["lead_medio"]) else f"{lead['lead_medio']:.1f} dias",
+              None if np.isnan(lead["lead_max"]) else f"máx. {lead['lead_max']:.0f} dias", delta_color="off")
+    p4.metric("🚨 Aguardando em atraso", f"{lead['atrasados']}", f"de {lead['aguardando']} aguardando", delta_color="off")
+    st.caption(
+        f"Em atraso: aguardando com Data Entrega no passado, ou sem Data Entrega e comprado há mais de "
+        f"{timeline['prazo_dias']} dias (prazo de entrega na barra lateral)."
+    )
+    if timeline["sem_data"]:
+        st.caption(
+            f"{timeline['sem_data']} itens sem Data Compra ficam fora dos intervalos "
+            f"({timeline['atrasados_sem_data']} deles aguardando em atraso)."
+        )
+
+    series = period_series(view)
+    g1, g2 = st.columns(2)
+    fig_spend = px.bar(series, x="Período", y="Valor Total Compra", title=f"Valor Total Compra por {granularity.lower()}")
+    g1.plotly_chart(fig_spend, use_container_width=True, key="prazo_gasto")
+    fig_lead = px.line(series, x="Período", y="Lead Time Médio (dias)", markers=True,
+                       title=f"Lead time médio por {granularity.lower()} (entrega − compra)")
+    g2.plotly_chart(fig_lead, use_container_width=True, key="prazo_lead")
+
+    st.dataframe(
+        brl_style(lead_table(view, by), "Valor Total Compra"), use_container_width=True, hide_index=True,
+        column_config={
+            "Lead Time Médio (dias)": st.column_config.NumberColumn(format="%.1f"),
+            "Lead Time Máx. (dias)": st.column_config.NumberColumn(format="%.0f"),
+        }
+    )
+
+
+begin_section("Prazos de Entrega")
+section, section_open = lazy_section("⏱️ Prazos de Entrega por Fornecedor e Categoria", "sec_prazos")
+with section:
+    if section_open:
+        # com busca textual os baldes saem das linhas encontradas (como o cubo)
+        render_prazos(
+            build_timeline(filtered_df, prazo_dias=prazo_entrega) if search_term
+            else load_timeline(ingest_info["hash"], df, saved_edits, prazo_entrega)
+        )
+
+# Cotações (Orçamento 1/2/3): menor cotação, spread e economia recalculados por item
+@st.fragment
+def render_cotacoes(quotes, rows):
+    totals_q = quote_totals(quotes)
+    if not totals_q["itens_cotados"]:
+        st.info("Nenhum item com cotação válida nos filtros aplicados.")
+        return
+    q1, q2, q3, q4 = st.columns(4)
+    q1.metric("🧾 Itens cotados", f"{totals_q['itens_cotados']}", f"{totals_q['cotacoes']} cotações", delta_color="off")
+    q2.metric("💵 Economia pela menor cotação", format_brl(totals_q["Economia Cotação"]),
+              f"spread médio {totals_q['spread_medio']:.1f}%", delta_color="off")
+    q3.metric("🎯 Economia vs custo", format_brl(totals_q["Economia vs Custo"]))
+    q4.metric("⚠️ Melhor Preço ≠ menor cotação", f"{totals_q['divergentes']}",
+              f"excesso {format_brl(totals_q['Excesso Pago'])}", delta_color="inverse")
+
+    by = st.radio("Agrupar por", ["Categoria", "Fornecedor"], horizontal=True, key="cot_por")
+    st.dataframe(
+        brl_style(quote_table(rows, quotes, by), *QUOTE_SUMS), use_container_width=True, hide_index=True,
+        column_config={"Spread % médio": st.column_config.NumberColumn(format="%.1f%%")}
+    )
+
+    st.markdown("#### ⚠️ Itens com Melhor Preço diferente da menor cotação")
+    divergent = quotes["Divergente"].to_numpy()
+    shown = pd.concat([
+        rows.loc[divergent, ["Código", "Insumo", "Categoria", "Fornecedor", "Melhor Preço"]].reset_index(drop=True),
+        quotes.loc[divergent, ["Menor Cotação", "Orçamento Vencedor", "Diferença Melhor Preço", "Excesso Pago"]]
+        .reset_index(drop=True),
+    ], axis=1).sort_values("Excesso Pago", ascending=False).head(500)
+    st.caption("Os 500 itens com maior excesso pago (Melhor Preço acima da menor cotação × quantidade).")
+    st.dataframe(
+        brl_style(shown, "Melhor Preço", "Menor Cotação", "Diferença Melhor Preço", "Excesso Pago"),
+        use_container_width=True, hide_index=True,
+    )
+
+
+begin_section("Análise de Cotações")
+section, section_open = lazy_section("💬 Análise de Cotações", "sec_cotacoes")
+with section:
+    if section_open:
+        render_cotacoes(load_quotes(ingest_info["hash"], df, saved_edits).iloc[filtered_rows], filtered_df)
+
+# O que mudou desde a versão anterior da planilha: tudo aqui sai do delta, sem percorrer o df inteiro
+@st.fragment
+def render_mudancas(delta, df, status_col, previous):
+    st.caption(
+        f"Comparado com {previous['source_name']} · {previous['created_at'].replace('T', ' ')} · {previous['rows']} linhas"
+    )
+    if delta.empty:
+        st.success("Nenhuma linha mudou em relação à versão anterior.")
+        return
+    before, after = delta_totals(delta, df, status_col)
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("🆕 Linhas novas", f"{len(delta.added)}")
+    m2.metric("🗑️ Linhas removidas", f"{len(delta.removed)}")
+    m3.metric("✏️ Linhas alteradas", f"{len(delta.modified_new)}")
+    m4.metric("💰 Δ Valor Total Compra", format_brl(after["Valor Total Compra"] - before["Valor Total Compra"]))
+
+    impact = pd.DataFrame({"Antes": pd.Series(before), "Depois": pd.Series(after)}).loc[[c for c in CUBE_SUMS if c.startswith("Valor")]]
+    impact["Δ"] = impact["Depois"] - impact["Antes"]
+    st.markdown("#### 📊 Impacto nos totais (só as linhas que mudaram)")
+    st.dataframe(brl_style(impact, "Antes", "Depois", "Δ"), use_container_width=True)
+
+    if not delta.changes.empty:
+        st.markdown("#### ✏️ Campos alterados")
+        by_field = delta.changes["campo"].value_counts().rename_axis("Campo").reset_index(name="Alterações")
+        fig_fields = px.bar(by_field, x="Campo", y="Alterações", title="Alterações por campo")
+        st.plotly_chart(fig_fields, use_container_width=True, key="delta_campos")
+        st.dataframe(delta.changes, use_container_width=True, hide_index=True)
+
+    cols = [c for c in ["Código", "Insumo", "Medida", "Categoria", status_col, "Melhor Preço", "Valor Total Compra",
+                        "Nota Fiscal"] if c in df.columns]
+    if len(delta.added):
+        st.markdown("#### 🆕 Linhas novas")
+        st.dataframe(brl_style(df.iloc[delta.added][cols], "Melhor Preço", "Valor Total Compra"),
+                     use_container_width=True, hide_index=True)
+    if len(delta.removed):
+        st.markdown("#### 🗑️ Linhas removidas")
+        st.dataframe(brl_style(delta.removed_rows()[cols], "Melhor Preço", "Valor Total Compra"),
+                     use_container_width=True, hide_index=True)
+
+
+if delta is not None:
+    begin_section("O que mudou")
+    section, section_open = lazy_section("🔄 O que mudou desde a versão anterior", "sec_mudancas")
+    with section:
+        if section_open:
+            render_mudancas(delta, df, status_col, previous_version)
+
+# Comparação entre períodos do histórico consolidado (modo banco de dados)
+@st.fragment
+def render_comparacao(history, current):
+    c1, c2 = st.columns(2)
+    atual = c2.selectbox("Período", history, index=history.index(current) if current in history else len(history) - 1,
+                         key="cmp_atual")
+    anteriores = [p for p in history if p < atual] or [p for p in history if p != atual]
+    anterior = c1.selectbox("Comparar com", anteriores, index=len(anteriores) - 1, key="cmp_anterior")
+    totals_by_period, items, transitions = load_period_comparison(DB_PATH, anterior, atual)
+
+    fig_hist = px.line(
+        totals_by_period, x="Período", y=["Valor Total Compra", "Valor Total Negociado", "Valor Previsto"],
+        markers=True, title="Totais por período"
+    )
+    st.plotly_chart(fig_hist, use_container_width=True, key="cmp_hist")
+
+    changed = items[items["Mudou"]]
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("🔁 Itens alterados", f"{len(changed)}")
+    m2.metric("🆕 Novos", f"{(items['Status (anterior)'] == MISSING_STATUS).sum()}")
+    m3.metric("🗑️ Removidos", f"{(items['Status (atual)'] == MISSING_STATUS).sum()}")
+    m4.metric("💰 Δ Valor Total Compra", format_brl(items["Δ Valor Total Compra"].sum()))
+
+    st.markdown("#### 🔀 Transições de status")
+    moved = transitions[transitions["Status (anterior)"] != transitions["Status (atual)"]]
+    if moved.empty:
+        st.info("Nenhum item mudou de status entre os períodos.")
+    else:
+        st.dataframe(moved, use_container_width=True, hide_index=True)
+
+    st.markdown("#### 📋 Itens por Código")
+    only_changed = st.checkbox("Somente itens alterados", value=True, key="cmp_only_changed")
+    shown = changed if only_changed else items
+    st.dataframe(
+        brl_style(shown.drop(columns="Mudou").sort_values("Δ Valor Total Compra", key=abs, ascending=False),
+                  "Melhor Preço (anterior)", "Melhor Preço (atual)", "Δ Melhor Preço",
+                  "Valor Total Compra (anterior)", "Valor Total Compra (atual)", "Δ Valor Total Compra"),
+        use_container_width=True, hide_index=True,
+        column_config={"Δ Melhor Preço %": st.column_config.NumberColumn(format="%.1f%%")}
+    )
+
+
+history = [p for p in periods if p is not None] if sql_mode else []
+if len(history) > 1:
+    begin_section("Comparação entre períodos")
+    section, section_open = lazy_section("📆 Comparação entre períodos", "sec_periodos")
+    with section:
+        if section_open:
+            render_comparacao(history, selected_period)
 
 st.markdown("""
 ---
@@ -556,75 +982,139 @@ Desenvolvido por Leon – 2026 | Interface aprimorada com foco em clareza e dese
 """)
 
 # --- Relatório resumido (tela + download CSV / Excel) ---
-summary = {
-    "Total Itens": len(filtered_df),
-    "Total Compra (R$)": total_compra,
-    "Total Negociado (R$)": total_negociado,
-    "Total Previsto (R$)": total_previsto,
-    "Total Necessidade (R$)": total_necessidade,
-    "Valor Histórico (R$)": total_historico,
-    "Economia Total (R$)": total_economia,
-    "Total Overstock (R$)": total_overstock_calculado,
-    "Necessidade Prof. (unidades)": need_prof_total,
-    "Necessidade Aluno (unidades)": need_aluno_total,
-    "Itens Aguardando (count)": aguardando_count,
-    "Valor Aguardando (R$)": aguardando_valor,
-    "% Aguardando (base)": aguardando_pct,
-    "Itens Base Entrega": base_total,
-    "Itens Entregues": entregues_ok,
-    "% Entregue (base)": percentual_entregue
-}
+begin_section("Relatório Resumido")
+summary = summary_dict(totals)
 
 # DataFrame legível
-summary_df = pd.DataFrame.from_dict(summary, orient="index", columns=["Valor"])
+summary_df = summary_frame(summary)
 # mostra na tela
 st.markdown("### 🧾 Relatório Resumido")
 st.dataframe(summary_df, use_container_width=True, hide_index=False)
 
-# prepara downloads (CSV)
-csv_bytes = summary_df.to_csv(sep=";", encoding="utf-8-sig").encode("utf-8-sig")
+# download do resumo em CSV (gerado só quando solicitado)
+def build_summary_csv():
+    return summary_df.to_csv(sep=";", encoding="utf-8-sig").encode("utf-8-sig")
+
 st.download_button(
     label="⬇️ Baixar Relatório Resumido (CSV)",
-    data=csv_bytes,
+    data=build_summary_csv,
     file_name="relatorio_resumido.csv",
     mime="text/csv"
 )
 
-# prepara downloads (Excel) com folha 'Resumo' + opcional 'Detalhado' com filtered_df
-from io import BytesIO
-output = BytesIO()
-
-# tenta escolher um engine Excel disponível: prefer xlsxwriter, fallback para openpyxl
-import importlib.util
-engine = None
-if importlib.util.find_spec("xlsxwriter") is not None:
-    engine = "xlsxwriter"
-elif importlib.util.find_spec("openpyxl") is not None:
-    engine = "openpyxl"
-else:
-    engine = None
-
-if engine:
-    with pd.ExcelWriter(output, engine=engine) as writer:
-        # salva resumo
-        summary_df.to_excel(writer, sheet_name="Resumo")
-        # salva aba detalhada (opcional: limitar colunas)
-        try:
-            filtered_df.to_excel(writer, sheet_name="Detalhado", index=False)
-        except Exception:
-            pass
-    excel_data = output.getvalue()
+begin_section("exportação")
+# Exportação completa em segundo plano; o arquivo fica guardado por conjunto de dados + filtros + formato
+export_state = filter_state
+
+
+def render_export(summary_df, filtered_df, polling):
+    label = st.selectbox("Formato da exportação", list(EXPORT_FORMATS), key="export_format")
+    build, ext, mime = EXPORT_FORMATS[label]
+    if build is build_xlsx and excel_engine() is None:
+        st.warning("Não foi possível gerar XLSX — instale 'XlsxWriter' ou 'openpyxl' (pip install XlsxWriter openpyxl) para habilitar o download em Excel.")
+        return
+    jobs = export_jobs()
+    key = export_state + (label,)
+    job = jobs.get(key)
+    if job is None:
+        if st.button("⚙️ Gerar arquivo", key="export_start"):
+            jobs.submit(key, label, summary_df, filtered_df)
+            st.rerun()
+    elif not job.done():
+        st.info("⏳ Gerando arquivo em segundo plano...")
+    elif polling:
+        # pronto: volta a renderizar sem a consulta periódica
+        st.rerun()
+    elif job.exception() is not None:
+        st.error(f"Falha ao gerar o arquivo: {job.exception()}")
+        if st.button("🔁 Tentar novamente", key="export_retry"):
+            jobs.submit(key, label, summary_df, filtered_df)
+            st.rerun()
+    else:
+        timer = active_timer()
+        if timer is not None and jobs.duration(key) is not None:
+            timer.add(f"arquivo gerado em segundo plano ({label})", jobs.duration(key), len(filtered_df))
+        st.download_button(
+            label=f"⬇️ Baixar {label} ({len(job.result()) / 1024:,.0f} KB)",
+            data=job.result(),
+            file_name=f"relatorio.{ext}",
+            mime=mime,
+            key="export_download",
+        )
+
+
+# enquanto há arquivo sendo gerado, só o fragment da exportação é consultado a cada segundo
+export_label = st.session_state.get("export_format", next(iter(EXPORT_FORMATS)))
+export_job = export_jobs().get(export_state + (export_label,))
+export_polling = export_job is not None and not export_job.done()
+st.fragment(render_export, run_every=1 if export_polling else None)(summary_df, filtered_df, export_polling)
+
+# opcional: salva o relatório (resumo + detalhado filtrado) no histórico do banco, sem sobrescrever os anteriores
+if st.button("💾 Salvar relatório no servidor"):
+    report_name = source_name if source_name is not None else f"{DB_PATH} · {selected_period or '(sem período)'}"
+    report_id = save_report(summary, filtered_df, ingest_info["hash"], report_name, {
+        "categorias": list(filter_state[2]), "faturamento": list(filter_state[3]), "busca": search_term,
+    })
+    st.success(f"Relatório #{report_id} salvo no histórico ({DB_PATH}).")
+
+# Tendência dos indicadores ao longo dos relatórios salvos (lê só a tabela pequena de indicadores)
+@st.fragment
+def render_tendencia(reports):
+    nomes = ["Todas as planilhas"] + sorted(reports["nome"].dropna().unique())
+    c1, c2 = st.columns([1, 2])
+    nome = c1.selectbox("Planilha", nomes, key="tend_nome")
+    kpis = c2.multiselect(
+        "Indicadores", list(SUMMARY_COLUMNS), key="tend_kpis",
+        default=["Total Compra (R$)", "Total Negociado (R$)", "Economia Total (R$)"],
+    )
+    view = reports if nome == nomes[0] else reports[reports["nome"] == nome]
+    if kpis:
+        fig_tend = px.line(view, x="salvo_em", y=kpis, markers=True, title="Indicadores por relatório salvo",
+                           labels={"salvo_em": "Salvo em", "value": "Valor", "variable": "Indicador"})
+        st.plotly_chart(fig_tend, use_container_width=True, key="tend_fig")
+
+    st.dataframe(
+        brl_style(view[["id", "salvo_em", "nome", "linhas"] + kpis].iloc[::-1], *[k for k in kpis if "(R$)" in k]),
+        use_container_width=True, hide_index=True,
+        column_config={"salvo_em": st.column_config.DatetimeColumn("Salvo em", format="DD/MM/YYYY HH:mm")},
+    )
+
+    # o detalhado (Parquet no banco) só é lido quando o download é pedido
+    chosen = st.selectbox("Relatório", view["id"].iloc[::-1], key="tend_id",
+                          format_func=lambda i: f"#{i} · {reports.loc[reports['id'] == i, 'salvo_em'].iloc[0]:%d/%m/%Y %H:%M}")
     st.download_button(
-        label="⬇️ Baixar Relatório Resumido (Excel)",
-        data=excel_data,
-        file_name="relatorio_resumido.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        label="⬇️ Baixar detalhado do relatório (CSV)",
+        data=lambda: load_report_detail(chosen).to_csv(sep=";", index=False, encoding="utf-8-sig").encode("utf-8-sig"),
+        file_name=f"relatorio_detalhado_{chosen}.csv",
+        mime="text/csv",
+        key="tend_download",
     )
-else:
-    st.warning("Não foi possível gerar XLSX — instale 'XlsxWriter' ou 'openpyxl' (pip install XlsxWriter openpyxl) para habilitar o download em Excel.")
 
-# opcional: botão para salvar snapshot no servidor (somente se desejar)
-if st.button("💾 Salvar relatório no servidor"):
-    summary_df.to_csv("relatorio_resumido_snapshot.csv", sep=";", encoding="utf-8-sig")
-    filtered_df.to_csv("relatorio_detalhado_snapshot.csv", sep=";", index=False, encoding="utf-8-sig")
-    st.success("Snapshots salvos no diretório do app.")
\ No newline at end of file
+
+begin_section("relatórios salvos")
+reports = load_reports(DB_PATH) if os.path.exists(DB_PATH) else None
+if reports is not None and not reports.empty:
+    section, section_open = lazy_section("📈 Tendência dos relatórios salvos", "sec_tendencia")
+    with section:
+        if section_open:
+            render_tendencia(reports)
+
+# Painel de diagnóstico: tempo, linhas e variação de memória de cada etapa deste rerun
+def request_profile():
+    st.session_state["profile_next_run"] = True
+
+
+with st.sidebar.expander("⏱️ Tempo por etapa"):
+    st.toggle("Medir etapas", value=enabled_by_env(), key="timing_enabled",
+              help="Também pode ser ligado com a variável de ambiente DASHBOARD_TIMING=1.")
+    st.button("Perfilar próximo rerun (cProfile)", on_click=request_profile, disabled=not timing_enabled)
+    run_timer = end_run(fonte=ingest_info["hash"][:16], linhas=len(df), linhas_filtradas=len(filtered_df))
+    if run_timer is not None:
+        st.caption(f"Rerun em {run_timer.total:.2f} s · registrado em {TIMING_LOG}")
+        st.dataframe(run_timer.frame(), use_container_width=True, hide_index=True, column_config={
+            "Segundos": st.column_config.NumberColumn(format="%.3f"),
+            "Δ Memória (MB)": st.column_config.NumberColumn(format="%.1f"),
+        })
+        if run_timer.profile_text:
+            st.caption(f"Perfil salvo em {run_timer.profile_path}")
+            st.code(run_timer.profile_text)
@@ -0,0 +1,81 @@
+import pandas as pd
+
+from dashboard_core import EDITOR_RENAME, diff_edits
+
+# Tabelas grandes paginadas no servidor: ordenação, filtro e seleção de colunas rodam no pandas e só
+# a janela visível (uma página) vai para o navegador. Abaixo de PAGINATE_MIN_ROWS a tabela vai inteira
+PAGINATE_MIN_ROWS = 1000
+PAGE_SIZES = [50, 100, 250, 500]
+TABLE_PAGE_SIZE = 100
+
+
+def _sort_values(series):
+    # category ordena pela ordem das categorias, não pelo texto
+    return series.astype(str) if isinstance(series.dtype, pd.CategoricalDtype) else series
+
+
+def table_rows(frame, sort_by=None, ascending=True, filter_col=None, filter_text=""):
+    # Índice das linhas na ordem exibida depois do filtro (texto contido, sem diferenciar maiúsculas)
+    # e da ordenação (estável; vazios por último)
+    rows = frame.index
+    if filter_col is not None and filter_text:
+        values = frame[filter_col].astype(str)
+        rows = rows[values.str.contains(filter_text.strip(), case=False, regex=False, na=False).to_numpy()]
+    if sort_by is not None:
+        keys = _sort_values(frame.loc[rows, sort_by])
+        rows = keys.sort_values(ascending=ascending, kind="stable", na_position="last").index
+    return rows
+
+
+def _display(frame, rows, columns):
+    # category vira texto só nas linhas exibidas (o editor aceita valores novos)
+    window = frame.loc[rows, columns]
+    category_cols = window.select_dtypes("category").columns
+    if len(category_cols):
+        window[category_cols] = window[category_cols].astype(str)
+    return window
+
+
+def page_count(rows, page_size=TABLE_PAGE_SIZE):
+    return max(-(-len(rows) // page_size), 1)
+
+
+def table_window(frame, rows, columns, page, page_size=TABLE_PAGE_SIZE):
+    # Uma página (0 = primeira) das linhas já filtradas/ordenadas, só com as colunas escolhidas
+    page = min(max(page, 0), page_count(rows, page_size) - 1)
+    return _display(frame, rows[page * page_size:(page + 1) * page_size], columns)
+
+
+def editor_frame(window):
+    return window.rename(columns={k: v for k, v in EDITOR_RENAME.items() if k in window.columns})
+
+
+def overlay_edits(window, pending):
+    # Reaplica na janela as alterações ainda não salvas ({(linha, coluna): valor}) para que voltar a
+    # uma página mostre o que já foi digitado nela
+    shown = window.copy()
+    for (row, col), value in pending.items():
+        if row in shown.index and col in shown.columns:
+            shown.loc[row, col] = value
+    return shown
+
+
+def page_edits(pending, original, edited):
+    # Troca as alterações pendentes das linhas da janela pelas células que diferem do df neste editor
+    rows = set(original.index)
+    for cell in [cell for cell in pending if cell[0] in rows]:
+        del pending[cell]
+    for col in original.columns.intersection(edited.columns):
+        before, after = original[col], edited.loc[original.index, col]
+        changed = before.ne(after) & ~(before.isna() & after.isna())
+        for row in changed.index[changed.to_numpy()]:
+            pending[(row, col)] = after[row]
+    return pending
+
+
+def pending_changes(frame, columns, pending):
+    # Alterações pendentes de todas as páginas no formato de diff_edits (chave Código + Insumo + Medida).
+    # frame é o df inteiro: linhas que saíram do filtro depois de editadas também são salvas
+    rows = pd.Index(list(dict.fromkeys(row for row, _ in pending))).intersection(frame.index)
+    original = editor_frame(_display(frame, rows, [c for c in columns if c in frame.columns]))
+    return diff_edits(original, overlay_edits(original, pending))
@@ -0,0 +1,148 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from dashboard_core import fill_blank
+
+# Prazos de entrega: "Data Compra"/"Data Entrega" convertidas uma vez para datetime e agregadas em
+# baldes por semana/mês (+ Categoria, Fornecedor, Faturado?). Filtros por intervalo de datas somam
+# os baldes do intervalo em vez de percorrer as linhas de novo.
+
+# formatos tentados depois de dd/mm/aaaa (o Excel lido como texto traz "2026-03-16 00:00:00")
+DATE_FORMATS = ["%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y", "%d.%m.%Y", "ISO8601"]
+
+# "aguardando" sem Data Entrega conta como atrasado quando a compra passou do prazo de entrega.
+# A planilha não traz prazo por fornecedor: este é só o valor inicial de "Prazo de entrega (dias)"
+# na barra lateral
+PRAZO_ENTREGA_DIAS = 30
+
+# granularidade -> frequência do pandas (semanas começam na segunda, como as semanas ISO)
+BUCKET_FREQS = {"Semana": "W", "Mês": "M"}
+BUCKET_DIMS = ["Categoria", "Fornecedor", "Faturado?"]
+BUCKET_SUMS = ["n", "Valor Total Compra", "lead_sum", "lead_n", "aguardando", "atrasados"]
+
+
+def parse_dates(series):
+    # texto -> datetime64 (NaT onde vazio ou inválido); só os valores distintos são convertidos
+    codes, uniques = pd.factorize(series.astype(str).str.strip())
+    text = pd.Series(uniques, dtype=object)
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    pending = (text != "").to_numpy(copy=True)
+    for fmt in DATE_FORMATS:
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(text[pending], format=fmt, errors="coerce")
+        pending &= parsed.isna().to_numpy()
+    # número serial de data do Excel (dias desde 30/12/1899)
+    serial = pending & text.str.fullmatch(r"\d{5}(\.0+)?").to_numpy(dtype=bool)
+    if serial.any():
+        parsed[serial] = pd.Timestamp("1899-12-30") + pd.to_timedelta(text[serial].astype(float), unit="D")
+    values = parsed.to_numpy()
+    return pd.Series(np.where(codes >= 0, values[codes.clip(0)], np.datetime64("NaT")), index=series.index,
+                     dtype="datetime64[ns]")
+
+
+def timeline_frame(df, today=None, prazo_dias=PRAZO_ENTREGA_DIAS):
+    # Uma linha por item: datas, lead time em dias (entrega - compra; negativo = inválido) e se é um
+    # "aguardando" atrasado (Data Entrega no passado, ou sem Data Entrega e compra há mais de prazo_dias)
+    today = pd.Timestamp(today or date.today())
+    compra = parse_dates(df["Data Compra"])
+    entrega = parse_dates(df["Data Entrega"])
+    lead = (entrega - compra).dt.days.astype("float64")
+    lead = lead.where(lead >= 0)
+    aguardando = (df["status_norm"] == "aguardando").to_numpy()
+    atrasado = aguardando & np.where(
+        entrega.notna(), entrega < today, compra + pd.Timedelta(days=prazo_dias) < today
+    )
+    return pd.DataFrame({
+        "compra": compra, "entrega": entrega, "lead": lead, "aguardando": aguardando, "atrasado": atrasado,
+    }, index=df.index)
+
+
+def bucket_start(dates, freq):
+    return dates.dt.to_period(freq).dt.start_time
+
+
+def build_buckets(df, timeline, freq):
+    # Baldes (início do período, Categoria, Fornecedor, Faturado?) com somas que se combinam entre
+    # baldes: a média do lead time sai de lead_sum / lead_n e o máximo do máximo de cada balde.
+    # Itens sem Data Compra ficam fora (não entram em nenhum intervalo)
+    dated = timeline["compra"].notna().to_numpy()
+    frame = pd.DataFrame({
+        "inicio": bucket_start(timeline["compra"][dated], freq),
+        **{col: fill_blank(df[col], "Sem Info").astype(str).to_numpy()[dated] for col in BUCKET_DIMS},
+        "Valor Total Compra": df["Valor Total Compra"].to_numpy()[dated],
+        "lead": timeline["lead"].to_numpy()[dated],
+        "aguardando": timeline["aguardando"].to_numpy()[dated].astype("int64"),
+        "atrasados": timeline["atrasado"].to_numpy()[dated].astype("int64"),
+    })
+    return frame.groupby(["inicio"] + BUCKET_DIMS, sort=True).agg(
+        n=("lead", "size"),
+        **{"Valor Total Compra": ("Valor Total Compra", "sum")},
+        lead_sum=("lead", "sum"),
+        lead_n=("lead", "count"),
+        lead_max=("lead", "max"),
+        aguardando=("aguardando", "sum"),
+        atrasados=("atrasados", "sum"),
+    ).reset_index()
+
+
+def build_timeline(df, today=None, prazo_dias=PRAZO_ENTREGA_DIAS):
+    # {"Semana": baldes, "Mês": baldes, "sem_data": itens sem Data Compra, "atrasados_sem_data": ...,
+    #  "prazo_dias": prazo usado nos atrasos}
+    timeline = timeline_frame(df, today, prazo_dias)
+    undated = timeline["compra"].isna()
+    result = {label: build_buckets(df, timeline, freq) for label, freq in BUCKET_FREQS.items()}
+    result["sem_data"] = int(undated.sum())
+    result["atrasados_sem_data"] = int((undated & timeline["atrasado"]).sum())
+    result["prazo_dias"] = prazo_dias
+    return result
+
+
+def slice_buckets(buckets, categorias, faturamento, start=None, end=None, freq="W"):
+    # Recorte dos baldes pelos filtros da barra lateral e por um intervalo de datas (ajustado aos
+    # períodos inteiros que o intervalo toca)
+    mask = buckets["Categoria"].isin(categorias) & buckets["Faturado?"].isin(faturamento)
+    if start is not None:
+        mask &= buckets["inicio"] >= pd.Period(start, freq).start_time
+    if end is not None:
+        mask &= buckets["inicio"] <= pd.Period(end, freq).start_time
+    return buckets[mask]
+
+
+def lead_summary(view):
+    n_lead = view["lead_n"].sum()
+    return {
+        "n": int(view["n"].sum()),
+        "Valor Total Compra": float(view["Valor Total Compra"].sum()),
+        "lead_medio": float(view["lead_sum"].sum() / n_lead) if n_lead else float("nan"),
+        "lead_max": float(view["lead_max"].max()) if n_lead else float("nan"),
+        "aguardando": int(view["aguardando"].sum()),
+        "atrasados": int(view["atrasados"].sum()),
+    }
+
+
+def _finish(table, key):
+    table["Lead Time Médio (dias)"] = table["lead_sum"] / table["lead_n"].where(table["lead_n"] > 0)
+    table = table.rename(columns={
+        "n": "Itens", "lead_max": "Lead Time Máx. (dias)", "aguardando": "Aguardando", "atrasados": "Atrasados",
+    })
+    return table[[key, "Itens", "Valor Total Compra", "Lead Time Médio (dias)", "Lead Time Máx. (dias)",
+                  "Aguardando", "Atrasados"]]
+
+
+def lead_table(view, by):
+    # Gasto, lead time e atrasos por Fornecedor ou Categoria
+    table = view.groupby(by).agg(
+        **{col: (col, "sum") for col in BUCKET_SUMS}, lead_max=("lead_max", "max"),
+    ).reset_index()
+    return _finish(table, by).sort_values("Valor Total Compra", ascending=False, ignore_index=True)
+
+
+def period_series(view):
+    # Uma linha por período (para os gráficos)
+    table = view.groupby("inicio").agg(
+        **{col: (col, "sum") for col in BUCKET_SUMS}, lead_max=("lead_max", "max"),
+    ).reset_index().rename(columns={"inicio": "Período"})
+    return _finish(table, "Período")
@@ -0,0 +1,164 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# Instrumentação opcional por etapa: tempo, linhas e variação de memória de cada rerun.
+# Ligada pelo toggle do painel ou pela variável de ambiente DASHBOARD_TIMING=1
+TIMING_ENV = "DASHBOARD_TIMING"
+LOG_DIR = "logs"
+TIMING_LOG = os.path.join(LOG_DIR, "timings.jsonl")
+PROFILE_TOP = 30
+
+# cada sessão roda o script na própria thread: o rerun medido fica na thread atual
+_local = threading.local()
+
+
+def enabled_by_env():
+    return os.environ.get(TIMING_ENV, "") not in ("", "0")
+
+
+def _rss_mb():
+    # memória residente atual do processo (Linux); a variação inclui as outras sessões do servidor
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class RunTimer:
+    def __init__(self, label="rerun", profile=False):
+        self.label = label
+        self.records = []
+        self.depth = 0
+        self.started = time.perf_counter()
+        self.run_at = datetime.now().isoformat(timespec="seconds")
+        self.total = None
+        self.profile_text = None
+        self.profile_path = None
+        self._section = None
+        self._profiler = cProfile.Profile() if profile else None
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    def add(self, name, seconds, rows=None, memory=None):
+        self.records.append({
+            "etapa": name, "nivel": self.depth, "segundos": seconds, "linhas": rows, "memoria_mb": memory,
+        })
+
+    def open_section(self, name, rows=None):
+        # seções do script em sequência: abrir uma fecha a anterior; as etapas dentro ficam um nível abaixo
+        self.close_section()
+        self._section = (len(self.records), time.perf_counter(), _rss_mb())
+        self.depth = 0
+        self.add(name, 0.0, rows)
+        self.depth = 1
+
+    def close_section(self):
+        if self._section is None:
+            return
+        index, start, mem = self._section
+        after = _rss_mb()
+        self.records[index]["segundos"] = time.perf_counter() - start
+        self.records[index]["memoria_mb"] = after - mem if after is not None and mem is not None else None
+        self._section = None
+        self.depth = 0
+
+    def frame(self):
+        if not self.records:
+            return pd.DataFrame(columns=["Etapa", "Segundos", "Linhas", "Δ Memória (MB)"])
+        df = pd.DataFrame(self.records)
+        return pd.DataFrame({
+            "Etapa": ["↳ " * n + name for n, name in zip(df["nivel"], df["etapa"])],
+            "Segundos": df["segundos"],
+            "Linhas": df["linhas"].astype("Int64"),
+            "Δ Memória (MB)": df["memoria_mb"],
+        })
+
+    def finish(self, log_path=TIMING_LOG, **context):
+        # encerra a medição, grava uma linha no log JSONL e, se perfilado, o .prof do rerun
+        self.close_section()
+        self.total = time.perf_counter() - self.started
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_path = os.path.join(LOG_DIR, f"profile_{self.run_at.replace(':', '')}.prof")
+            self._profiler.dump_stats(self.profile_path)
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            self.profile_text = out.getvalue()
+        line = {"run_at": self.run_at, "label": self.label, "total_s": round(self.total, 4), **context,
+                "stages": self.records}
+        with open(log_path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
+        return self
+
+
+def start_run(label="rerun", profile=False):
+    _local.timer = RunTimer(label, profile)
+    return _local.timer
+
+
+def end_run(**context):
+    timer = getattr(_local, "timer", None)
+    _local.timer = None
+    return timer.finish(**context) if timer is not None else None
+
+
+def active_timer():
+    return getattr(_local, "timer", None)
+
+
+def begin_section(name, rows=None):
+    timer = active_timer()
+    if timer is not None:
+        timer.open_section(name, rows)
+
+
+@contextmanager
+def stage(name):
+    # Mede o bloco se houver um rerun sendo medido nesta thread; sem medição é só um dict vazio.
+    # Quem chama pode preencher rec["linhas"]
+    rec = {"linhas": None}
+    timer = active_timer()
+    if timer is None:
+        yield rec
+        return
+    mem = _rss_mb()
+    start = time.perf_counter()
+    index = len(timer.records)
+    timer.add(name, 0.0)
+    timer.depth += 1
+    try:
+        yield rec
+    finally:
+        timer.depth -= 1
+        after = _rss_mb()
+        timer.records[index].update({
+            "segundos": time.perf_counter() - start,
+            "linhas": rec["linhas"],
+            "memoria_mb": after - mem if after is not None and mem is not None else None,
+        })
+
+
+@contextmanager
+def standalone_stage(name, enabled):
+    # Etapa fora do rerun completo (ex.: botão dentro de um fragment): vira uma medição própria no log
+    if active_timer() is not None or not enabled:
+        with stage(name) as rec:
+            yield rec
+        return
+    start_run(name)
+    try:
+        with stage(name) as rec:
+            yield rec
+    finally:
+        end_run()
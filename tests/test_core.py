@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate import generate, to_bytes
+from benchmarks.reference import (
+    QUOTE_COLS, format_reference, normalize_reference, parse_reference, qtd_reference, quotes_reference,
+)
+from dashboard_core import (
+    STATUS_VOCAB, compute_qtd, format_brl_array, load_planilha, load_planilha_chunked, normalize_planilha,
+    parse_brl_series,
+)
+from dashboard_quotes import analyze_quotes
+
+# Versões vetorizadas contra as implementações anteriores (benchmarks/reference.py): casos de borda
+# escritos à mão e uma planilha sintética
+
+
+def random_numbers(rows, seed=1):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(-2, 10, rows).astype("float64")
+    values[rng.random(rows) < 0.3] = 0.0
+    values[rng.random(rows) < 0.05] = np.nan
+    return values
+
+
+# compute_qtd
+
+QTD_EDGE = pd.DataFrame({
+    "Necessidade Compra": ["", "0", "R$ 1,5", None, "-1", "abc", "nan"],
+    "compras": ["2", "", "3", "4", "", "1.000,0", "5"],
+    "Necessidade Prof.": ["1", "1", "", "", "-3", "2", ""],
+})
+
+
+@pytest.mark.parametrize("frame", [
+    pytest.param(QTD_EDGE, id="texto-brl"),
+    pytest.param(QTD_EDGE.drop(columns=["compras"]), id="coluna-ausente"),
+    pytest.param(pd.DataFrame({
+        col: random_numbers(5_000, seed)
+        for seed, col in enumerate(["Necessidade Compra", "compras", "Necessidade Prof.", "Necessidade Aluno"])
+    }), id="numeros"),
+])
+def test_compute_qtd(frame):
+    pd.testing.assert_series_equal(compute_qtd(frame), qtd_reference(frame), check_names=False)
+
+
+# normalize_planilha (status_norm e is_orcado)
+
+STATUS_EDGE = pd.DataFrame({
+    "Situação": ["", "", " Entregue ", "EM ORÇAMENTO", "Em Orcamento", "aguardando", "Outro", "", None, "ENTREGUE"],
+    "Orçamento 1": ["", "  ", "R$ 1,00", "", "", None, "", "R$ 2,00", "x", ""],
+    "Orçamento 2": [None, "", "", "", "", "", "", "", "", ""],
+    "Orçamento 3": ["", "\t", "", "", "", "", "", "", "", ""],
+    "Categoria": [" A", "B", "C", "D", "E", "F", "G", "H", "I", "J"],
+})
+# status_norm esperado nas linhas em que acento/caixa diferem do vocabulário
+FOLDED = {"em orcamento": "em orçamento"}
+
+
+@pytest.mark.parametrize("frame, folded", [
+    pytest.param(STATUS_EDGE, FOLDED, id="situacao"),
+    pytest.param(STATUS_EDGE.rename(columns={"Situação": "N"}), FOLDED, id="coluna-n"),
+    pytest.param(generate(5_000, seed=1), None, id="sintetica"),
+])
+def test_normalize_planilha(frame, folded):
+    ref, ref_col = normalize_reference(frame.copy())
+    new, new_col = normalize_planilha(frame.copy())
+    assert new_col == ref_col
+    assert isinstance(new["status_norm"].dtype, pd.CategoricalDtype)
+    assert list(new["status_norm"].cat.categories[:len(STATUS_VOCAB)]) == STATUS_VOCAB
+    expected = ref["status_norm"].astype(str)
+    if folded:
+        expected = expected.replace(folded)
+    pd.testing.assert_series_equal(new["status_norm"].astype(str), expected, check_dtype=False)
+    pd.testing.assert_frame_equal(new.drop(columns="status_norm"), ref.drop(columns="status_norm"))
+
+
+# parse_brl_series
+
+BRL_EDGE = [
+    "R$ 1.234,56", "1.234,56", "-R$ 10,00", "R$ -10,00", " 12,5 ", "1,000", "1.000", "1.2.3", "1e3", "1_000",
+    "inf", "nan", "", "  ", "-", "abc", "R$", None, np.nan, 0, 7, 2.5,
+]
+
+
+@pytest.mark.parametrize("values", [
+    pytest.param(pd.Series(BRL_EDGE, dtype=object), id="objeto"),
+    pytest.param(pd.Series([v for v in BRL_EDGE if isinstance(v, str)], dtype="str"), id="str"),
+    pytest.param(pd.Series(random_numbers(1_000)), id="float"),
+    pytest.param(pd.Series([], dtype=object), id="vazia"),
+    pytest.param(generate(5_000, seed=1)["Valor Total Compra"], id="sintetica"),
+])
+def test_parse_brl_series(values):
+    result, _ = parse_brl_series(values)
+    pd.testing.assert_series_equal(result, parse_reference(values).astype("float64"))
+    assert result.index.equals(values.index)
+
+
+def test_parse_brl_series_failures():
+    # vazio vira 0 sem contar como falha; texto que não é número conta
+    _, failures = parse_brl_series(pd.Series(["", "R$ 1,00", "abc", "-", None]))
+    assert failures == 2
+
+
+# format_brl_array
+
+@pytest.mark.parametrize("values", [
+    pytest.param(pd.Series([0, -0.0, 0.005, -0.004, 1.005, 2.675, 999.995, 1_000, 1e15, -1e12,
+                            np.nan, np.inf, -np.inf, 1e20, 123_456_789.126]), id="bordas"),
+    pytest.param(pd.Series(np.random.default_rng(1).gamma(2.0, 40.0, 20_000).round(2) * 1_000), id="aleatorios"),
+    pytest.param(pd.Series([], dtype="float64"), id="vazia"),
+])
+def test_format_brl_array(values):
+    assert list(format_brl_array(values)) == list(format_reference(values))
+
+
+# analyze_quotes
+
+QUOTES_EDGE = pd.DataFrame({
+    "Situação": ["Em Orçamento"] * 6,
+    "Orçamento 1": ["", "x", "R$ 10,00", "R$ 5,00", "R$ 0,00", "R$ 1.000,50"],
+    "Orçamento 2": ["", "", "R$ 10,00", "R$ 7,50", "R$ 3,00", ""],
+    "Orçamento 3": ["", "", "", "R$ 4,99", "", "R$ 999,00"],
+    "Melhor Preço": ["R$ 9,00", "R$ 1,00", "R$ 10,00", "", "R$ 3,004", "R$ 1.000,50"],
+    "custo": ["R$ 8,00", "", "R$ 12,00", "R$ 6,00", "", "R$ 900,00"],
+    "Necessidade Compra": ["1", "2", "3", "4", "5", "6"],
+})
+
+
+@pytest.mark.parametrize("frame", [
+    pytest.param(QUOTES_EDGE, id="bordas"),
+    pytest.param(generate(5_000, seed=1), id="sintetica"),
+])
+def test_analyze_quotes(frame):
+    # sem cotação, texto/zero como cotação, empate, Melhor Preço vazio ou igual à menor
+    df, _, _ = load_planilha(to_bytes(frame), "teste.csv")
+    pd.testing.assert_frame_equal(
+        analyze_quotes(df)[QUOTE_COLS], quotes_reference(df), check_dtype=False, rtol=1e-9, atol=1e-9,
+    )
+
+
+# load_planilha_chunked
+
+def chunked_frame():
+    # categorias que só aparecem em blocos do fim, coluna de alta cardinalidade e falhas numéricas
+    raw = generate(3_000, seed=4)
+    raw["Fornecedor"] = [f"Fornecedor {i}" for i in range(len(raw))]
+    raw.loc[2_500:, "Situação"] = "Devolvido"
+    raw.loc[2_600:, "Medida"] = "GL"
+    raw.loc[::97, "custo"] = "abc"
+    return raw
+
+
+@pytest.mark.parametrize("frame, chunk_rows", [
+    pytest.param(chunked_frame(), 10_000, id="um-bloco"),
+    pytest.param(chunked_frame(), 700, id="varios-blocos"),
+    pytest.param(chunked_frame().iloc[:0], 700, id="so-cabecalho"),
+])
+def test_load_planilha_chunked(frame, chunk_rows):
+    data = to_bytes(frame)
+    full, full_col, full_failures = load_planilha(data, "teste.csv")
+    chunked, chunked_col, chunked_failures = load_planilha_chunked(data, "teste.csv", chunk_rows)
+    pd.testing.assert_frame_equal(chunked, full)
+    assert (chunked_col, chunked_failures) == (full_col, full_failures)
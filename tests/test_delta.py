@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate import to_bytes, versions
+from benchmarks.reference import diff_reference
+from dashboard_core import load_planilha
+from dashboard_cube import build_cube_cells
+from dashboard_delta import diff_frames, update_cube
+
+# diff_frames e update_cube contra o merge em texto e o cubo montado do zero na versão nova
+
+
+def load(raw):
+    return load_planilha(to_bytes(raw), "teste.csv")[:2]
+
+
+OLD_RAW, NEW_RAW = versions(5_000, seed=1)
+OLD, STATUS_COL = load(OLD_RAW)
+
+
+def same_order():
+    raw = OLD_RAW.copy()
+    raw.loc[[3, 7, 11], "Melhor Preço"] = "R$ 2,50"
+    return raw
+
+
+@pytest.mark.parametrize("new_raw", [
+    pytest.param(NEW_RAW, id="incluidas-removidas"),
+    pytest.param(same_order(), id="mesma-ordem"),
+    # planilha reclassificada: linhas reordenadas além das alterações
+    pytest.param(NEW_RAW.sample(frac=1, random_state=2).reset_index(drop=True), id="reordenada"),
+])
+def test_diff_and_update(new_raw):
+    new, _ = load(new_raw)
+    delta = diff_frames(OLD, new)
+    added, removed, modified, n_changes = diff_reference(OLD, new)
+    np.testing.assert_array_equal(delta.added, added)
+    np.testing.assert_array_equal(delta.removed, removed)
+    np.testing.assert_array_equal(np.sort(delta.modified_new), modified)
+    assert len(delta.changes) == n_changes
+
+    updated, cells = update_cube(*build_cube_cells(OLD, STATUS_COL), delta, new, STATUS_COL)
+    expected, expected_cells = build_cube_cells(new, STATUS_COL)
+    pd.testing.assert_frame_equal(updated, expected, check_exact=False, rtol=1e-9, atol=1e-6)
+    np.testing.assert_array_equal(cells, expected_cells)
+
+
+def test_diff_unchanged():
+    assert diff_frames(OLD, OLD.copy()).empty
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate import generate, to_bytes
+from dashboard_core import (
+    DERIVED_COLS, EDIT_KEY_COLS, EDITOR_RENAME, apply_edits, compute_derived, compute_qtd, diff_edits, load_planilha,
+)
+from dashboard_sql import load_edits, save_edits
+
+# Alterações da tabela de itens: diff do editor (só células alteradas), aplicação pela chave
+# Código + Insumo + Medida (chaves repetidas, categorias novas, derivados só nas linhas afetadas)
+# e o upsert no SQLite
+
+CHANGE_COLS = EDIT_KEY_COLS + ["campo", "valor"]
+
+
+@pytest.fixture
+def planilha():
+    df, _, _ = load_planilha(to_bytes(generate(300, seed=2)), "teste.csv")
+    # as 3 primeiras linhas repetidas no fim: mesma chave em duas posições
+    return pd.concat([df, df.iloc[:3]], ignore_index=True)
+
+
+def editor_frame(df):
+    # como a tabela de itens monta o editor: campos renomeados e categorias como texto
+    display = df[EDIT_KEY_COLS + ["custo", "Melhor Preço", "Nota Fiscal", "Faturado?", "Necessidade Compra", "Local"]]
+    display = display.rename(columns=EDITOR_RENAME)
+    category_cols = display.select_dtypes("category").columns
+    display[category_cols] = display[category_cols].astype(str)
+    return display
+
+
+def changes(*rows):
+    return pd.DataFrame(list(rows), columns=CHANGE_COLS)
+
+
+def key_of(df, row):
+    return list(df.loc[row, EDIT_KEY_COLS].astype(str))
+
+
+def test_diff_edits_only_changed_cells(planilha):
+    original = editor_frame(planilha)
+    original.loc[7, "Valor Unitário Atual"] = np.nan
+    edited = original.copy()
+    edited.loc[4, "Valor Unitário Antigo"] = 12.5
+    edited.loc[9, "Nota Fiscal"] = "NF-999"
+    edited.loc[9, "Necessidade Compra"] = np.nan
+    edited.loc[11, "Local"] = "Depósito Novo"  # não editável
+    diff = diff_edits(original, edited)
+    expected = changes(
+        key_of(planilha, 4) + ["custo", "12.5"],
+        key_of(planilha, 9) + ["Nota Fiscal", "NF-999"],
+        key_of(planilha, 9) + ["Necessidade Compra", ""],
+    )
+    pd.testing.assert_frame_equal(
+        diff.sort_values(CHANGE_COLS, ignore_index=True), expected.sort_values(CHANGE_COLS, ignore_index=True),
+        check_dtype=False,
+    )
+    assert diff_edits(original, original.copy()).empty
+
+
+def test_apply_edits_duplicate_keys(planilha):
+    last = len(planilha) - 3
+    rows = apply_edits(planilha, changes(
+        key_of(planilha, 0) + ["Nota Fiscal", "NF-1"],
+        key_of(planilha, 0) + ["Nota Fiscal", "NF-2"],
+        key_of(planilha, 1) + ["Melhor Preço", "R$ 1.234,50"],
+    ))
+    # a chave vale para as duas posições; na chave repetida nas alterações fica a última
+    assert list(rows) == [0, 1, last, last + 1]
+    assert list(planilha.loc[[0, last], "Nota Fiscal"]) == ["NF-2", "NF-2"]
+    assert list(planilha.loc[[1, last + 1], "Melhor Preço"]) == [1234.5, 1234.5]
+
+
+def test_apply_edits_new_category(planilha):
+    assert isinstance(planilha["Faturado?"].dtype, pd.CategoricalDtype)
+    assert "Parcial" not in planilha["Faturado?"].cat.categories
+    before = planilha["Faturado?"].copy()
+    apply_edits(planilha, changes(key_of(planilha, 5) + ["Faturado?", "Parcial"]))
+    assert isinstance(planilha["Faturado?"].dtype, pd.CategoricalDtype)
+    assert planilha.loc[5, "Faturado?"] == "Parcial"
+    untouched = planilha.index != 5
+    assert (planilha.loc[untouched, "Faturado?"].astype(str) == before[untouched].astype(str)).all()
+
+
+def test_apply_edits_recomputes_affected_rows_only(planilha):
+    # valores derivados marcados em todas as linhas: só as alteradas podem ser recalculadas
+    planilha[DERIVED_COLS] = -1.0
+    rows = apply_edits(planilha, changes(
+        key_of(planilha, 10) + ["Melhor Preço", "10"],
+        key_of(planilha, 20) + ["Necessidade Compra", "7"],
+        key_of(planilha, 30) + ["Qtd Negociada", "3"],
+    ))
+    assert list(rows) == [10, 20, 30]
+    expected = planilha.loc[rows].copy()
+    expected["qtd"] = compute_qtd(expected)
+    compute_derived(expected)
+    pd.testing.assert_frame_equal(planilha.loc[rows, ["qtd"] + DERIVED_COLS], expected[["qtd"] + DERIVED_COLS])
+    assert planilha.loc[20, "qtd"] == 7.0
+    assert (planilha.drop(index=rows)[DERIVED_COLS] == -1.0).all().all()
+
+
+def test_save_load_round_trip(planilha, tmp_path):
+    db_path = str(tmp_path / "edicoes.db")
+    assert load_edits("fonte", db_path).empty
+    first = changes(
+        key_of(planilha, 0) + ["Nota Fiscal", "NF-1"],
+        key_of(planilha, 1) + ["custo", "2.5"],
+    )
+    assert save_edits(first, "fonte", db_path) == 2
+    # upsert: mesma chave e campo substitui o valor; outra fonte fica separada
+    save_edits(changes(key_of(planilha, 0) + ["Nota Fiscal", "NF-2"]), "fonte", db_path)
+    save_edits(changes(key_of(planilha, 2) + ["custo", "9"]), "outra", db_path)
+    saved = load_edits("fonte", db_path)
+    expected = changes(
+        key_of(planilha, 0) + ["Nota Fiscal", "NF-2"],
+        key_of(planilha, 1) + ["custo", "2.5"],
+    )
+    pd.testing.assert_frame_equal(
+        saved.sort_values(CHANGE_COLS, ignore_index=True), expected.sort_values(CHANGE_COLS, ignore_index=True),
+        check_dtype=False,
+    )
+    # aplicar o que voltou do banco dá o mesmo que aplicar as alterações direto
+    direct = planilha.copy()
+    apply_edits(direct, expected)
+    apply_edits(planilha, saved)
+    pd.testing.assert_frame_equal(planilha, direct)
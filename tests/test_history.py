@@ -0,0 +1,52 @@
+import io
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from benchmarks.generate import generate, to_bytes
+from dashboard_core import load_planilha
+from dashboard_cube import build_cube
+from dashboard_history import SUMMARY_COLUMNS, detail_bytes, list_reports, load_report_detail, save_report
+from dashboard_report import report_indicators, summary_dict
+
+# Relatórios salvos no banco: a tendência devolve os indicadores de cada snapshot e o detalhado
+# volta do Parquet (zstd) igual ao df salvo, com os mesmos tipos
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "relatorios.db")
+
+
+def snapshot(rows, seed):
+    df, status_col, _ = load_planilha(to_bytes(generate(rows, seed)), "teste.csv")
+    return summary_dict(report_indicators(build_cube(df, status_col))), df
+
+
+def test_trend_matches_saved_summaries(db_path):
+    saved = [snapshot(rows, seed) for seed, rows in enumerate([300, 500, 200])]
+    ids = [save_report(summary, df, "fonte", f"r{i}", {"Categoria": ["A"]}, db_path)
+           for i, (summary, df) in enumerate(saved)]
+    reports = list_reports(db_path)
+    assert list(reports["id"]) == ids
+    assert list(reports["linhas"]) == [len(df) for _, df in saved]
+    assert list(reports["nome"]) == ["r0", "r1", "r2"]
+    expected = pd.DataFrame([{key: float(summary[key]) for key in SUMMARY_COLUMNS} for summary, _ in saved])
+    pd.testing.assert_frame_equal(reports[list(SUMMARY_COLUMNS)], expected, check_dtype=False)
+
+
+def test_detail_round_trip(db_path):
+    summary, df = snapshot(1_000, 1)
+    filtered = df[df["status_norm"] == "aguardando"]
+    report_id = save_report(summary, filtered, db_path=db_path)
+    pd.testing.assert_frame_equal(load_report_detail(report_id, db_path), filtered.reset_index(drop=True))
+    assert load_report_detail(report_id + 1, db_path) is None
+
+
+def test_detail_is_zstd_parquet():
+    _, df = snapshot(500, 2)
+    metadata = pq.ParquetFile(io.BytesIO(detail_bytes(df))).metadata
+    codecs = {metadata.row_group(0).column(i).compression for i in range(metadata.num_columns)}
+    assert codecs == {"ZSTD"}
+    assert metadata.num_rows == len(df)
@@ -0,0 +1,90 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from benchmarks.generate import generate, to_bytes
+from dashboard_core import load_planilha
+from dashboard_cube import build_cube, nota_fiscal_table, slice_cube
+from dashboard_jobs import BackgroundJobs
+
+# BackgroundJobs: cancelamento dos estados substituídos, grupos independentes (sessões) e LRU dos resultados
+
+
+@pytest.fixture
+def jobs():
+    # um worker preso em um job até release.set(): os próximos ficam na fila
+    jobs = BackgroundJobs(max_results=4, workers=1)
+    release = threading.Event()
+    jobs.submit("ocupado", release.wait)
+    yield jobs
+    release.set()
+    jobs._pool.shutdown(wait=True)
+
+
+def test_superseded_job_is_cancelled(jobs):
+    a = jobs.submit("a", lambda: "a", group="secao")
+    b = jobs.submit("b", lambda: "b", group="secao")
+    assert a.cancelled() and not b.cancelled()
+    assert jobs.get("a") is None and jobs.get("b") is b
+    assert jobs.stats()["cancelled"] == 1
+
+
+def test_same_key_reuses_job(jobs):
+    a = jobs.submit("a", lambda: "a", group="secao")
+    assert jobs.submit("a", lambda: "outro", group="secao") is a
+    assert jobs.stats()["cancelled"] == 0
+
+
+def test_groups_are_independent(jobs):
+    # duas sessões com filtros diferentes na mesma seção não cancelam uma à outra
+    a = jobs.submit("a", lambda: "a", group=("sessao A", "secao"))
+    b = jobs.submit("b", lambda: "b", group=("sessao B", "secao"))
+    assert not a.cancelled() and not b.cancelled()
+    c = jobs.submit("c", lambda: "c", group=("sessao A", "secao"))
+    assert a.cancelled() and not b.cancelled() and not c.cancelled()
+
+
+def test_shared_key_survives_while_another_group_waits(jobs):
+    a = jobs.submit("a", lambda: "a", group=("sessao A", "secao"))
+    assert jobs.submit("a", lambda: "a", group=("sessao B", "secao")) is a
+    jobs.submit("b", lambda: "b", group=("sessao A", "secao"))
+    assert not a.cancelled()
+    jobs.submit("c", lambda: "c", group=("sessao B", "secao"))
+    assert a.cancelled()
+
+
+def test_cancelled_key_is_resubmitted(jobs):
+    a = jobs.submit("a", lambda: "a", group="secao")
+    jobs.submit("b", lambda: "b", group="secao")
+    again = jobs.submit("a", lambda: "a", group="secao")
+    assert a.cancelled() and again is not a and not again.cancelled()
+
+
+def test_results_lru():
+    jobs = BackgroundJobs(max_results=3, workers=1)
+    for key in "abc":
+        jobs.submit(key, str.upper, key).result()
+    jobs.get("a")
+    jobs.submit("d", str.upper, "d").result()
+    assert jobs.get("b") is None
+    assert [jobs.get(key).result() for key in "acd"] == ["A", "C", "D"]
+    assert jobs.stats() == {"jobs": 3, "running": 0, "cancelled": 0}
+
+
+def test_failed_job_is_resubmitted():
+    jobs = BackgroundJobs(workers=1)
+    failed = jobs.submit("a", lambda: 1 / 0)
+    assert isinstance(failed.exception(), ZeroDivisionError)
+    retried = jobs.submit("a", lambda: 1)
+    assert retried is not failed and retried.result() == 1
+    assert jobs.duration("a") is not None
+
+
+def test_section_result_matches_direct_computation():
+    df, status_col, _ = load_planilha(to_bytes(generate(2_000, seed=1)), "teste.csv")
+    cube = build_cube(df, status_col)
+    categorias, faturamento = cube["Categoria"].unique(), cube["Faturado?"].unique()
+    jobs = BackgroundJobs(workers=1)
+    job = jobs.submit(("notas fiscais",), nota_fiscal_table, slice_cube(cube, categorias, faturamento), group="notas")
+    pd.testing.assert_frame_equal(job.result(), nota_fiscal_table(slice_cube(cube, categorias, faturamento)))
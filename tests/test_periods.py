@@ -0,0 +1,104 @@
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+from benchmarks.generate import generate, to_bytes
+from dashboard_core import load_planilha
+from dashboard_periods import MISSING_STATUS, compare_periods, ingest_file, period_totals
+
+# Histórico por período: importação (arquivo sem mudança, versão corrigida, cópia entre períodos),
+# totais por período contra o caminho pandas e comparação/transições de status entre períodos
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "historico.db")
+
+
+def count(db_path, sql, *params):
+    with closing(sqlite3.connect(db_path)) as conn:
+        return conn.execute(sql, params).fetchone()[0]
+
+
+def planilha(rows, seed=0, **cols):
+    raw = generate(rows, seed)
+    for col, values in cols.items():
+        raw[col] = values
+    return raw
+
+
+def test_ingest_skips_unchanged_file(db_path):
+    data = to_bytes(generate(200, seed=1))
+    first = ingest_file(data, "compras.csv", "2026-W10", db_path)
+    assert (first["Situação"], first["Linhas"]) == ("importada", 200)
+    again = ingest_file(data, "outro nome.csv", "2026-W10", db_path)
+    assert (again["Situação"], again["Linhas"]) == ("sem mudança", 200)
+    assert count(db_path, "SELECT COUNT(*) FROM insumos") == 200
+    assert count(db_path, "SELECT COUNT(*) FROM arquivos") == 1
+
+
+def test_ingest_replaces_same_name_and_period(db_path):
+    ingest_file(to_bytes(generate(200, seed=1)), "compras.csv", "2026-W10", db_path)
+    ingest_file(to_bytes(generate(50, seed=3)), "outra.csv", "2026-W10", db_path)
+    fixed = ingest_file(to_bytes(generate(120, seed=2)), "compras.csv", "2026-W10", db_path)
+    assert (fixed["Situação"], fixed["Linhas"]) == ("substituída", 120)
+    # só as linhas do arquivo anterior saem; o outro arquivo do período fica
+    assert count(db_path, "SELECT COUNT(*) FROM insumos WHERE periodo = '2026-W10'") == 170
+    assert count(db_path, "SELECT COUNT(*) FROM arquivos WHERE nome = 'compras.csv'") == 1
+
+
+def test_ingest_copies_known_file_to_other_period(db_path):
+    data = to_bytes(generate(200, seed=1))
+    ingest_file(data, "compras.csv", "2026-W10", db_path)
+    copied = ingest_file(data, "compras.csv", "2026-W11", db_path)
+    assert (copied["Situação"], copied["Linhas"]) == ("copiada de 2026-W10", 200)
+    assert count(db_path, "SELECT COUNT(*) FROM insumos WHERE periodo = '2026-W11'") == 200
+
+
+def test_period_totals_match_pandas(db_path):
+    # variações de caixa/espaço/acento do status contam como o status canônico, como em normalize_status
+    frames = {
+        "2026-W10": generate(300, seed=1),
+        "2026-W11": planilha(6, seed=2, **{"Situação": ["ENTREGUE", " entregue", "Aguardândo", "AGUARDANDO",
+                                                         "EM ORCAMENTO", "Cancelado"]}),
+    }
+    expected = []
+    for periodo, raw in frames.items():
+        ingest_file(to_bytes(raw), f"{periodo}.csv", periodo, db_path)
+        df, _, _ = load_planilha(to_bytes(raw), f"{periodo}.csv")
+        expected.append({
+            "Período": periodo, "Itens": len(df), "Valor Total Compra": df["Valor Total Compra"].sum(),
+            "Valor Total Negociado": df["Valor Total Negociado"].sum(), "Valor Previsto": df["Valor Previsto"].sum(),
+            "Aguardando": (df["status_norm"] == "aguardando").sum(), "Entregues": (df["status_norm"] == "entregue").sum(),
+        })
+    totals = period_totals(db_path)
+    pd.testing.assert_frame_equal(totals, pd.DataFrame(expected), check_dtype=False)
+    assert list(totals[["Aguardando", "Entregues"]].iloc[1]) == [2, 2]
+
+
+def test_compare_periods_status_transitions(db_path):
+    before = planilha(4, **{
+        "Código": ["1", "2", "3", "4"], "Situação": ["Aguardando", "Em Orçamento", "Entregue", "Aguardando"],
+        "Melhor Preço": ["R$ 10,00", "R$ 5,00", "R$ 1,00", "R$ 2,00"], "Necessidade Compra": ["2", "1", "1", "1"],
+    })
+    after = planilha(4, **{
+        "Código": ["1", "2", "4", "5"], "Situação": ["Entregue", "EM ORCAMENTO", "AGUARDANDO", "Aguardando"],
+        "Melhor Preço": ["R$ 9,00", "R$ 5,00", "R$ 2,00", "R$ 3,00"], "Necessidade Compra": ["2", "1", "1", "1"],
+    })
+    ingest_file(to_bytes(before), "compras.csv", "2026-W10", db_path)
+    ingest_file(to_bytes(after), "compras.csv", "2026-W11", db_path)
+    items, transitions = compare_periods("2026-W10", "2026-W11", db_path)
+
+    items = items.set_index("Código")
+    assert items["Mudou"].to_dict() == {"1": True, "2": False, "3": True, "4": False, "5": True}
+    assert items.loc["1", "Δ Melhor Preço"] == -1.0
+    assert items.loc["1", "Δ Valor Total Compra"] == -2.0
+    assert items.loc["3", "Status (atual)"] == MISSING_STATUS
+    assert items.loc["5", "Status (anterior)"] == MISSING_STATUS
+    moved = transitions.set_index(["Status (anterior)", "Status (atual)"])["Itens"].to_dict()
+    assert moved == {
+        ("aguardando", "entregue"): 1, ("em orçamento", "em orçamento"): 1, ("aguardando", "aguardando"): 1,
+        ("entregue", MISSING_STATUS): 1, (MISSING_STATUS, "aguardando"): 1,
+    }
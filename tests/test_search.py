@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate import generate, to_bytes
+from dashboard_core import load_planilha
+from dashboard_search import SearchIndex, _trigrams, fold
+
+# SearchIndex contra varreduras diretas dos textos dobrados (Insumo + Código): Contém deve manter o
+# comportamento de str.contains sem acento/maiúsculas para qualquer tamanho de termo
+
+EDGE = pd.DataFrame({
+    "Insumo": ["ÁGUA MINERAL 500ML", "Água sanitária", "Papel A4", "papel-toalha", "Caneta azul", "Açúcar", "", "água"],
+    "Código": ["A-001", "A-002", "P-900", "P-901", "C-010", "AC-9", "X-1", "A-001"],
+})
+
+
+@pytest.fixture(scope="module")
+def planilha():
+    df, _, _ = load_planilha(to_bytes(generate(5_000, seed=1)), "teste.csv")
+    return df
+
+
+def folded_docs(df):
+    return (df["Insumo"].astype(str) + "\x00" + df["Código"].astype(str)).map(fold)
+
+
+def contains_scan(df, term):
+    term = fold(term).strip()
+    return np.flatnonzero(folded_docs(df).str.contains(term, regex=False).to_numpy())
+
+
+def prefix_scan(df, term):
+    tokens = [text.replace("\x00", " ").split() for text in folded_docs(df)]
+    terms = fold(term).split()
+    return np.array([i for i, words in enumerate(tokens) if all(any(w.startswith(t) for w in words) for t in terms)],
+                    dtype=np.int64)
+
+
+def fuzzy_scan(df, term, min_similarity=0.4, limit=50):
+    grams = _trigrams(fold(term).strip())
+    docs, codes = pd.factorize(folded_docs(df))
+    overlap = np.array([len(grams & _trigrams(text)) for text in codes])
+    keep = np.flatnonzero(overlap >= max(1, int(np.ceil(min_similarity * len(grams)))))
+    best = keep[np.argsort(-overlap[keep], kind="stable")[:limit]]
+    return np.flatnonzero(np.isin(docs, best))
+
+
+TERMS = ["a", "e", "9", "90", "ag", "água", "AGUA", "papel", "papel a", "p-9", "a-001", "mineral 500", " az ", "zz", ""]
+
+
+@pytest.mark.parametrize("term", TERMS)
+def test_contains_edge(term):
+    np.testing.assert_array_equal(SearchIndex(EDGE).contains(term), contains_scan(EDGE, term))
+
+
+@pytest.mark.parametrize("term", TERMS)
+def test_contains(planilha, term):
+    np.testing.assert_array_equal(SearchIndex(planilha).contains(term), contains_scan(planilha, term))
+
+
+@pytest.mark.parametrize("term", ["a", "ag", "agua min", "papel", "p-9", "zz"])
+def test_prefix(planilha, term):
+    np.testing.assert_array_equal(SearchIndex(planilha).prefix(term), prefix_scan(planilha, term))
+
+
+@pytest.mark.parametrize("term", ["agua", "aguaa mineral", "papl", "caneta azul", "xyz"])
+def test_fuzzy(planilha, term):
+    np.testing.assert_array_equal(SearchIndex(planilha).fuzzy(term), fuzzy_scan(planilha, term))
@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+
+import dashboard_store
+from dashboard_store import DatasetStore
+
+# DatasetStore: hits/misses, LRU, expiração por tempo ocioso e cópias rasas por sessão
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(dashboard_store.time, "time", clock)
+    return clock
+
+
+def loader(key, calls):
+    def load():
+        calls.append(key)
+        return pd.DataFrame({"Insumo": [key, key], "custo": [1.0, 2.0]}), "Situação", 0
+    return load
+
+
+def keys(store):
+    return [entry["Chave"] for entry in reversed(store.stats()["entries"])]
+
+
+def test_hits_and_misses(clock):
+    store, calls = DatasetStore(4, 60), []
+    assert store.acquire("a", "s1", loader("a", calls))[3] is False
+    assert store.acquire("a", "s2", loader("a", calls))[3] is True
+    assert store.acquire("b", "s1", loader("b", calls))[3] is False
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 2, 1 / 3)
+    assert calls == ["a", "b"]
+
+
+def test_lru_evicts_unreferenced_first(clock):
+    store, calls = DatasetStore(2, 60), []
+    for key in "abc":
+        store.acquire(key, key, loader(key, calls))
+    # sem liberar, todas têm sessão: a mais antiga sai mesmo assim (limite fixo)
+    assert keys(store) == ["b", "c"]
+    store.release("c", "c")
+    store.acquire("b", "b", loader("b", calls))
+    store.acquire("d", "d", loader("d", calls))
+    assert keys(store) == ["b", "d"]
+    assert store.stats()["evictions"] == 2
+
+
+def test_ttl_expires_idle_entries(clock):
+    store, calls = DatasetStore(4, 60), []
+    store.acquire("a", "s1", loader("a", calls))
+    clock.now += 30
+    store.acquire("b", "s1", loader("b", calls))
+    clock.now += 31
+    # "a" está ociosa há 61 s, mesmo ainda referenciada pela sessão; sai já na consulta
+    assert keys(store) == ["b"]
+    clock.now += 100
+    store.release("x", "s1")
+    assert keys(store) == []
+    assert store.stats()["evictions"] == 2
+    store.acquire("a", "s1", loader("a", calls))
+    assert calls == ["a", "b", "a"]
+
+
+def test_idle_sessions_stop_counting(clock):
+    store, calls = DatasetStore(4, 60), []
+    store.acquire("a", "s1", loader("a", calls))
+    clock.now += 50
+    store.acquire("a", "s2", loader("a", calls))
+    clock.now += 20
+    assert store.stats()["entries"][0]["Sessões"] == 1
+
+
+def test_sessions_get_shallow_copies(clock):
+    store, calls = DatasetStore(4, 60), []
+    df1 = store.acquire("a", "s1", loader("a", calls))[0]
+    df2 = store.acquire("a", "s2", loader("a", calls))[0]
+    assert df1 is not df2
+    # copy-on-write: o que uma sessão altera não aparece na outra nem no store
+    df1.loc[0, "custo"] = 99.0
+    df1["nova"] = 1
+    assert df2.loc[0, "custo"] == 1.0 and "nova" not in df2.columns
+    df3 = store.acquire("a", "s3", loader("a", calls))[0]
+    assert df3.loc[0, "custo"] == 1.0 and "nova" not in df3.columns
+    assert calls == ["a"]
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate import generate, to_bytes
+from dashboard_core import EDITOR_RENAME, EDIT_KEY_COLS, diff_edits, load_planilha
+from dashboard_table import (
+    editor_frame, overlay_edits, page_count, page_edits, pending_changes, table_rows, table_window,
+)
+
+# Tabelas paginadas: a janela contra ordenar/filtrar/fatiar o pandas direto e as alterações
+# pendentes do editor ao trocar de página
+
+COLS = ["Categoria", "Código", "Insumo", "Medida", "custo", "Melhor Preço", "Valor Total Compra", "Nota Fiscal",
+        "Faturado?"]
+PAGE_SIZE = 50
+
+
+@pytest.fixture(scope="module")
+def planilha():
+    df, _, _ = load_planilha(to_bytes(generate(2_000, seed=1)), "teste.csv")
+    df.loc[df.index[::7], "Melhor Preço"] = np.nan
+    return df
+
+
+def display(df):
+    # a tabela inteira como o editor não paginado recebe
+    frame = df[COLS].rename(columns=EDITOR_RENAME)
+    category_cols = frame.select_dtypes("category").columns
+    frame[category_cols] = frame[category_cols].astype(str)
+    return frame
+
+
+def pandas_window(df, sort_by, ascending, filter_col, filter_text, page):
+    frame = display(df)
+    if filter_col is not None and filter_text:
+        frame = frame[frame[EDITOR_RENAME.get(filter_col, filter_col)].astype(str)
+                      .str.contains(filter_text.strip(), case=False, regex=False)]
+    if sort_by is not None:
+        frame = frame.sort_values(EDITOR_RENAME.get(sort_by, sort_by), ascending=ascending, kind="stable",
+                                  na_position="last")
+    page = min(page, max(-(-len(frame) // PAGE_SIZE), 1) - 1)
+    return frame.iloc[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+
+
+@pytest.mark.parametrize("sort_by, ascending, filter_col, filter_text, page", [
+    (None, True, None, "", 0),
+    ("Valor Total Compra", False, "Insumo", "a", 3),
+    ("Melhor Preço", True, None, "", 39),
+    ("Melhor Preço", False, "Categoria", " ELÉTRICA ", 1),
+    ("Categoria", True, "Código", "1", 2),
+    ("Insumo", False, "Faturado?", "sim", 0),
+    ("custo", True, "Insumo", "zzz", 0),
+    ("Valor Total Compra", True, None, "", 1_000),
+])
+def test_window_matches_pandas(planilha, sort_by, ascending, filter_col, filter_text, page):
+    rows = table_rows(planilha, sort_by, ascending, filter_col, filter_text)
+    window = editor_frame(table_window(planilha, rows, COLS, page, PAGE_SIZE))
+    pd.testing.assert_frame_equal(window, pandas_window(planilha, sort_by, ascending, filter_col, filter_text, page))
+    assert page_count(rows, PAGE_SIZE) == max(-(-len(rows) // PAGE_SIZE), 1)
+
+
+def test_pending_edits_survive_page_changes(planilha):
+    df = planilha.copy()
+    rows = table_rows(df, "Valor Total Compra", False)
+    pending = {}
+
+    def page(number):
+        return editor_frame(table_window(df, rows, COLS, number, PAGE_SIZE))
+
+    first = page(0)
+    edited = overlay_edits(first, pending)
+    edited.iloc[0, edited.columns.get_loc("Nota Fiscal")] = "NF-1"
+    edited.iloc[1, edited.columns.get_loc("Valor Unitário Atual")] = 9.5
+    page_edits(pending, first, edited)
+
+    second = page(1)
+    shown = overlay_edits(second, pending)
+    pd.testing.assert_frame_equal(shown, second)
+    shown.iloc[2, shown.columns.get_loc("Faturado?")] = "Parcial"
+    page_edits(pending, second, shown)
+
+    # de volta à primeira página: o editor mostra o que já foi digitado, e o mesmo editor sem novas
+    # alterações não apaga as pendentes
+    back = overlay_edits(page(0), pending)
+    assert back.iloc[0]["Nota Fiscal"] == "NF-1" and back.iloc[1]["Valor Unitário Atual"] == 9.5
+    page_edits(pending, page(0), back)
+    assert len(pending) == 3
+
+    # desfazer uma célula na página tira só ela das pendentes
+    back.iloc[1, back.columns.get_loc("Valor Unitário Atual")] = first.iloc[1]["Valor Unitário Atual"]
+    page_edits(pending, page(0), back)
+    assert set(pending) == {(rows[0], "Nota Fiscal"), (rows[PAGE_SIZE + 2], "Faturado?")}
+
+    # salvar: alterações de todas as páginas, lidas do df inteiro
+    changes = pending_changes(df, COLS, pending)
+    expected = diff_edits(
+        display(df.loc[[rows[0], rows[PAGE_SIZE + 2]]]),
+        overlay_edits(display(df.loc[[rows[0], rows[PAGE_SIZE + 2]]]), pending),
+    )
+    pd.testing.assert_frame_equal(changes, expected)
+    assert list(changes["campo"]) == ["Nota Fiscal", "Faturado?"]
+    assert list(changes["valor"]) == ["NF-1", "Parcial"]
+    assert list(changes[EDIT_KEY_COLS].iloc[0].astype(str)) == list(df.loc[rows[0], EDIT_KEY_COLS].astype(str))
@@ -0,0 +1,54 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from benchmarks.generate import generate, to_bytes
+from benchmarks.reference import parse_date_cell, query_rows
+from dashboard_core import fill_blank, load_planilha
+from dashboard_timeline import BUCKET_FREQS, build_timeline, lead_table, parse_dates, slice_buckets
+
+# Consultas sobre os baldes de build_timeline contra a mesma consulta refeita nas linhas
+
+TODAY = date(2026, 7, 1)
+RANGES = [(date(2026, 2, 10), date(2026, 5, 20)), (date(2026, 6, 1), date(2026, 6, 1)), (None, None)]
+
+
+def test_parse_dates():
+    edge = pd.Series(["08/05/2026", "", "2026-03-16 00:00:00", "1/2/26", "31/02/2026", "16-03-2026",
+                      "16.03.2026", "texto", "2026-03-16", " 09/05/2026 "])
+    pd.testing.assert_series_equal(parse_dates(edge), edge.map(parse_date_cell).astype("datetime64[ns]"))
+
+
+@pytest.fixture(scope="module")
+def planilha():
+    df, _, _ = load_planilha(to_bytes(generate(5_000, seed=1)), "teste.csv")
+    return df
+
+
+@pytest.fixture(scope="module")
+def timeline(planilha):
+    return build_timeline(planilha, TODAY)
+
+
+@pytest.mark.parametrize("label", list(BUCKET_FREQS))
+@pytest.mark.parametrize("start, end", RANGES)
+@pytest.mark.parametrize("by", ["Fornecedor", "Categoria"])
+def test_lead_table(planilha, timeline, label, start, end, by):
+    df = planilha
+    categorias = df["Categoria"].astype(str).unique()
+    faturamento = fill_blank(df["Faturado?"], "Sem Info").astype(str).unique()
+    view = slice_buckets(timeline[label], categorias, faturamento, start, end, BUCKET_FREQS[label])
+    table = lead_table(view, by).set_index(by)
+    expected = query_rows(df, TODAY, start, end, BUCKET_FREQS[label], by)
+    pd.testing.assert_frame_equal(table.sort_index(), expected.sort_index()[table.columns], check_dtype=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("prazo_dias", [1, 90])
+def test_prazo_dias(planilha, prazo_dias):
+    # o prazo de entrega da barra lateral muda só os atrasos dos itens sem Data Entrega
+    timeline = build_timeline(planilha, TODAY, prazo_dias)
+    assert timeline["prazo_dias"] == prazo_dias
+    table = lead_table(timeline["Mês"], "Fornecedor").set_index("Fornecedor")
+    expected = query_rows(planilha, TODAY, None, None, "M", "Fornecedor", prazo_dias)
+    pd.testing.assert_frame_equal(table.sort_index(), expected.sort_index()[table.columns], check_dtype=False, rtol=1e-9)